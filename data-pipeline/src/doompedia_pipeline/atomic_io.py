@@ -0,0 +1,145 @@
+"""Crash-safe file writes for pack artifacts.
+
+Files are written to a temporary sibling, fsynced and renamed into place, so
+readers (clients, CDN syncs, `verify_pack`) only ever see complete files.
+Directory fsyncs that make the renames durable are batched by `DirectorySync`.
+"""
+
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# linux/fs.h: _IOW(0x94, 9, int). Clones file extents copy-on-write (Btrfs, XFS).
+FICLONE = 0x40049409
+
+
+def fsync_directory(path: Path) -> None:
+    """Persist directory entries (renames, new files); a no-op where unsupported."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class DirectorySync:
+    """Collect directories touched by atomic writes and fsync each one once."""
+
+    def __init__(self) -> None:
+        self._pending: set[Path] = set()
+
+    def add(self, path: Path) -> None:
+        self._pending.add(path.parent)
+
+    def flush(self) -> None:
+        for directory in sorted(self._pending):
+            fsync_directory(directory)
+        self._pending.clear()
+
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex[:12]}.tmp")
+
+
+def _commit(temp_path: Path, path: Path, sync: DirectorySync | None) -> None:
+    os.replace(temp_path, path)
+    if sync is None:
+        fsync_directory(path.parent)
+    else:
+        sync.add(path)
+
+
+@contextmanager
+def atomic_open(
+    path: Path,
+    mode: str = "wb",
+    encoding: str | None = None,
+    sync: DirectorySync | None = None,
+) -> Iterator[IO]:
+    """Open `path` for writing; it appears only once the block exits cleanly.
+
+    Pass a shared `sync` to defer the parent-directory fsync to `sync.flush()`.
+    """
+    if "w" not in mode:
+        raise ValueError(f"atomic_open only supports write modes, got {mode!r}")
+    temp_path = _temp_path(path)
+    handle = open(temp_path, mode, encoding=encoding)
+    try:
+        yield handle
+        handle.flush()
+        os.fsync(handle.fileno())
+        handle.close()
+        _commit(temp_path, path, sync)
+    except BaseException:
+        handle.close()
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_bytes(path: Path, data: bytes, sync: DirectorySync | None = None) -> None:
+    with atomic_open(path, "wb", sync=sync) as handle:
+        handle.write(data)
+
+
+def atomic_write_text(path: Path, text: str, sync: DirectorySync | None = None) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"), sync=sync)
+
+
+def atomic_copy(source: Path, destination: Path, sync: DirectorySync | None = None) -> None:
+    """Copy `source` (with metadata, like `shutil.copy2`) and rename it into place."""
+    temp_path = _temp_path(destination)
+    try:
+        shutil.copy2(source, temp_path)
+        with temp_path.open("rb") as handle:
+            os.fsync(handle.fileno())
+        _commit(temp_path, destination, sync)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def atomic_link(source: Path, destination: Path, sync: DirectorySync | None = None) -> None:
+    """Hard-link `source` to `destination`, replacing any existing file atomically."""
+    temp_path = _temp_path(destination)
+    os.link(source, temp_path)
+    try:
+        _commit(temp_path, destination, sync)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def atomic_reflink(source: Path, destination: Path, sync: DirectorySync | None = None) -> None:
+    """Clone `source` copy-on-write via `FICLONE` and rename it into place.
+
+    Raises `OSError` when the platform or filesystem cannot share extents, or
+    when source and destination are on different filesystems.
+    """
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflink is not supported on this platform")
+    temp_path = _temp_path(destination)
+    try:
+        with source.open("rb") as src, open(temp_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            os.fsync(dst.fileno())
+        shutil.copystat(source, temp_path)
+        _commit(temp_path, destination, sync)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
@@ -4,9 +4,9 @@ import argparse
 import gzip
 import hashlib
 import json
-from io import TextIOWrapper
 from pathlib import Path
 
+from .atomic_io import atomic_open
 from .models import CardRecord
 from .normalize import clamp_summary
 
@@ -59,24 +59,21 @@ def build_delta(
     upserts = 0
     deletes = 0
 
-    if compression == "gzip":
-        writer = gzip.open(output_path, "wb")
-        stream: TextIOWrapper | None = TextIOWrapper(writer, encoding="utf-8")
-    else:
-        stream = output_path.open("w", encoding="utf-8")
-
-    assert stream is not None
-    with stream as handle:
+    # The delta only appears at output_path once it is complete and fsynced.
+    with atomic_open(output_path, "wb") as raw:
+        handle = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) if compression == "gzip" else raw
         for page_id, target_payload in target.items():
             if page_id not in base or target_payload != base[page_id]:
-                handle.write(json.dumps({"op": "upsert", **target_payload}, ensure_ascii=False))
-                handle.write("\n")
+                handle.write(json.dumps({"op": "upsert", **target_payload}, ensure_ascii=False).encode("utf-8"))
+                handle.write(b"\n")
                 upserts += 1
 
         for page_id in sorted(set(base).difference(target)):
-            handle.write(json.dumps({"op": "delete", "page_id": page_id}))
-            handle.write("\n")
+            handle.write(json.dumps({"op": "delete", "page_id": page_id}).encode("utf-8"))
+            handle.write(b"\n")
             deletes += 1
+        if handle is not raw:
+            handle.close()
 
     hasher = hashlib.sha256()
     with output_path.open("rb") as fh:
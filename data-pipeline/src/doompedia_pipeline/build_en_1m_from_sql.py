@@ -3,6 +3,7 @@ from __future__ import annotations
 import argparse
 import gzip
 import json
+import os
 import re
 import sys
 import time
@@ -10,6 +11,8 @@ import unicodedata
 from pathlib import Path
 from urllib.parse import quote
 
+from .atomic_io import atomic_open
+from .checkpoint import clear_checkpoint, input_fingerprint, load_checkpoint, output_intact, save_checkpoint
 from .normalize import clamp_summary
 
 
@@ -33,6 +36,17 @@ def parse_args() -> argparse.Namespace:
         default=50_000,
         help="Print progress every N matched records (0 disables progress logs)",
     )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=50_000,
+        help="Persist a resumable checkpoint every N written cards and after each dump scan (0 disables)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the checkpoint next to --output-ndjson instead of starting over",
+    )
     return parser.parse_args()
 
 
@@ -343,6 +357,16 @@ def _stabilize_summary(title: str, shortdesc: str) -> str | None:
     return clamp_summary(fallback)
 
 
+def _save_phase(path: Path, payload: object) -> None:
+    with atomic_open(path, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as handle:
+        json.dump(payload, handle, ensure_ascii=False)
+
+
+def _load_phase(path: Path) -> object:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
 def build_cards(
     page_sql_gz: Path,
     page_props_sql_gz: Path,
@@ -351,32 +375,78 @@ def build_cards(
     target: int,
     oversample: float,
     progress_every: int = 0,
+    checkpoint_every: int = 0,
+    resume: bool = False,
 ) -> dict[str, int]:
-    candidates = collect_candidate_pages(
-        page_sql_gz=page_sql_gz,
+    # The SQL dumps are gzip streams that cannot be seeked cheaply, so each
+    # completed scan is persisted whole and the write phase records its
+    # candidate index and output byte offset.
+    checkpoint_dir = output_ndjson.with_name(f"{output_ndjson.name}.checkpoint")
+    checkpoint_path = checkpoint_dir / "state.json"
+    candidates_path = checkpoint_dir / "candidates.json.gz"
+    shortdescs_path = checkpoint_dir / "shortdescs.json.gz"
+    fingerprint = input_fingerprint(
+        [page_sql_gz, page_props_sql_gz],
+        language=language,
         target=target,
         oversample=oversample,
-        progress_every=progress_every,
-    )
-    candidate_ids = {page_id for page_id, _ in candidates}
-    shortdescs = collect_shortdescs(
-        page_props_sql_gz=page_props_sql_gz,
-        candidate_ids=candidate_ids,
-        progress_every=progress_every,
     )
+    state = (load_checkpoint(checkpoint_path, fingerprint) if resume else None) or {"phase": "candidates"}
+
+    if state["phase"] == "candidates":
+        candidates = collect_candidate_pages(
+            page_sql_gz=page_sql_gz,
+            target=target,
+            oversample=oversample,
+            progress_every=progress_every,
+        )
+        if checkpoint_every > 0:
+            checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            _save_phase(candidates_path, candidates)
+            state = {"phase": "shortdescs"}
+            save_checkpoint(checkpoint_path, fingerprint, state)
+    else:
+        candidates = [(int(page_id), str(title)) for page_id, title in _load_phase(candidates_path)]
+        _log(f"Resumed {len(candidates):,} candidate pages from checkpoint")
+
+    if state["phase"] in {"candidates", "shortdescs"}:
+        candidate_ids = {page_id for page_id, _ in candidates}
+        shortdescs = collect_shortdescs(
+            page_props_sql_gz=page_props_sql_gz,
+            candidate_ids=candidate_ids,
+            progress_every=progress_every,
+        )
+        if checkpoint_every > 0:
+            _save_phase(shortdescs_path, shortdescs)
+            state = {"phase": "write", "candidateIndex": 0, "written": 0, "outputOffset": 0}
+            save_checkpoint(checkpoint_path, fingerprint, state)
+    else:
+        shortdescs = {int(page_id): str(value) for page_id, value in _load_phase(shortdescs_path).items()}
+        _log(f"Resumed {len(shortdescs):,} short descriptions from checkpoint")
 
     output_ndjson.parent.mkdir(parents=True, exist_ok=True)
-    written = 0
+    resuming_write = state["phase"] == "write" and int(state.get("outputOffset", 0)) > 0
+    if resuming_write and not output_intact(output_ndjson, int(state["outputOffset"])):
+        # The scans are still valid; only the card writing starts over.
+        _log(f"{output_ndjson} is missing or shorter than its checkpoint; rewriting cards")
+        state = {"phase": "write", "candidateIndex": 0, "written": 0, "outputOffset": 0}
+        resuming_write = False
+    written = int(state.get("written", 0))
+    start_index = int(state.get("candidateIndex", 0))
     start = time.monotonic()
-    next_progress = progress_every if progress_every > 0 else 0
+    next_progress = (written // progress_every + 1) * progress_every if progress_every > 0 else 0
 
     _log(
         f"Writing cards to {output_ndjson} "
         f"(candidates: {len(candidates):,}, short descriptions: {len(shortdescs):,})"
     )
 
-    with output_ndjson.open("w", encoding="utf-8") as out:
-        for page_id, title in candidates:
+    # Output is written as bytes so the checkpointed offset is an exact file position.
+    with output_ndjson.open("r+b" if resuming_write else "wb") as out:
+        out.seek(int(state.get("outputOffset", 0)) if resuming_write else 0)
+        out.truncate()
+        for index in range(start_index, len(candidates)):
+            page_id, title = candidates[index]
             shortdesc = shortdescs.get(page_id)
             if not shortdesc:
                 continue
@@ -402,8 +472,8 @@ def build_cards(
                 "keywords": _keywords_from_text(title=title, summary=summary, topic_key=topic_key),
                 "aliases": [],
             }
-            out.write(json.dumps(record, ensure_ascii=False))
-            out.write("\n")
+            out.write(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+            out.write(b"\n")
             written += 1
             if next_progress and written >= next_progress:
                 elapsed = time.monotonic() - start
@@ -414,12 +484,30 @@ def build_cards(
                 next_progress += progress_every
             if written >= target:
                 break
+            if checkpoint_every > 0 and written % checkpoint_every == 0:
+                out.flush()
+                os.fsync(out.fileno())
+                save_checkpoint(
+                    checkpoint_path,
+                    fingerprint,
+                    {
+                        "phase": "write",
+                        "candidateIndex": index + 1,
+                        "written": written,
+                        "outputOffset": out.tell(),
+                    },
+                )
 
     elapsed = time.monotonic() - start
     _log(
         f"Card writing complete: {written:,} records "
         f"(elapsed: {elapsed:.1f}s)"
     )
+    clear_checkpoint(checkpoint_path)
+    candidates_path.unlink(missing_ok=True)
+    shortdescs_path.unlink(missing_ok=True)
+    if checkpoint_dir.exists() and not any(checkpoint_dir.iterdir()):
+        checkpoint_dir.rmdir()
 
     return {
         "candidatePages": len(candidates),
@@ -439,6 +527,8 @@ def main() -> None:
         target=args.target,
         oversample=args.oversample,
         progress_every=args.progress_every,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume,
     )
     print(json.dumps(summary, indent=2))
 
@@ -6,19 +6,27 @@ import argparse
 import concurrent.futures
 import hashlib
 import html
+import http.client
 import json
 import mimetypes
+import random
 import re
 import shutil
 import threading
 import time
 import urllib.error
 import urllib.parse
-import urllib.request
 from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator, TypeVar
+
+from .http_cache import DEFAULT_MAX_BYTES, DEFAULT_TTL_SECONDS, CacheMiss, ResponseCache, cache_key
+from .http_pool import ConnectionPool, HostPools
+from .rate_limit import THROTTLE_STATUS, AdaptiveRateLimiter, parse_retry_after
+from .thumbnail_store import ThumbnailStore
+
+T = TypeVar("T")
 
 
 API_URL = "https://en.wikipedia.org/w/api.php"
@@ -27,9 +35,18 @@ VITAL_ARTICLES_FALLBACK_PAGE = "Wikipedia:Vital articles/Level/4"
 VITAL_ARTICLES_DEEP_FALLBACK_PAGE = "Wikipedia:Vital articles/Level/5"
 USER_AGENT = "Doompedia/0.1 (+https://github.com/mahmoudelfeelig/doompedia)"
 MAX_THUMBNAIL_BYTES = 1_500_000
-DOWNLOAD_INTERVAL_SECONDS = 0.4
-_download_lock = threading.Lock()
-_last_download_started = 0.0
+API_BATCH_SIZE = 40
+# Wikimedia asks API clients not to fan out much; a few concurrent requests
+# per client is well within the etiquette guidelines.
+DEFAULT_API_CONCURRENCY = 4
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Thumbnail downloads start at 2.5 requests/s (the old fixed 0.4 s spacing) and
+# adapt from there; see rate_limit.AdaptiveRateLimiter.
+DEFAULT_DOWNLOAD_RATE = 2.5
+DEFAULT_DOWNLOAD_BURST = 5
+DEFAULT_DOWNLOAD_CONCURRENCY = 8
+DOWNLOAD_ATTEMPTS = 6
+_REDIRECT_STATUS = {301, 302, 303, 307, 308}
 SHOWCASE_TITLES = (
     "Earth",
     "Moon",
@@ -87,59 +104,174 @@ class FeaturedArticle:
     thumbnail_url: str
 
 
-def request_json(params: dict[str, Any], retries: int = 4) -> dict[str, Any]:
-    query = urllib.parse.urlencode(params)
-    request = urllib.request.Request(
-        f"{API_URL}?{query}",
-        headers={"Accept": "application/json", "User-Agent": USER_AGENT},
-    )
-    for attempt in range(retries):
-        try:
-            with urllib.request.urlopen(request, timeout=30) as response:
-                return json.load(response)
-        except Exception:
-            if attempt == retries - 1:
-                raise
-            time.sleep(2**attempt)
-    raise RuntimeError("unreachable")
+class ApiError(RuntimeError):
+    pass
+
+
+class ApiClient:
+    """MediaWiki API client over pooled keep-alive connections.
+
+    Retries back off exponentially with full jitter; 429/503 responses honour
+    `Retry-After`. `map_ordered` runs up to `concurrency` requests at once and
+    yields payloads in submission order. With a `ResponseCache`, fresh entries
+    are served from disk and stale ones revalidated conditionally.
+    """
+
+    def __init__(
+        self,
+        api_url: str = API_URL,
+        concurrency: int = DEFAULT_API_CONCURRENCY,
+        retries: int = 4,
+        backoff_seconds: float = 1.0,
+        timeout: float = 30.0,
+        cache: ResponseCache | None = None,
+    ) -> None:
+        self.api_url = api_url
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.pool = ConnectionPool(api_url, max_idle=self.concurrency, timeout=timeout)
+        self._path = urllib.parse.urlsplit(api_url).path or "/"
+        self.requests = 0
+        self.retried = 0
+        self._lock = threading.Lock()
+
+    def _delay(self, attempt: int, retry_after: str | None = None) -> float:
+        seconds = parse_retry_after(retry_after)
+        if seconds is not None:
+            return seconds
+        return random.uniform(0, self.backoff_seconds * 2**attempt)
+
+    def request_json(self, params: dict[str, Any]) -> dict[str, Any]:
+        key = cache_key(self.api_url, params)
+        entry = self.cache.load(key) if self.cache else None
+        if self.cache:
+            if entry is not None and self.cache.is_fresh(entry):
+                self.cache.record("hit")
+                return entry.payload
+            if self.cache.offline:
+                raise CacheMiss(f"Offline and not cached: {self.api_url}?{urllib.parse.urlencode(params)}")
+
+        target = f"{self._path}?{urllib.parse.urlencode(params)}"
+        headers = {"Accept": "application/json", "User-Agent": USER_AGENT}
+        if entry is not None:
+            headers.update(entry.validators())
+        for attempt in range(self.retries):
+            with self._lock:
+                self.requests += 1
+            retry_after = None
+            try:
+                status, response_headers, body = self.pool.request("GET", target, b"", headers)
+            except (OSError, http.client.HTTPException):
+                if attempt == self.retries - 1:
+                    raise
+            else:
+                if status == 304 and entry is not None and self.cache:
+                    self.cache.refresh(key, entry)
+                    self.cache.record("revalidated")
+                    return entry.payload
+                if status == 200:
+                    payload = json.loads(body)
+                    if self.cache:
+                        self.cache.store(
+                            key,
+                            payload,
+                            etag=response_headers.get("etag", ""),
+                            last_modified=response_headers.get("last-modified", ""),
+                        )
+                        self.cache.record("miss")
+                    return payload
+                if status not in _RETRYABLE_STATUS or attempt == self.retries - 1:
+                    raise ApiError(f"API request failed with HTTP {status}: {body[:200].decode('utf-8', 'replace')}")
+                retry_after = response_headers.get("retry-after")
+            with self._lock:
+                self.retried += 1
+            time.sleep(self._delay(attempt, retry_after))
+        raise RuntimeError("unreachable")
+
+    def map_ordered(self, param_list: list[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """Yield responses for `param_list` in order, keeping `concurrency` requests in flight.
+
+        Stopping iteration early cancels requests that have not started.
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending: list[concurrent.futures.Future[dict[str, Any]]] = []
+            queued = iter(param_list)
+            try:
+                for params in queued:
+                    pending.append(executor.submit(self.request_json, params))
+                    if len(pending) >= self.concurrency:
+                        break
+                while pending:
+                    payload = pending.pop(0).result()
+                    next_params = next(queued, None)
+                    if next_params is not None:
+                        pending.append(executor.submit(self.request_json, next_params))
+                    yield payload
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+_default_client: ApiClient | None = None
+
+
+def default_client() -> ApiClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = ApiClient()
+    return _default_client
+
+
+def request_json(params: dict[str, Any], client: ApiClient | None = None) -> dict[str, Any]:
+    return (client or default_client()).request_json(params)
 
 
 def chunks(values: list[str], size: int) -> list[list[str]]:
     return [values[index : index + size] for index in range(0, len(values), size)]
 
 
-def page_links(page: str) -> list[dict[str, Any]]:
-    payload = request_json(
-        {
-            "action": "parse",
-            "format": "json",
-            "formatversion": "2",
-            "page": page,
-            "prop": "links",
-            "redirects": "1",
-        }
-    )
-    return payload["parse"]["links"]
+def _links_params(page: str) -> dict[str, Any]:
+    return {
+        "action": "parse",
+        "format": "json",
+        "formatversion": "2",
+        "page": page,
+        "prop": "links",
+        "redirects": "1",
+    }
 
 
-def vital_article_titles(page: str) -> list[str]:
-    titles = {
-        link["title"]
-        for link in page_links(page)
-        if link.get("ns") == 0 and link.get("title")
-    }
+def page_links(page: str, client: ApiClient | None = None) -> list[dict[str, Any]]:
+    return request_json(_links_params(page), client)["parse"]["links"]
+
+
+def _article_titles(links: list[dict[str, Any]]) -> set[str]:
+    return {link["title"] for link in links if link.get("ns") == 0 and link.get("title")}
+
+
+def _hash_order(titles: set[str]) -> list[str]:
     return sorted(
         titles,
         key=lambda title: hashlib.sha256(title.encode("utf-8")).digest(),
     )
 
 
-def fallback_vital_titles(page: str) -> list[str]:
+def vital_article_titles(page: str, client: ApiClient | None = None) -> list[str]:
+    return _hash_order(_article_titles(page_links(page, client)))
+
+
+def fallback_vital_titles(page: str, client: ApiClient | None = None) -> list[str]:
+    client = client or default_client()
     level_match = re.search(r"/Level/(\d+)$", page)
     level = level_match.group(1) if level_match else ""
     subpages = {
         link["title"]
-        for link in page_links(page)
+        for link in page_links(page, client)
         if link.get("ns") == 4
         and (
             link.get("title", "").startswith(f"Wikipedia:Vital articles/Level/{level}/")
@@ -147,12 +279,9 @@ def fallback_vital_titles(page: str) -> list[str]:
         )
     }
     titles: set[str] = set()
-    for subpage in sorted(subpages):
-        titles.update(vital_article_titles(subpage))
-    return sorted(
-        titles,
-        key=lambda title: hashlib.sha256(title.encode("utf-8")).digest(),
-    )
+    for payload in client.map_ordered([_links_params(subpage) for subpage in sorted(subpages)]):
+        titles.update(_article_titles(payload["parse"]["links"]))
+    return _hash_order(titles)
 
 
 def unique_titles(*title_groups: list[str]) -> list[str]:
@@ -168,26 +297,32 @@ def unique_titles(*title_groups: list[str]) -> list[str]:
     return merged
 
 
-def fetch_articles(titles: list[str], stop_after: int | None = None) -> list[FeaturedArticle]:
+def fetch_articles(
+    titles: list[str],
+    stop_after: int | None = None,
+    client: ApiClient | None = None,
+) -> list[FeaturedArticle]:
+    client = client or default_client()
     articles: list[FeaturedArticle] = []
-    for batch in chunks(titles, 40):
-        payload = request_json(
-            {
-                "action": "query",
-                "format": "json",
-                "formatversion": "2",
-                "redirects": "1",
-                "prop": "extracts|pageimages|info",
-                "exintro": "1",
-                "explaintext": "1",
-                "exsentences": "3",
-                "piprop": "thumbnail|name",
-                "pithumbsize": "512",
-                "pilicense": "free",
-                "inprop": "url",
-                "titles": "|".join(batch),
-            }
-        )
+    requests = [
+        {
+            "action": "query",
+            "format": "json",
+            "formatversion": "2",
+            "redirects": "1",
+            "prop": "extracts|pageimages|info",
+            "exintro": "1",
+            "explaintext": "1",
+            "exsentences": "3",
+            "piprop": "thumbnail|name",
+            "pithumbsize": "512",
+            "pilicense": "free",
+            "inprop": "url",
+            "titles": "|".join(batch),
+        }
+        for batch in chunks(titles, API_BATCH_SIZE)
+    ]
+    for payload in client.map_ordered(requests):
         for page in payload.get("query", {}).get("pages", []):
             thumbnail = page.get("thumbnail", {})
             if page.get("missing") or not thumbnail.get("source") or not page.get("pageimage"):
@@ -211,20 +346,25 @@ def fetch_articles(titles: list[str], stop_after: int | None = None) -> list[Fea
     return articles
 
 
-def fetch_image_metadata(image_titles: list[str]) -> dict[str, dict[str, str]]:
+def fetch_image_metadata(
+    image_titles: list[str],
+    client: ApiClient | None = None,
+) -> dict[str, dict[str, str]]:
+    client = client or default_client()
     metadata: dict[str, dict[str, str]] = {}
-    for batch in chunks(image_titles, 40):
-        payload = request_json(
-            {
-                "action": "query",
-                "format": "json",
-                "formatversion": "2",
-                "prop": "imageinfo",
-                "iiprop": "url|extmetadata",
-                "iiurlwidth": "512",
-                "titles": "|".join(f"File:{title}" for title in batch),
-            }
-        )
+    requests = [
+        {
+            "action": "query",
+            "format": "json",
+            "formatversion": "2",
+            "prop": "imageinfo",
+            "iiprop": "url|extmetadata",
+            "iiurlwidth": "512",
+            "titles": "|".join(f"File:{title}" for title in batch),
+        }
+        for batch in chunks(image_titles, API_BATCH_SIZE)
+    ]
+    for payload in client.map_ordered(requests):
         for page in payload.get("query", {}).get("pages", []):
             info = (page.get("imageinfo") or [{}])[0]
             ext = info.get("extmetadata", {})
@@ -286,61 +426,88 @@ def content_output_dir(output_assets: Path) -> Path:
     return output_assets if output_assets.name == "content" else output_assets / "content"
 
 
-def download_thumbnail(article: FeaturedArticle, output_dir: Path) -> dict[str, Any]:
-    existing = next(output_dir.glob(f"{article.page_id}-512.*"), None)
-    if existing is not None and 0 < existing.stat().st_size <= MAX_THUMBNAIL_BYTES:
-        body = existing.read_bytes()
-        return {
-            "filename": existing.name,
-            "bytes": len(body),
-            "sha256": hashlib.sha256(body).hexdigest(),
-            "mime_type": mimetypes.guess_type(existing.name)[0] or "image/jpeg",
-        }
+class ThumbnailDownloader:
+    """Fetch thumbnails through per-host keep-alive pools under an adaptive rate limit."""
 
-    request = urllib.request.Request(
-        article.thumbnail_url,
-        headers={"Accept": "image/*", "User-Agent": USER_AGENT},
-    )
-    for attempt in range(6):
+    def __init__(self, limiter: AdaptiveRateLimiter | None = None, pools: HostPools | None = None) -> None:
+        self.limiter = limiter or AdaptiveRateLimiter(
+            rate=DEFAULT_DOWNLOAD_RATE,
+            burst=DEFAULT_DOWNLOAD_BURST,
+            max_concurrency=DEFAULT_DOWNLOAD_CONCURRENCY,
+        )
+        self.pools = pools or HostPools(max_idle=self.limiter.max_concurrency, timeout=45)
+
+    def fetch(self, url: str, consume: Callable[[str, http.client.HTTPResponse], T]) -> T:
+        """Call `consume(content_type, response)` with the unread body of `url`.
+
+        Throttled and failed requests are retried and redirects followed; the
+        limiter slot is held until `consume` returns, so streaming bodies count
+        against the concurrency window.
+        """
+        headers = {"Accept": "image/*", "User-Agent": USER_AGENT}
+        redirects = 0
+        attempt = 0
+        while attempt < DOWNLOAD_ATTEMPTS:
+            pool, target = self.pools.for_url(url)
+            started = self.limiter.acquire()
+            status, retry_after, location = 0, None, ""
+            try:
+                with pool.stream("GET", target, headers) as response:
+                    status = response.status
+                    if status == 200:
+                        return consume(response.getheader("Content-Type", "image/jpeg"), response)
+                    retry_after = parse_retry_after(response.getheader("Retry-After"))
+                    location = response.getheader("Location", "")
+                    response.read()
+            except (OSError, http.client.HTTPException):
+                status = 0
+                attempt += 1
+                if attempt == DOWNLOAD_ATTEMPTS:
+                    raise
+                continue
+            finally:
+                self.limiter.release(started, status, retry_after)
+            if status in _REDIRECT_STATUS and location and redirects < 3:
+                url = urllib.parse.urljoin(url, location)
+                redirects += 1
+                continue
+            if status not in THROTTLE_STATUS:
+                raise urllib.error.HTTPError(url, status, f"HTTP {status}", None, None)
+            attempt += 1
+        raise RuntimeError(f"Could not download {url} after {DOWNLOAD_ATTEMPTS} attempts")
+
+    def snapshot(self) -> dict[str, object]:
+        return {**self.limiter.snapshot(), "connections": self.pools.opened}
+
+    def close(self) -> None:
+        self.pools.close()
+
+
+def download_thumbnail(
+    article: FeaturedArticle,
+    store: ThumbnailStore,
+    downloader: ThumbnailDownloader | None = None,
+) -> dict[str, Any]:
+    stored = store.lookup(article.page_id, MAX_THUMBNAIL_BYTES)
+    if stored is not None:
+        return stored
+
+    def save(content_type: str, response: http.client.HTTPResponse) -> dict[str, Any]:
+        if not content_type.startswith("image/"):
+            raise ValueError(f"Unexpected thumbnail content type for {article.title}: {content_type}")
+        extension = extension_for(article.thumbnail_url, content_type)
         try:
-            wait_for_download_slot()
-            with urllib.request.urlopen(request, timeout=45) as response:
-                body = response.read(MAX_THUMBNAIL_BYTES + 1)
-                content_type = response.headers.get("Content-Type", "image/jpeg")
-            break
-        except urllib.error.HTTPError as error:
-            if error.code not in {429, 503} or attempt == 5:
-                raise
-            retry_after = error.headers.get("Retry-After")
-            delay = float(retry_after) if retry_after and retry_after.isdigit() else min(15 * (attempt + 1), 75)
-            time.sleep(delay)
-    else:
-        raise RuntimeError(f"Could not download thumbnail for {article.title}")
-
-    if len(body) > MAX_THUMBNAIL_BYTES:
-        raise ValueError(f"Thumbnail exceeds 1.5 MB: {article.title}")
-    if not content_type.startswith("image/"):
-        raise ValueError(f"Unexpected thumbnail content type for {article.title}: {content_type}")
-
-    extension = extension_for(article.thumbnail_url, content_type)
-    filename = f"{article.page_id}-512{extension}"
-    destination = output_dir / filename
-    destination.write_bytes(body)
-    return {
-        "filename": filename,
-        "bytes": len(body),
-        "sha256": hashlib.sha256(body).hexdigest(),
-        "mime_type": content_type.split(";", 1)[0],
-    }
-
+            return store.write(
+                article.page_id,
+                f"{article.page_id}-512{extension}",
+                content_type.split(";", 1)[0],
+                response,
+                MAX_THUMBNAIL_BYTES,
+            )
+        except ValueError as error:
+            raise ValueError(f"Thumbnail exceeds 1.5 MB: {article.title}") from error
 
-def wait_for_download_slot() -> None:
-    global _last_download_started
-    with _download_lock:
-        elapsed = time.monotonic() - _last_download_started
-        if elapsed < DOWNLOAD_INTERVAL_SECONDS:
-            time.sleep(DOWNLOAD_INTERVAL_SECONDS - elapsed)
-        _last_download_started = time.monotonic()
+    return (downloader or ThumbnailDownloader()).fetch(article.thumbnail_url, save)
 
 
 def build_pack(
@@ -349,23 +516,27 @@ def build_pack(
     output_web_content: Path | None,
     public_base_url: str,
     count: int,
+    client: ApiClient | None = None,
+    downloader: ThumbnailDownloader | None = None,
+    thumbnail_index: Path | None = None,
 ) -> None:
-    thumbnail_dir = output_media
-    thumbnail_dir.mkdir(parents=True, exist_ok=True)
+    client = client or default_client()
+    downloader = downloader or ThumbnailDownloader()
+    store = ThumbnailStore(output_media, thumbnail_index)
 
-    primary_titles = vital_article_titles(VITAL_ARTICLES_PAGE)
-    level_four_titles = fallback_vital_titles(VITAL_ARTICLES_FALLBACK_PAGE)
-    level_five_titles = fallback_vital_titles(VITAL_ARTICLES_DEEP_FALLBACK_PAGE)
+    primary_titles = vital_article_titles(VITAL_ARTICLES_PAGE, client)
+    level_four_titles = fallback_vital_titles(VITAL_ARTICLES_FALLBACK_PAGE, client)
+    level_five_titles = fallback_vital_titles(VITAL_ARTICLES_DEEP_FALLBACK_PAGE, client)
     candidate_target = max(count + 250, int(count * 1.35))
     all_titles = unique_titles(primary_titles, level_four_titles, level_five_titles)
-    candidates = fetch_articles(all_titles, stop_after=candidate_target)[:candidate_target]
+    candidates = fetch_articles(all_titles, stop_after=candidate_target, client=client)[:candidate_target]
     if len(candidates) < count:
         raise RuntimeError(
             f"Only {len(candidates)} vital articles supplied free thumbnails "
             f"from {len(all_titles)} candidate titles"
         )
 
-    image_metadata = fetch_image_metadata([article.image_title for article in candidates])
+    image_metadata = fetch_image_metadata([article.image_title for article in candidates], client)
     candidates = [
         replace(
             article,
@@ -376,9 +547,10 @@ def build_pack(
     ]
 
     downloads: dict[int, dict[str, Any]] = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+    # The limiter decides how many downloads actually run; the pool only bounds it.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=downloader.limiter.max_concurrency) as executor:
         futures = {
-            executor.submit(download_thumbnail, article, thumbnail_dir): article
+            executor.submit(download_thumbnail, article, store, downloader): article
             for article in candidates
         }
         for completed, future in enumerate(concurrent.futures.as_completed(futures), start=1):
@@ -388,7 +560,13 @@ def build_pack(
             except Exception as error:
                 print(f"Skipped {article.title}: {error}")
             if completed % 25 == 0 or completed == len(candidates):
-                print(f"Processed {completed}/{len(candidates)} thumbnail candidates")
+                stats = downloader.limiter.snapshot()
+                print(
+                    f"Processed {completed}/{len(candidates)} thumbnail candidates "
+                    f"(rate {stats['rate']}/s, concurrency {stats['concurrency']}, "
+                    f"{stats['throttled']} throttled)"
+                )
+    store.save()
 
     successful = [article for article in candidates if article.page_id in downloads]
     showcase_rank = {title.casefold(): index for index, title in enumerate(SHOWCASE_TITLES)}
@@ -403,10 +581,7 @@ def build_pack(
     if len(selected) < count:
         raise RuntimeError(f"Only {len(selected)} thumbnail downloads succeeded")
 
-    selected_filenames = {downloads[article.page_id]["filename"] for article in selected}
-    for path in thumbnail_dir.iterdir():
-        if path.is_file() and path.name not in selected_filenames:
-            path.unlink()
+    store.retain({downloads[article.page_id]["filename"] for article in selected})
 
     generated_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
     seed_rows: list[dict[str, Any]] = []
@@ -471,8 +646,16 @@ def build_pack(
         output_web_content.mkdir(parents=True, exist_ok=True)
         shutil.copy2(seed_path, output_web_content / seed_path.name)
         shutil.copy2(manifest_path, output_web_content / manifest_path.name)
-    total_bytes = sum(row["bytes"] for row in manifest_rows)
+    total_bytes = sum(store.files[name]["bytes"] for name in {row["filename"] for row in manifest_rows})
     print(f"Wrote {count} articles and {total_bytes / 1024 / 1024:.1f} MB of thumbnails")
+    print(f"Thumbnail store: {json.dumps(store.stats)}")
+    print(
+        f"API: {client.requests} requests over {client.pool.opened} connections, "
+        f"{client.retried} retried"
+    )
+    print(f"Thumbnails: {json.dumps(downloader.snapshot())}")
+    if client.cache is not None:
+        print(f"API cache: {json.dumps(client.cache.snapshot())}")
 
 
 def main() -> None:
@@ -500,15 +683,89 @@ def main() -> None:
         help="Public URL corresponding to --output-media",
     )
     parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--api-url", default=API_URL, help="MediaWiki action API endpoint")
+    parser.add_argument(
+        "--api-concurrency",
+        type=int,
+        default=DEFAULT_API_CONCURRENCY,
+        help="Metadata batch requests kept in flight",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Cache API responses here so reruns are served from disk",
+    )
+    parser.add_argument(
+        "--cache-ttl-hours",
+        type=float,
+        default=DEFAULT_TTL_SECONDS / 3600,
+        help="Age after which cached responses are revalidated",
+    )
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024))
+    parser.add_argument(
+        "--thumbnail-index",
+        type=Path,
+        help=(
+            "Thumbnail hash index kept between runs, outside --output-media "
+            "(default: thumbnails/index.json under --cache-dir)"
+        ),
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Serve API responses only from --cache-dir, failing on anything not cached",
+    )
+    parser.add_argument(
+        "--download-rate",
+        type=float,
+        default=DEFAULT_DOWNLOAD_RATE,
+        help="Initial thumbnail requests per second; adapts to throttling",
+    )
+    parser.add_argument("--download-burst", type=int, default=DEFAULT_DOWNLOAD_BURST)
+    parser.add_argument(
+        "--download-concurrency",
+        type=int,
+        default=DEFAULT_DOWNLOAD_CONCURRENCY,
+        help="Upper bound on concurrent thumbnail downloads",
+    )
     args = parser.parse_args()
     if not 1 <= args.count <= 50_000:
         parser.error("--count must be between 1 and 50000")
+    if not 1 <= args.api_concurrency <= 16:
+        parser.error("--api-concurrency must be between 1 and 16")
+    if args.offline and args.cache_dir is None:
+        parser.error("--offline requires --cache-dir")
+    if args.download_rate <= 0 or args.download_burst < 1 or not 1 <= args.download_concurrency <= 64:
+        parser.error("--download-rate and --download-burst must be positive; --download-concurrency 1..64")
+    thumbnail_index = args.thumbnail_index or (args.cache_dir / "thumbnails" / "index.json" if args.cache_dir else None)
+    if thumbnail_index is not None and thumbnail_index.resolve().is_relative_to(args.output_media.resolve()):
+        parser.error("--thumbnail-index must be outside --output-media, which is published")
     build_pack(
         output_assets=args.output_assets.resolve(),
         output_media=args.output_media.resolve(),
         output_web_content=args.output_web_content.resolve() if args.output_web_content else None,
         public_base_url=args.public_base_url,
         count=args.count,
+        client=ApiClient(
+            args.api_url,
+            concurrency=args.api_concurrency,
+            cache=ResponseCache(
+                args.cache_dir.resolve(),
+                ttl_seconds=args.cache_ttl_hours * 3600,
+                max_bytes=args.cache_max_mb * 1024 * 1024,
+                offline=args.offline,
+            )
+            if args.cache_dir
+            else None,
+        ),
+        downloader=ThumbnailDownloader(
+            AdaptiveRateLimiter(
+                rate=args.download_rate,
+                burst=args.download_burst,
+                max_concurrency=args.download_concurrency,
+            )
+        ),
+        thumbnail_index=thumbnail_index.resolve() if thumbnail_index else None,
     )
 
 
@@ -7,13 +7,28 @@ import json
 import sys
 import time
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
-from io import TextIOWrapper
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator
 
+from .atomic_io import DirectorySync, atomic_copy, atomic_link, atomic_write_bytes, atomic_write_text
+from .card_features import FEATURE_SCHEMA, FEATURE_SUFFIX, write_shard_features
+from .checkpoint import clear_checkpoint, input_fingerprint, load_checkpoint, save_checkpoint
 from .models import CardRecord
 from .normalize import clamp_summary, normalize_title
+from .prefilter import RowPrefilter
+from .search_index import SEARCH_INDEX_NAME, build_pack_search_index
+from .sort_cards import SORT_KEYS, iter_sorted_lines
+from .summary_index import build_pack_summary_index
+from .topics import infer_topic
+from .typo_index import TYPO_INDEX_NAME, write_typo_index
+
+# Per-shard sidecar files referenced from shard manifest entries, by manifest key.
+SHARD_SIDECARS = {"blockIndex": ".blocks.json", "topicIndex": ".topics.json", "featureIndex": FEATURE_SUFFIX}
+# Pack-level files referenced from top-level manifest entries ({"url", "sha256", ...}).
+PACK_ARTIFACTS = ("searchIndex", "typoIndex", "summaryIndex")
 
 
 @dataclass(slots=True)
@@ -23,6 +38,14 @@ class ShardMeta:
     sha256: str
     records: int
     bytes: int
+    min_page_id: int
+    max_page_id: int
+    content_sha256: str
+    reused: bool = False
+    block_index: dict[str, object] | None = None
+    topic_counts: dict[str, int] = field(default_factory=dict)
+    topic_index: dict[str, object] | None = None
+    feature_index: dict[str, object] | None = None
 
 
 def parse_args() -> argparse.Namespace:
@@ -40,6 +63,80 @@ def parse_args() -> argparse.Namespace:
         default="none",
         help="Shard compression format",
     )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=0,
+        help=(
+            "Split shards into independently decompressible blocks of about this many uncompressed bytes "
+            "(e.g. 1048576) and write a per-shard block index; 0 writes whole shards"
+        ),
+    )
+    parser.add_argument(
+        "--topic-index",
+        action="store_true",
+        help="Write a per-shard sidecar of row byte offsets by topic, for build_topic_subset seeks",
+    )
+    parser.add_argument(
+        "--feature-index",
+        action="store_true",
+        help="Write a per-shard sidecar of precomputed feed-ranking features (topics, key hashes, quality buckets)",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="Write search-index.bin, a memory-mappable title/alias index implementing the search contract",
+    )
+    parser.add_argument(
+        "--typo-index",
+        action="store_true",
+        help="Also write typo-index.bin, a deletion-neighbourhood index for edit-distance-1 typo lookups (implies --search-index)",
+    )
+    parser.add_argument(
+        "--summary-index",
+        action="store_true",
+        help="Write summary-index.bin, a compressed inverted index over summary keywords for full-text queries",
+    )
+    parser.add_argument(
+        "--order",
+        choices=["input", *SORT_KEYS],
+        default="input",
+        help="Record order across shards; page_id yields disjoint per-shard page-id ranges",
+    )
+    parser.add_argument(
+        "--sort-buffer",
+        type=int,
+        default=250_000,
+        help="Records sorted in memory per spill run when --order is not input",
+    )
+    parser.add_argument(
+        "--sort-workers",
+        type=int,
+        default=1,
+        help="Processes used to sort spill runs when --order is not input",
+    )
+    parser.add_argument(
+        "--previous-pack",
+        default="",
+        help="Previous pack directory; shards whose content is unchanged are hard-linked instead of rewritten",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=1,
+        help="Persist a resumable checkpoint at most every N written shards (0 disables checkpoints)",
+    )
+    parser.add_argument(
+        "--checkpoint-seconds",
+        type=float,
+        default=60.0,
+        help="Minimum time between checkpoints; each one fsyncs pending shards and rewrites the counters",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the last checkpoint in --output instead of starting over",
+    )
     parser.add_argument(
         "--progress-every",
         type=int,
@@ -53,11 +150,19 @@ def _log(message: str) -> None:
     print(f"[build_pack] {message}", file=sys.stderr, flush=True)
 
 
-def iter_cards(path: Path, language: str):
-    with path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            line = line.strip()
-            if not line:
+CHECKPOINT_NAME = ".build_pack.checkpoint.json"
+
+
+def iter_cards_with_offsets(path: Path, language: str, start_offset: int = 0):
+    """Yield `(end_offset, card)` pairs; `end_offset` is the input byte position after the card."""
+    prefilter = RowPrefilter(language=language)
+    with path.open("rb") as handle:
+        handle.seek(start_offset)
+        offset = start_offset
+        for raw_line in handle:
+            offset += len(raw_line)
+            line = raw_line.strip()
+            if not line or not prefilter(line):
                 continue
             payload = json.loads(line)
             if payload.get("lang", language) != language:
@@ -71,7 +176,125 @@ def iter_cards(path: Path, language: str):
             record.title = record.title.strip()
             if not record.title:
                 continue
-            yield record
+            yield offset, record
+
+
+def iter_cards(path: Path, language: str):
+    for _, record in iter_cards_with_offsets(path, language):
+        yield record
+
+
+def sorted_cards(
+    cards: Iterable[CardRecord],
+    key: str,
+    buffer_size: int,
+    workers: int = 1,
+    temp_dir: Path | None = None,
+) -> Iterator[CardRecord]:
+    """Yield cards in `key` order using the bounded-memory external sort."""
+    lines = (json.dumps(asdict(card), ensure_ascii=False) for card in cards)
+    for line in iter_sorted_lines(lines, key=key, run_size=buffer_size, workers=workers, temp_dir=temp_dir):
+        yield CardRecord.from_json(json.loads(line))
+
+
+def serialize_shard(records: list[CardRecord]) -> bytes:
+    lines: list[str] = []
+    for record in records:
+        article = record.as_article_payload()
+        article["normalized_title"] = normalize_title(article["title"])
+        lines.append(json.dumps({"article": article, "aliases": record.aliases}, ensure_ascii=False))
+        lines.append("\n")
+    return "".join(lines).encode("utf-8")
+
+
+def split_blocks(body: bytes, block_size: int) -> list[tuple[bytes, int]]:
+    """Split NDJSON `body` into line-aligned `(chunk, records)` of about `block_size` bytes."""
+    blocks: list[tuple[bytes, int]] = []
+    chunk: list[bytes] = []
+    chunk_bytes = 0
+    for line in body.splitlines(keepends=True):
+        chunk.append(line)
+        chunk_bytes += len(line)
+        if chunk_bytes >= block_size:
+            blocks.append((b"".join(chunk), len(chunk)))
+            chunk = []
+            chunk_bytes = 0
+    if chunk:
+        blocks.append((b"".join(chunk), len(chunk)))
+    return blocks
+
+
+def encode_blocks(
+    body: bytes,
+    block_size: int,
+    compression: str,
+) -> tuple[bytes, list[dict[str, object]]]:
+    """Encode a shard as concatenated blocks and describe each one.
+
+    Gzip blocks are complete gzip members, so the whole file still reads as
+    one multi-member gzip stream while any block can be fetched with an HTTP
+    Range request and decompressed on its own.
+    """
+    parts: list[bytes] = []
+    entries: list[dict[str, object]] = []
+    offset = 0
+    first_record = 0
+    for chunk, records in split_blocks(body, block_size):
+        part = gzip.compress(chunk, mtime=0) if compression == "gzip" else chunk
+        entries.append(
+            {
+                "offset": offset,
+                "bytes": len(part),
+                "firstRecord": first_record,
+                "records": records,
+                "sha256": hashlib.sha256(part).hexdigest(),
+            }
+        )
+        parts.append(part)
+        offset += len(part)
+        first_record += records
+    return b"".join(parts), entries
+
+
+def shard_topics(records: list[CardRecord], body: bytes) -> dict[str, dict[str, list[int]]]:
+    """Map each card's canonical topic to its rows in the uncompressed `body`.
+
+    `rows` are ordinals within the shard, which the block index maps to gzip
+    members; `offsets` are byte offsets for seeking in uncompressed shards.
+    """
+    topics: dict[str, dict[str, list[int]]] = defaultdict(lambda: {"rows": [], "offsets": []})
+    offset = 0
+    for ordinal, (record, line) in enumerate(zip(records, body.splitlines(keepends=True))):
+        entry = topics[infer_topic(record.title, record.summary, record.topic_key)]
+        entry["rows"].append(ordinal)
+        entry["offsets"].append(offset)
+        offset += len(line)
+    return dict(sorted(topics.items()))
+
+
+def load_previous_shards(previous_pack: Path) -> dict[str, dict[str, object]]:
+    """Index a previous pack's shards by file name for incremental rebuilds.
+
+    Only shards that recorded a `contentSha256` and still exist on disk are
+    reusable.
+    """
+    manifest = json.loads((previous_pack / "manifest.json").read_text(encoding="utf-8"))
+    reusable: dict[str, dict[str, object]] = {}
+    for shard in manifest.get("shards", []):
+        file_name = str(shard.get("url", "")).split("/")[-1]
+        if not shard.get("contentSha256") or not (previous_pack / "shards" / file_name).exists():
+            continue
+        reusable[file_name] = {**shard, "path": previous_pack / "shards" / file_name}
+    return reusable
+
+
+def _link_or_copy(source: Path, destination: Path, sync: DirectorySync | None = None) -> None:
+    if destination.exists() and destination.samefile(source):
+        return
+    try:
+        atomic_link(source, destination, sync=sync)
+    except OSError:
+        atomic_copy(source, destination, sync=sync)
 
 
 def write_shard(
@@ -79,32 +302,18 @@ def write_shard(
     shard_index: int,
     records: list[CardRecord],
     compression: str,
+    previous_shards: dict[str, dict[str, object]] | None = None,
+    sync: DirectorySync | None = None,
+    block_size: int = 0,
+    topic_index: bool = False,
+    feature_index: bool = False,
 ) -> ShardMeta:
     extension = ".ndjson.gz" if compression == "gzip" else ".ndjson"
     shard_name = f"shard-{shard_index:04d}{extension}"
     shard_path = shards_dir / shard_name
-    hasher = hashlib.sha256()
 
-    if compression == "gzip":
-        writer = gzip.open(shard_path, "wb")
-        stream: TextIOWrapper | None = TextIOWrapper(writer, encoding="utf-8")
-    else:
-        stream = shard_path.open("w", encoding="utf-8")
-
-    assert stream is not None
-    with stream as out:
-        for record in records:
-            article = record.as_article_payload()
-            article["normalized_title"] = normalize_title(article["title"])
-            out.write(json.dumps({"article": article, "aliases": record.aliases}, ensure_ascii=False))
-            out.write("\n")
-
-    with shard_path.open("rb") as fh:
-        while True:
-            block = fh.read(1024 * 1024)
-            if not block:
-                break
-            hasher.update(block)
+    body = serialize_shard(records)
+    content_sha256 = hashlib.sha256(body).hexdigest()
 
     shard_id = shard_name
     if shard_id.endswith(".ndjson.gz"):
@@ -112,14 +321,80 @@ def write_shard(
     else:
         shard_id = shard_id.removesuffix(".ndjson")
 
-    return ShardMeta(
+    meta = ShardMeta(
         id=shard_id,
         path=f"shards/{shard_name}",
-        sha256=hasher.hexdigest(),
+        sha256="",
         records=len(records),
-        bytes=shard_path.stat().st_size,
+        bytes=0,
+        min_page_id=min(record.page_id for record in records),
+        max_page_id=max(record.page_id for record in records),
+        content_sha256=content_sha256,
     )
 
+    topics = shard_topics(records, body)
+    meta.topic_counts = {topic: len(entry["rows"]) for topic, entry in topics.items()}
+    if topic_index:
+        # Cheap to rebuild and independent of compression, so it is rewritten even for reused shards.
+        topics_name = f"{shard_id}{SHARD_SIDECARS['topicIndex']}"
+        topics_body = json.dumps({"topics": topics}, separators=(",", ":")).encode("utf-8")
+        atomic_write_bytes(shards_dir / topics_name, topics_body, sync=sync)
+        meta.topic_index = {"url": f"shards/{topics_name}", "sha256": hashlib.sha256(topics_body).hexdigest()}
+    if feature_index:
+        features_name = f"{shard_id}{SHARD_SIDECARS['featureIndex']}"
+        features = write_shard_features(
+            shards_dir / features_name,
+            ((record.page_id, record.title, record.summary, record.topic_key, record.quality_score) for record in records),
+            sync=sync,
+        )
+        meta.feature_index = {"url": f"shards/{features_name}", **features}
+
+    index_name = f"{shard_id}{SHARD_SIDECARS['blockIndex']}"
+    previous = (previous_shards or {}).get(shard_name)
+    previous_index = dict((previous or {}).get("blockIndex") or {})
+    if (
+        previous is not None
+        and previous["contentSha256"] == content_sha256
+        and int(previous_index.get("blockSize", 0)) == block_size
+    ):
+        previous_path = Path(str(previous["path"]))
+        previous_index_path = previous_path.parent / index_name
+        if previous_path.stat().st_size == int(previous["bytes"]) and (
+            not block_size or previous_index_path.exists()
+        ):
+            _link_or_copy(previous_path, shard_path, sync=sync)
+            if block_size:
+                _link_or_copy(previous_index_path, shards_dir / index_name, sync=sync)
+                meta.block_index = {**previous_index, "url": f"shards/{index_name}"}
+            meta.sha256 = str(previous["sha256"])
+            meta.bytes = int(previous["bytes"])
+            meta.reused = True
+            return meta
+
+    if block_size > 0:
+        payload, blocks = encode_blocks(body, block_size, compression)
+        index_body = json.dumps(
+            {"compression": compression, "blockSize": block_size, "blocks": blocks},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        atomic_write_bytes(shards_dir / index_name, index_body, sync=sync)
+        meta.block_index = {
+            "url": f"shards/{index_name}",
+            "sha256": hashlib.sha256(index_body).hexdigest(),
+            "blocks": len(blocks),
+            "blockSize": block_size,
+        }
+    elif compression == "gzip":
+        # mtime=0 keeps compressed bytes (and therefore sha256) reproducible.
+        payload = gzip.compress(body, mtime=0)
+    else:
+        payload = body
+    atomic_write_bytes(shard_path, payload, sync=sync)
+
+    meta.sha256 = hashlib.sha256(payload).hexdigest()
+    meta.bytes = len(payload)
+    return meta
+
 
 def build_pack(args: argparse.Namespace) -> dict[str, object]:
     input_path = Path(args.input)
@@ -136,15 +411,64 @@ def build_pack(args: argparse.Namespace) -> dict[str, object]:
     processed = 0
     start = time.monotonic()
     next_progress = args.progress_every if args.progress_every > 0 else 0
-
+    last_checkpoint = start
+    shards_since_checkpoint = 0
+
+    order = args.order
+    block_size = max(args.block_size, 0)
+    sync = DirectorySync()
+    previous_shards = load_previous_shards(Path(args.previous_pack)) if args.previous_pack else None
+    if previous_shards is not None:
+        _log(f"Loaded {len(previous_shards)} reusable shards from previous pack {args.previous_pack}")
     _log(
         f"Building pack {args.pack_id} from {input_path} "
-        f"(max-records={args.max_records:,}, shard-size={args.shard_size:,}, compression={args.compression})"
+        f"(max-records={args.max_records:,}, shard-size={args.shard_size:,}, "
+        f"compression={args.compression}, order={order}, block-size={block_size:,})"
     )
 
-    for card in iter_cards(input_path, args.language):
-        if processed >= args.max_records:
-            break
+    checkpoint_path = output_dir / CHECKPOINT_NAME
+    fingerprint = input_fingerprint(
+        [input_path],
+        language=args.language,
+        max_records=args.max_records,
+        shard_size=args.shard_size,
+        compression=args.compression,
+        order=order,
+        block_size=block_size,
+        topic_index=args.topic_index,
+        feature_index=args.feature_index,
+        previous_pack=args.previous_pack,
+    )
+    input_offset = 0
+    state = load_checkpoint(checkpoint_path, fingerprint) if args.resume else None
+    if state is not None:
+        processed = int(state["processed"])
+        input_offset = int(state["inputOffset"])
+        shard_metas = [ShardMeta(**meta) for meta in state["shards"]]
+        topic_counts.update(state["topicCounts"])
+        entity_counts.update(state["entityCounts"])
+        keyword_counts.update(state["keywordCounts"])
+        if next_progress:
+            next_progress = (processed // args.progress_every + 1) * args.progress_every
+        _log(f"Resuming after shard {len(shard_metas)} ({processed:,} records already written)")
+
+    remaining = max(args.max_records - processed, 0)
+    entries: Iterable[tuple[int, CardRecord]]
+    if order == "input":
+        entries = islice(iter_cards_with_offsets(input_path, args.language, input_offset), remaining)
+    else:
+        # Sorted output only exists after the whole input is consumed, so a
+        # resumed run re-sorts and skips the records already written.
+        cards = sorted_cards(
+            islice(iter_cards(input_path, args.language), max(args.max_records, 0)),
+            key=order,
+            buffer_size=args.sort_buffer,
+            workers=args.sort_workers,
+            temp_dir=output_dir,
+        )
+        entries = ((0, card) for card in islice(cards, processed, None))
+
+    for input_offset, card in entries:
         processed += 1
         topic_counts[card.topic_key] += 1
         entity_counts[card.entity_type] += 1
@@ -158,14 +482,42 @@ def build_pack(args: argparse.Namespace) -> dict[str, object]:
                 shard_index=len(shard_metas) + 1,
                 records=shard_buffer,
                 compression=args.compression,
+                previous_shards=previous_shards,
+                sync=sync,
+                block_size=block_size,
+                topic_index=args.topic_index,
+                feature_index=args.feature_index,
             )
             shard_metas.append(meta)
             elapsed = time.monotonic() - start
             _log(
-                f"Wrote shard {meta.id} ({meta.records:,} records, {meta.bytes:,} bytes) "
+                f"{'Reused' if meta.reused else 'Wrote'} shard {meta.id} "
+                f"({meta.records:,} records, {meta.bytes:,} bytes) "
                 f"(processed: {processed:,}, elapsed: {elapsed:.1f}s)"
             )
             shard_buffer = []
+            shards_since_checkpoint += 1
+            if (
+                args.checkpoint_every > 0
+                and shards_since_checkpoint >= args.checkpoint_every
+                and time.monotonic() - last_checkpoint >= args.checkpoint_seconds
+            ):
+                # Shards named in a checkpoint must already be durable.
+                sync.flush()
+                save_checkpoint(
+                    checkpoint_path,
+                    fingerprint,
+                    {
+                        "processed": processed,
+                        "inputOffset": input_offset,
+                        "shards": [asdict(meta) for meta in shard_metas],
+                        "topicCounts": topic_counts,
+                        "entityCounts": entity_counts,
+                        "keywordCounts": keyword_counts,
+                    },
+                )
+                last_checkpoint = time.monotonic()
+                shards_since_checkpoint = 0
 
         if next_progress and processed >= next_progress:
             elapsed = time.monotonic() - start
@@ -178,14 +530,38 @@ def build_pack(args: argparse.Namespace) -> dict[str, object]:
             shard_index=len(shard_metas) + 1,
             records=shard_buffer,
             compression=args.compression,
+            previous_shards=previous_shards,
+            sync=sync,
+            block_size=block_size,
+            topic_index=args.topic_index,
+            feature_index=args.feature_index,
         )
         shard_metas.append(meta)
         elapsed = time.monotonic() - start
         _log(
-            f"Wrote shard {meta.id} ({meta.records:,} records, {meta.bytes:,} bytes) "
+            f"{'Reused' if meta.reused else 'Wrote'} shard {meta.id} "
+            f"({meta.records:,} records, {meta.bytes:,} bytes) "
             f"(processed: {processed:,}, elapsed: {elapsed:.1f}s)"
         )
 
+    artifacts: dict[str, dict[str, object]] = {}
+    if args.search_index or args.typo_index:
+        artifacts["searchIndex"] = build_pack_search_index(
+            output_dir, [output_dir / meta.path for meta in shard_metas], sync=sync
+        )
+        _log(f"Wrote search index ({artifacts['searchIndex']['titles']:,} titles, {artifacts['searchIndex']['bytes']:,} bytes)")
+    if args.typo_index:
+        artifacts["typoIndex"] = write_typo_index(output_dir / SEARCH_INDEX_NAME, output_dir / TYPO_INDEX_NAME, sync=sync)
+        _log(f"Wrote typo index ({artifacts['typoIndex']['keys']:,} keys, {artifacts['typoIndex']['bytes']:,} bytes)")
+    if args.summary_index:
+        artifacts["summaryIndex"] = build_pack_summary_index(
+            output_dir, [output_dir / meta.path for meta in shard_metas], sync=sync
+        )
+        _log(
+            f"Wrote summary index ({artifacts['summaryIndex']['terms']:,} terms, "
+            f"{artifacts['summaryIndex']['bytes']:,} bytes)"
+        )
+
     top_topics = sorted(topic_counts.items(), key=lambda item: item[1], reverse=True)
     top_keywords = sorted(keyword_counts.items(), key=lambda item: item[1], reverse=True)
 
@@ -196,6 +572,7 @@ def build_pack(args: argparse.Namespace) -> dict[str, object]:
         "createdAt": datetime.now(timezone.utc).isoformat(),
         "recordCount": processed,
         "compression": args.compression,
+        "shardOrder": order,
         "description": f"Doompedia {args.language.upper()} pack with {processed:,} summary cards.",
         "packTags": [topic for topic, _ in top_topics[:12]],
         "shards": [
@@ -205,6 +582,13 @@ def build_pack(args: argparse.Namespace) -> dict[str, object]:
                 "sha256": meta.sha256,
                 "records": meta.records,
                 "bytes": meta.bytes,
+                "minPageId": meta.min_page_id,
+                "maxPageId": meta.max_page_id,
+                "contentSha256": meta.content_sha256,
+                "topicCounts": meta.topic_counts,
+                **({"blockIndex": meta.block_index} if meta.block_index else {}),
+                **({"topicIndex": meta.topic_index} if meta.topic_index else {}),
+                **({"featureIndex": meta.feature_index} if meta.feature_index else {}),
             }
             for meta in shard_metas
         ],
@@ -217,20 +601,30 @@ def build_pack(args: argparse.Namespace) -> dict[str, object]:
         "topicDistribution": dict(sorted(topic_counts.items())),
         "entityDistribution": dict(sorted(entity_counts.items())),
         "sampleKeywords": [keyword for keyword, _ in top_keywords[:40]],
+        **({"featureSchema": FEATURE_SCHEMA} if args.feature_index else {}),
+        **artifacts,
     }
 
-    (output_dir / "manifest.json").write_text(
-        json.dumps(manifest, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-
+    # The manifest is written last, once every shard it references is durable.
+    sync.flush()
     checksum_lines = [f"{meta.sha256}  {meta.path}" for meta in shard_metas]
-    (output_dir / "checksums.txt").write_text("\n".join(checksum_lines) + "\n", encoding="utf-8")
+    checksum_lines += [
+        f"{sidecar['sha256']}  {sidecar['url']}"
+        for meta in shard_metas
+        for sidecar in (meta.block_index, meta.topic_index, meta.feature_index)
+        if sidecar
+    ]
+    checksum_lines += [f"{artifact['sha256']}  {artifact['url']}" for artifact in artifacts.values()]
+    atomic_write_text(output_dir / "checksums.txt", "\n".join(checksum_lines) + "\n", sync=sync)
+    atomic_write_text(output_dir / "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2), sync=sync)
+    sync.flush()
+    clear_checkpoint(checkpoint_path)
 
     elapsed = time.monotonic() - start
+    reused = sum(1 for meta in shard_metas if meta.reused)
     _log(
         f"Pack build complete: {processed:,} records, {len(shard_metas)} shards "
-        f"(elapsed: {elapsed:.1f}s)"
+        f"({reused} reused) (elapsed: {elapsed:.1f}s)"
     )
 
     return manifest
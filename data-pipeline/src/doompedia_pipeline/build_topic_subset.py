@@ -2,15 +2,57 @@ from __future__ import annotations
 
 import argparse
 import gzip
+import hashlib
 import json
-import re
-import unicodedata
+import sys
 from collections import defaultdict
+from dataclasses import dataclass, field
 from pathlib import Path
-
-from .normalize import clamp_summary
-
-_WORD_RE = re.compile(r"[A-Za-z][A-Za-z-]{2,}")
+from typing import TextIO
+
+from .normalize import KEYWORD_STOPWORDS, clamp_summary, word_tokens
+from .prefilter import RowPrefilter
+from .topics import infer_topic, normalize_token
+
+
+@dataclass(slots=True)
+class SubsetSpec:
+    name: str
+    topics: set[str]
+    target: int
+    output: Path
+    written: int = 0
+    topic_counts: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    @property
+    def full(self) -> bool:
+        return self.written >= self.target
+
+
+def parse_topics(value: str | list[str]) -> set[str]:
+    items = value.split(",") if isinstance(value, str) else value
+    return {normalize_token(item) for item in items if item.strip()}
+
+
+def load_subset_config(path: Path) -> list[SubsetSpec]:
+    config = json.loads(path.read_text(encoding="utf-8"))
+    subsets = [
+        SubsetSpec(
+            name=str(item["name"]),
+            topics=parse_topics(item["topics"]),
+            target=int(item.get("target", 250_000)),
+            output=Path(item["output"]),
+        )
+        for item in config.get("subsets", [])
+    ]
+    if not subsets:
+        raise ValueError(f"{path} defines no subsets")
+    for subset in subsets:
+        if not subset.topics:
+            raise ValueError(f"Subset {subset.name!r} must include at least one topic")
+    if len({subset.name for subset in subsets}) != len(subsets):
+        raise ValueError(f"{path} repeats a subset name")
+    return subsets
 
 
 def parse_args() -> argparse.Namespace:
@@ -18,70 +60,22 @@ def parse_args() -> argparse.Namespace:
         description="Create a topic-focused NDJSON card subset from an existing pack manifest."
     )
     parser.add_argument("--source-manifest", required=True, help="Path to source manifest.json")
-    parser.add_argument("--output-ndjson", required=True, help="Output NDJSON path")
+    parser.add_argument("--output-ndjson", help="Output NDJSON path")
     parser.add_argument("--language", default="en")
-    parser.add_argument("--allowed-topics", required=True, help="Comma-separated topics")
+    parser.add_argument("--allowed-topics", help="Comma-separated topics")
     parser.add_argument("--target", type=int, default=250_000)
+    parser.add_argument(
+        "--config",
+        help=(
+            'JSON file {"subsets": [{"name", "topics", "target", "output"}, ...]}; builds every subset '
+            "in one pass over the source (replaces --output-ndjson/--allowed-topics/--target)"
+        ),
+    )
     return parser.parse_args()
 
 
-def _normalize_token(value: str) -> str:
-    text = unicodedata.normalize("NFKC", value).casefold().strip()
-    text = text.replace("_", "-").replace(" ", "-")
-    text = re.sub(r"-+", "-", text)
-    return text
-
-
-def _canonical_topic(raw_topic: str) -> str:
-    normalized = _normalize_token(raw_topic)
-    if normalized == "history-of":
-        return "history"
-    if normalized == "geography-of":
-        return "geography"
-    if normalized == "economy-of":
-        return "economics"
-    if normalized == "list-of":
-        return "culture"
-    return normalized
-
-
-def _infer_topic(title: str, summary: str, raw_topic: str) -> str:
-    canonical = _canonical_topic(raw_topic)
-    stable = {
-        "science",
-        "technology",
-        "history",
-        "geography",
-        "culture",
-        "politics",
-        "economics",
-        "sports",
-        "health",
-        "environment",
-        "society",
-        "biography",
-    }
-    if canonical in stable:
-        return canonical
-
-    text = f"{title} {summary}".lower()
-    rules: list[tuple[str, tuple[str, ...]]] = [
-        ("biography", ("born", "died", "actor", "author", "scientist", "politician", "player")),
-        ("history", ("empire", "war", "century", "kingdom", "revolution", "historical")),
-        ("science", ("physics", "chemistry", "biology", "mathematics", "astronomy", "scientific")),
-        ("technology", ("software", "computer", "internet", "digital", "algorithm", "device")),
-        ("geography", ("river", "mountain", "city", "country", "region", "province", "capital")),
-        ("politics", ("election", "government", "parliament", "minister", "policy", "party")),
-        ("economics", ("economy", "market", "trade", "finance", "currency", "industry")),
-        ("health", ("disease", "medical", "medicine", "health", "hospital", "symptom")),
-        ("sports", ("football", "basketball", "olympic", "league", "athlete", "championship")),
-        ("environment", ("climate", "ecology", "forest", "wildlife", "pollution", "conservation")),
-        ("culture", ("music", "film", "literature", "art", "religion", "language")),
-    ]
-    for topic, keywords in rules:
-        if any(keyword in text for keyword in keywords):
-            return topic
-    return "general"
+def _log(message: str) -> None:
+    print(f"[build_topic_subset] {message}", file=sys.stderr, flush=True)
 
 
 def _infer_entity_type(title: str, summary: str, topic_key: str) -> str:
@@ -98,27 +92,23 @@ def _infer_entity_type(title: str, summary: str, topic_key: str) -> str:
 def _infer_keywords(title: str, summary: str, topic_key: str) -> list[str]:
     seen: set[str] = set()
     keywords: list[str] = []
-    stopwords = {
-        "about", "after", "before", "their", "there", "which", "while", "where", "these", "those",
-        "through", "using", "under", "between", "during", "known", "wikipedia", "article",
-    }
 
     def add(raw: str) -> None:
-        normalized = _normalize_token(raw)
+        normalized = normalize_token(raw)
         if not normalized or normalized in seen:
             return
         seen.add(normalized)
         keywords.append(normalized)
 
     add(topic_key)
-    for token in _WORD_RE.findall(title.lower()):
-        if len(token) >= 4 and token not in stopwords:
+    for token in word_tokens(title, 4):
+        if token not in KEYWORD_STOPWORDS:
             add(token)
         if len(keywords) >= 8:
             return keywords[:12]
 
-    for token in _WORD_RE.findall(summary.lower()):
-        if len(token) >= 5 and token not in stopwords:
+    for token in word_tokens(summary, 5):
+        if token not in KEYWORD_STOPWORDS:
             add(token)
         if len(keywords) >= 12:
             return keywords[:12]
@@ -134,115 +124,263 @@ def _resolve_shard_path(source_manifest: Path, shard_url: str) -> Path:
     fallback = base_dir / "shards" / Path(shard_url).name
     if fallback.exists():
         return fallback
+    # Content-addressed publishes keep shards in a shared objects/ dir above the pack.
+    for parent in list(base_dir.parents)[:4]:
+        candidate = parent / "objects" / Path(shard_url).name
+        if candidate.exists():
+            return candidate
     raise FileNotFoundError(f"Shard not found for URL {shard_url!r}")
 
 
 def _read_shard_lines(shard_path: Path):
+    opener = gzip.open if shard_path.suffix == ".gz" else open
+    with opener(shard_path, "rb") as handle:
+        yield from handle
+
+
+def _read_rows_at(shard_path: Path, offsets: list[int]):
+    """Yield only the rows starting at `offsets` (sorted byte offsets into the uncompressed shard)."""
     if shard_path.suffix == ".gz":
-        with gzip.open(shard_path, "rt", encoding="utf-8") as handle:
-            for line in handle:
-                yield line
+        # A single gzip member cannot seek, but rows outside `offsets` are skipped without decoding them.
+        wanted = iter(offsets)
+        next_offset = next(wanted, None)
+        position = 0
+        with gzip.open(shard_path, "rb") as handle:
+            for raw_line in handle:
+                if next_offset is None:
+                    return
+                if position == next_offset:
+                    yield raw_line
+                    next_offset = next(wanted, None)
+                position += len(raw_line)
         return
-    with shard_path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            yield line
+    with shard_path.open("rb") as handle:
+        for offset in offsets:
+            handle.seek(offset)
+            yield handle.readline()
+
+
+def _read_block_rows(shard_path: Path, rows: list[int], blocks: list[dict[str, object]]):
+    """Yield the rows numbered `rows` (sorted ordinals) from a block-encoded gzip shard.
+
+    Every block is a complete gzip member, so only the members holding a
+    wanted row are read and decompressed.
+    """
+    wanted = iter(rows)
+    row = next(wanted, None)
+    with shard_path.open("rb") as handle:
+        for block in blocks:
+            if row is None:
+                return
+            first = int(block["firstRecord"])
+            end = first + int(block["records"])
+            if row >= end:
+                continue
+            handle.seek(int(block["offset"]))
+            lines = gzip.decompress(handle.read(int(block["bytes"]))).splitlines(keepends=True)
+            while row is not None and row < end:
+                yield lines[row - first]
+                row = next(wanted, None)
+
+
+def _load_sidecar(source_manifest: Path, shard: dict[str, object], key: str) -> dict[str, object] | None:
+    sidecar = shard.get(key)
+    if not isinstance(sidecar, dict) or not sidecar.get("url"):
+        return None
+    try:
+        path = _resolve_shard_path(source_manifest=source_manifest, shard_url=str(sidecar["url"]))
+        body = path.read_bytes()
+    except (FileNotFoundError, OSError):
+        return None
+    if hashlib.sha256(body).hexdigest() != sidecar.get("sha256"):
+        _log(f"Ignoring stale {key} for shard {shard.get('id')}")
+        return None
+    return json.loads(body)
+
+
+def _shard_rows(source_manifest: Path, shard: dict[str, object], allowed_topics: set[str]):
+    """Yield the raw shard lines that may hold `allowed_topics` rows, or `None` to skip the shard.
+
+    Shards whose manifest `topicCounts` rule out every allowed topic are not
+    opened; a `topicIndex` sidecar narrows reading to the matching rows, and a
+    `blockIndex` to the gzip members that hold them.
+    """
+    counts = shard.get("topicCounts")
+    if isinstance(counts, dict) and not any(counts.get(topic) for topic in allowed_topics):
+        return None
+    shard_path = _resolve_shard_path(source_manifest=source_manifest, shard_url=str(shard["url"]))
+    index = _load_sidecar(source_manifest, shard, "topicIndex")
+    if index is None:
+        return _read_shard_lines(shard_path)
+    matches = [index["topics"][topic] for topic in allowed_topics if topic in index["topics"]]
+    if shard_path.suffix == ".gz":
+        blocks = _load_sidecar(source_manifest, shard, "blockIndex")
+        if blocks is not None:
+            rows = sorted(row for match in matches for row in match["rows"])
+            return _read_block_rows(shard_path, rows, blocks["blocks"])
+    return _read_rows_at(shard_path, sorted(offset for match in matches for offset in match["offsets"]))
+
+
+def _row_topic(article: dict, language: str) -> tuple[str, str, str] | None:
+    """Return `(title, summary, topic_key)` for an eligible row, or `None`."""
+    if article.get("lang") != language:
+        return None
+
+    title = str(article.get("title", "")).strip()
+    summary_raw = str(article.get("summary", "")).strip()
+    summary = clamp_summary(summary_raw)
+    if not title or summary is None:
+        return None
+
+    topic_key = infer_topic(
+        title=title,
+        summary=summary,
+        raw_topic=str(article.get("topic_key", "general")),
+    )
+    return title, summary, topic_key
 
 
-def build_topic_subset(
+def _subset_record(payload: dict, language: str, title: str, summary: str, topic_key: str) -> dict[str, object]:
+    article = payload.get("article") or {}
+    raw_disambiguation = article.get("is_disambiguation", False)
+    if isinstance(raw_disambiguation, bool):
+        is_disambiguation = raw_disambiguation
+    elif isinstance(raw_disambiguation, int):
+        is_disambiguation = raw_disambiguation != 0
+    elif isinstance(raw_disambiguation, str):
+        is_disambiguation = raw_disambiguation.strip().lower() in {"1", "true", "yes", "y"}
+    else:
+        is_disambiguation = False
+
+    return {
+        "page_id": int(article["page_id"]),
+        "lang": language,
+        "title": title,
+        "summary": summary,
+        "wiki_url": str(article.get("wiki_url", "")),
+        "topic_key": topic_key,
+        "quality_score": float(article.get("quality_score", 0.5)),
+        "is_disambiguation": bool(is_disambiguation),
+        "source_rev_id": article.get("source_rev_id"),
+        "updated_at": str(article.get("updated_at", "1970-01-01T00:00:00Z")),
+        "entity_type": _infer_entity_type(title=title, summary=summary, topic_key=topic_key),
+        "keywords": _infer_keywords(title=title, summary=summary, topic_key=topic_key),
+        "aliases": payload.get("aliases", []) or [],
+    }
+
+
+def build_topic_subsets(
     source_manifest: Path,
-    output_ndjson: Path,
     language: str,
-    allowed_topics: set[str],
-    target: int,
+    subsets: list[SubsetSpec],
 ) -> dict[str, object]:
-    manifest = json.loads(source_manifest.read_text(encoding="utf-8"))
-    output_ndjson.parent.mkdir(parents=True, exist_ok=True)
+    """Stream the source shards once, fanning each row out to every subset that wants it.
 
-    written = 0
+    A subset stops receiving rows at its target; the scan ends as soon as every
+    subset is full.
+    """
+    manifest = json.loads(source_manifest.read_text(encoding="utf-8"))
     scanned = 0
-    topic_counts: dict[str, int] = defaultdict(int)
+    decoded = 0
+    skipped_shards = 0
+    outputs: dict[str, TextIO] = {}
+    try:
+        for subset in subsets:
+            subset.output.parent.mkdir(parents=True, exist_ok=True)
+            outputs[subset.name] = subset.output.open("w", encoding="utf-8")
 
-    with output_ndjson.open("w", encoding="utf-8") as out:
         for shard in manifest.get("shards", []):
-            shard_path = _resolve_shard_path(source_manifest=source_manifest, shard_url=shard["url"])
-            for line in _read_shard_lines(shard_path):
+            active = [subset for subset in subsets if not subset.full]
+            if not active:
+                break
+            wanted = set().union(*(subset.topics for subset in active))
+            rows = _shard_rows(source_manifest, shard, wanted)
+            if rows is None:
+                skipped_shards += 1
+                continue
+            prefilter = RowPrefilter(language=language, topics=wanted)
+            for line in rows:
                 line = line.strip()
                 if not line:
                     continue
                 scanned += 1
-
-                payload = json.loads(line)
-                article = payload.get("article") or {}
-                if article.get("lang") != language:
+                if not prefilter(line):
                     continue
 
-                title = str(article.get("title", "")).strip()
-                summary_raw = str(article.get("summary", "")).strip()
-                summary = clamp_summary(summary_raw)
-                if not title or summary is None:
+                decoded += 1
+                payload = json.loads(line)
+                eligible = _row_topic(payload.get("article") or {}, language)
+                if eligible is None or eligible[2] not in wanted:
                     continue
+                topic_key = eligible[2]
+                text = ""
+                for subset in active:
+                    if subset.full or topic_key not in subset.topics:
+                        continue
+                    if not text:
+                        text = json.dumps(_subset_record(payload, language, *eligible), ensure_ascii=False) + "\n"
+                    outputs[subset.name].write(text)
+                    subset.written += 1
+                    subset.topic_counts[topic_key] += 1
+                if text and all(subset.full for subset in active):
+                    break
+    finally:
+        for handle in outputs.values():
+            handle.close()
 
-                topic_key = _infer_topic(
-                    title=title,
-                    summary=summary,
-                    raw_topic=str(article.get("topic_key", "general")),
-                )
-                if topic_key not in allowed_topics:
-                    continue
+    return {
+        "scanned": scanned,
+        "decoded": decoded,
+        "skippedShards": skipped_shards,
+        "subsets": {
+            subset.name: {
+                "written": subset.written,
+                "target": subset.target,
+                "output": str(subset.output),
+                "topics": dict(sorted(subset.topic_counts.items())),
+            }
+            for subset in subsets
+        },
+    }
 
-                raw_disambiguation = article.get("is_disambiguation", False)
-                if isinstance(raw_disambiguation, bool):
-                    is_disambiguation = raw_disambiguation
-                elif isinstance(raw_disambiguation, int):
-                    is_disambiguation = raw_disambiguation != 0
-                elif isinstance(raw_disambiguation, str):
-                    is_disambiguation = raw_disambiguation.strip().lower() in {"1", "true", "yes", "y"}
-                else:
-                    is_disambiguation = False
-
-                record = {
-                    "page_id": int(article["page_id"]),
-                    "lang": language,
-                    "title": title,
-                    "summary": summary,
-                    "wiki_url": str(article.get("wiki_url", "")),
-                    "topic_key": topic_key,
-                    "quality_score": float(article.get("quality_score", 0.5)),
-                    "is_disambiguation": bool(is_disambiguation),
-                    "source_rev_id": article.get("source_rev_id"),
-                    "updated_at": str(article.get("updated_at", "1970-01-01T00:00:00Z")),
-                    "entity_type": _infer_entity_type(title=title, summary=summary, topic_key=topic_key),
-                    "keywords": _infer_keywords(title=title, summary=summary, topic_key=topic_key),
-                    "aliases": payload.get("aliases", []) or [],
-                }
-                out.write(json.dumps(record, ensure_ascii=False))
-                out.write("\n")
-
-                written += 1
-                topic_counts[topic_key] += 1
-                if written >= target:
-                    return {
-                        "written": written,
-                        "target": target,
-                        "scanned": scanned,
-                        "topics": dict(sorted(topic_counts.items())),
-                    }
 
+def build_topic_subset(
+    source_manifest: Path,
+    output_ndjson: Path,
+    language: str,
+    allowed_topics: set[str],
+    target: int,
+) -> dict[str, object]:
+    subset = SubsetSpec(name="subset", topics=allowed_topics, target=target, output=output_ndjson)
+    result = build_topic_subsets(source_manifest, language, [subset])
     return {
-        "written": written,
+        "written": subset.written,
         "target": target,
-        "scanned": scanned,
-        "topics": dict(sorted(topic_counts.items())),
+        "scanned": result["scanned"],
+        "decoded": result["decoded"],
+        "skippedShards": result["skippedShards"],
+        "topics": dict(sorted(subset.topic_counts.items())),
     }
 
 
 def main() -> None:
     args = parse_args()
-    allowed_topics = {
-        _normalize_token(item)
-        for item in args.allowed_topics.split(",")
-        if item.strip()
-    }
+    if args.config:
+        if args.output_ndjson or args.allowed_topics:
+            raise SystemExit("--config cannot be combined with --output-ndjson/--allowed-topics")
+        try:
+            subsets = load_subset_config(Path(args.config))
+        except (OSError, ValueError, KeyError) as exc:
+            raise SystemExit(f"Invalid --config: {exc}")
+        result = build_topic_subsets(Path(args.source_manifest), args.language, subsets)
+        for name, summary in result["subsets"].items():
+            _log(f"{name}: {summary['written']:,}/{summary['target']:,} cards")
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+
+    if not args.output_ndjson or not args.allowed_topics:
+        raise SystemExit("--output-ndjson and --allowed-topics are required without --config")
+    allowed_topics = parse_topics(args.allowed_topics)
     if not allowed_topics:
         raise SystemExit("--allowed-topics must include at least one topic")
 
@@ -0,0 +1,400 @@
+"""Per-card ranking features, computed at build time.
+
+`FeedRanker` on the clients derives a topic descriptor for every candidate on
+every refresh: a primary topic and up to ten preference keys from
+`CardKeywords.preferenceKeys`. `describe_topics` ports that derivation, and
+`write_shard_features` stores its result next to each shard as fixed-width
+columns. A client can then rank with array lookups: interest is the blended
+affinity of the hashed keys, novelty and repetition compare primary topics,
+and quality is the bucket over 255. Integers are little-endian, columns are
+padded to their element size, and a shard's rows keep their shard order:
+
+    header        magic "DPFV", version u16, key slots u16, record count u32,
+                  topic count u32, topic link count u32, reserved u32
+    page_ids      u64 [records]
+    key_hashes    u32 [records x key slots]; FNV-1a of each preference key, 0 when unused
+    topic_start   u32 [records + 1]; each card's range of the topic link columns
+    primary_topic u16 [records]; index into the topic table
+    topic_id      u16 [links]
+    quality       u8  [records]; quality score x 255
+    key_count     u8  [records]
+    topic_weight  u8  [links]; weight x 255
+    topics        (u16 length, UTF-8) [topic count]
+
+Topic links are the `article_topics` rows: the primary topic at weight 1, then
+every other stable topic among the preference keys at 1 / (1 + rank).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import sqlite3
+import struct
+import sys
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .atomic_io import DirectorySync, atomic_write_bytes, atomic_write_text
+
+FEATURE_FORMAT = "doompedia-features-v1"
+FEATURE_SUFFIX = ".features.bin"
+MAGIC = b"DPFV"
+VERSION = 1
+KEY_SLOTS = 10
+QUALITY_SCALE = 255
+
+FEATURE_SCHEMA: dict[str, object] = {
+    "format": FEATURE_FORMAT,
+    "keySlots": KEY_SLOTS,
+    "keyHash": "fnv1a-32",
+    "qualityScale": QUALITY_SCALE,
+    "topicWeightScale": QUALITY_SCALE,
+    "columns": [
+        "pageId",
+        "keyHashes",
+        "topicStart",
+        "primaryTopic",
+        "topicId",
+        "quality",
+        "keyCount",
+        "topicWeight",
+    ],
+}
+
+_HEADER = struct.Struct("<4sHHIIII")
+
+# Mirrors CardKeywords.kt and CardKeywords.swift; keep all three in sync.
+CLIENT_STABLE_TOPICS = frozenset(
+    {
+        "science", "technology", "history", "geography", "culture", "politics", "economics",
+        "sports", "health", "environment", "society", "biography", "general",
+    }
+)
+_KEYWORD_BUCKETS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("biography", ("born", "died", "actor", "author", "scientist", "politician", "player")),
+    ("science", ("physics", "chemistry", "biology", "mathematics", "astronomy", "scientific")),
+    ("technology", ("software", "computer", "internet", "digital", "algorithm", "device")),
+    ("history", ("war", "empire", "century", "historical", "revolution", "ancient", "dynasty")),
+    ("geography", ("city", "country", "region", "river", "mountain", "capital", "province")),
+    ("politics", ("government", "election", "parliament", "policy", "minister", "president")),
+    ("culture", ("music", "film", "literature", "art", "religion", "language")),
+    ("economics", ("economy", "finance", "market", "trade", "industry", "currency")),
+    ("health", ("medicine", "disease", "medical", "health", "hospital", "symptom")),
+    ("sports", ("football", "basketball", "olympic", "athlete", "league", "championship")),
+    ("environment", ("climate", "ecology", "forest", "wildlife", "pollution", "conservation")),
+)
+_CLIENT_STOPWORDS = frozenset(
+    {
+        "about", "after", "before", "their", "there", "which", "while", "where", "these", "those",
+        "through", "using", "under", "between", "during", "known", "wikipedia", "article", "entry",
+        "first", "second", "third", "world", "state", "city", "country",
+    }
+)
+_TOKEN_RE = re.compile(r"[A-Za-z][A-Za-z-]{2,}")
+_WHITESPACE_RE = re.compile(r"\s+")
+_HYPHENS_RE = re.compile(r"-+")
+
+
+def client_canonical_topic(raw_topic: str) -> str:
+    canonical = _HYPHENS_RE.sub("-", raw_topic.strip().lower().replace("_", "-").replace(" ", "-"))
+    return {"history-of": "history", "geography-of": "geography", "economy-of": "economics", "list-of": "culture"}.get(
+        canonical, canonical
+    )
+
+
+def preference_keys(title: str, summary: str, topic_key: str, max_keys: int = 12) -> list[str]:
+    """`CardKeywords.preferenceKeys`."""
+    text = f"{title} {summary}".lower()
+    ordered: dict[str, None] = {}
+
+    def add(value: str) -> None:
+        cleaned = value.strip()
+        if cleaned:
+            ordered.setdefault(cleaned)
+
+    canonical = client_canonical_topic(topic_key)
+    if canonical and canonical != "general":
+        add(canonical)
+    for topic, keywords in _KEYWORD_BUCKETS:
+        if any(keyword in text for keyword in keywords):
+            add(topic)
+    lowered_title = title.lower()
+    for needle, topic in (("list of", "culture"), ("university", "society"), ("city", "geography"), ("war", "history")):
+        if needle in lowered_title:
+            add(topic)
+    if not ordered:
+        add("general")
+    for token in _TOKEN_RE.findall(text):
+        if len(token) >= 4 and token not in _CLIENT_STOPWORDS:
+            add(token)
+        if len(ordered) >= max_keys:
+            break
+    return list(ordered)[:max_keys]
+
+
+def describe_topics(title: str, summary: str, topic_key: str) -> tuple[str, list[str]]:
+    """`FeedRanker.describeTopics`: the card's primary topic and its preference keys."""
+    extracted = preference_keys(title, summary, topic_key, max_keys=KEY_SLOTS)
+    explicit = _WHITESPACE_RE.sub("-", topic_key.strip().lower().replace("_", "-"))
+    has_explicit = bool(explicit) and explicit not in {"general", "unknown", "other"}
+    keys = list(dict.fromkeys([explicit, *extracted] if has_explicit else extracted))[:KEY_SLOTS]
+    if has_explicit:
+        return explicit, keys
+    inferred = next(
+        (
+            key
+            for key in preference_keys(title, summary, topic_key, max_keys=8)
+            if key in CLIENT_STABLE_TOPICS and key != "general"
+        ),
+        client_canonical_topic(topic_key) or "general",
+    )
+    return inferred, keys
+
+
+def key_hash(key: str) -> int:
+    """32-bit FNV-1a of the UTF-8 key; 0 marks an empty slot, so a key hashing to 0 is stored as 1."""
+    value = 0x811C9DC5
+    for byte in key.encode("utf-8"):
+        value = ((value ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return value or 1
+
+
+def topic_weights(primary: str, keys: list[str]) -> list[tuple[str, float]]:
+    """The card's `article_topics` rows, strongest first."""
+    topics = [primary, *(key for key in keys if key in CLIENT_STABLE_TOPICS and key not in {"general", primary})]
+    return [(topic, 1.0 / (1 + rank)) for rank, topic in enumerate(topics)]
+
+
+def _scaled(value: float) -> int:
+    return round(min(1.0, max(0.0, value)) * QUALITY_SCALE)
+
+
+def _le(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pad(body: bytearray, alignment: int) -> None:
+    body.extend(b"\0" * (-len(body) % alignment))
+
+
+def encode_features(cards: Iterable[tuple[int, str, str, str, float]]) -> bytes:
+    """Encode `(page_id, title, summary, topic_key, quality_score)` rows as a feature sidecar."""
+    page_ids = array("Q")
+    key_hashes = array("I")
+    topic_start = array("I", [0])
+    primary_topic = array("H")
+    topic_id = array("H")
+    quality = bytearray()
+    key_count = bytearray()
+    topic_weight = bytearray()
+    topics: dict[str, int] = {}
+    for page_id, title, summary, topic_key, quality_score in cards:
+        primary, keys = describe_topics(title, summary, topic_key)
+        page_ids.append(page_id)
+        key_hashes.extend([key_hash(key) for key in keys] + [0] * (KEY_SLOTS - len(keys)))
+        key_count.append(len(keys))
+        quality.append(_scaled(quality_score))
+        primary_topic.append(topics.setdefault(primary, len(topics)))
+        for topic, weight in topic_weights(primary, keys):
+            topic_id.append(topics.setdefault(topic, len(topics)))
+            topic_weight.append(_scaled(weight))
+        topic_start.append(len(topic_id))
+
+    body = bytearray(_HEADER.pack(MAGIC, VERSION, KEY_SLOTS, len(page_ids), len(topics), len(topic_id), 0))
+    for column in (page_ids, key_hashes, topic_start, primary_topic, topic_id):
+        _pad(body, column.itemsize)
+        body += _le(column)
+    body += quality + key_count + topic_weight
+    for topic in topics:
+        encoded = topic.encode("utf-8")
+        body += struct.pack("<H", len(encoded)) + encoded
+    return bytes(body)
+
+
+def write_shard_features(
+    path: Path,
+    cards: Iterable[tuple[int, str, str, str, float]],
+    sync: DirectorySync | None = None,
+) -> dict[str, object]:
+    """Write a shard's feature sidecar; returns its `featureIndex` entry without the url."""
+    body = encode_features(cards)
+    atomic_write_bytes(path, body, sync=sync)
+    return {"sha256": hashlib.sha256(body).hexdigest(), "bytes": len(body)}
+
+
+@dataclass(slots=True)
+class ShardFeatures:
+    page_ids: array
+    key_hashes: array
+    topic_start: array
+    primary_topic: array
+    topic_id: array
+    quality: bytes
+    key_count: bytes
+    topic_weight: bytes
+    topics: list[str]
+
+    def __len__(self) -> int:
+        return len(self.page_ids)
+
+    def keys(self, row: int) -> list[int]:
+        start = row * KEY_SLOTS
+        return list(self.key_hashes[start : start + self.key_count[row]])
+
+    def article_topics(self, row: int) -> list[tuple[str, float]]:
+        return [
+            (self.topics[self.topic_id[link]], self.topic_weight[link] / QUALITY_SCALE)
+            for link in range(self.topic_start[row], self.topic_start[row + 1])
+        ]
+
+
+def decode_features(data: bytes) -> ShardFeatures:
+    magic, version, key_slots, records, topic_count, links, _ = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or key_slots != KEY_SLOTS:
+        raise ValueError(f"not a version {VERSION} feature sidecar")
+    position = _HEADER.size
+    columns = []
+    for typecode, count in (("Q", records), ("I", records * KEY_SLOTS), ("I", records + 1), ("H", records), ("H", links)):
+        column = array(typecode)
+        position += -position % column.itemsize
+        column.frombytes(data[position : position + count * column.itemsize])
+        if sys.byteorder != "little":
+            column.byteswap()
+        columns.append(column)
+        position += count * column.itemsize
+    byte_columns = []
+    for count in (records, records, links):
+        byte_columns.append(data[position : position + count])
+        position += count
+    topics = []
+    for _ in range(topic_count):
+        (length,) = struct.unpack_from("<H", data, position)
+        topics.append(data[position + 2 : position + 2 + length].decode("utf-8"))
+        position += 2 + length
+    return ShardFeatures(*columns, *byte_columns, topics)
+
+
+def read_shard_features(path: Path) -> ShardFeatures:
+    try:
+        return decode_features(path.read_bytes())
+    except ValueError as exc:
+        raise ValueError(f"{path}: {exc}") from None
+
+
+def shard_cards(shard_path: Path) -> Iterator[tuple[int, str, str, str, float]]:
+    """The `encode_features` input rows of one shard file."""
+    opener = gzip.open if shard_path.suffix == ".gz" else open
+    with opener(shard_path, "rb") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            article = json.loads(line)["article"]
+            yield (
+                int(article["page_id"]),
+                str(article.get("title", "")),
+                str(article.get("summary", "")),
+                str(article.get("topic_key", "general")),
+                float(article.get("quality_score", 0.5)),
+            )
+
+
+def index_pack_features(pack_dir: Path) -> int:
+    """Write feature sidecars for every shard of an existing pack and record them; returns the card count."""
+    manifest_path = pack_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    records = 0
+    sidecars: dict[str, str] = {}
+    for shard in manifest.get("shards", []):
+        shard_path = pack_dir / str(shard["url"])
+        name = f"{shard['id']}{FEATURE_SUFFIX}"
+        entry = write_shard_features(shard_path.with_name(name), shard_cards(shard_path))
+        shard["featureIndex"] = {"url": f"shards/{name}", **entry}
+        sidecars[f"shards/{name}"] = str(entry["sha256"])
+        records += int(shard.get("records", 0))
+    manifest["featureSchema"] = FEATURE_SCHEMA
+    checksums_path = pack_dir / "checksums.txt"
+    if checksums_path.exists():
+        lines = [
+            line
+            for line in checksums_path.read_text(encoding="utf-8").splitlines()
+            if line.strip() and line.split("  ", 1)[-1] not in sidecars
+        ]
+        lines += [f"{sha256}  {url}" for url, sha256 in sidecars.items()]
+        atomic_write_text(checksums_path, "\n".join(lines) + "\n")
+    atomic_write_text(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2))
+    return records
+
+
+def load_article_topics(pack_dir: Path, database: Path) -> int:
+    """Fill `article_topics` (and any missing `topics`) of a content database from a pack's feature sidecars."""
+    manifest = json.loads((pack_dir / "manifest.json").read_text(encoding="utf-8"))
+    connection = sqlite3.connect(database)
+    rows = 0
+    try:
+        with connection:
+            for shard in manifest.get("shards", []):
+                sidecar = shard.get("featureIndex")
+                if not isinstance(sidecar, dict):
+                    raise ValueError(f"Shard {shard.get('id')} has no featureIndex; build it first")
+                features = read_shard_features(pack_dir / str(sidecar["url"]))
+                connection.executemany(
+                    "INSERT OR IGNORE INTO topics (topic_key, display_name, description) VALUES (?, ?, '')",
+                    [(topic, topic.replace("-", " ").title()) for topic in features.topics],
+                )
+                links = [
+                    (features.page_ids[row], topic, weight)
+                    for row in range(len(features))
+                    for topic, weight in features.article_topics(row)
+                ]
+                connection.executemany(
+                    "INSERT OR REPLACE INTO article_topics (page_id, topic_key, weight) VALUES (?, ?, ?)", links
+                )
+                rows += len(links)
+    finally:
+        connection.close()
+    return rows
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build per-card ranking feature sidecars for a pack")
+    parser.add_argument("--pack", required=True, help="Pack directory containing manifest.json")
+    parser.add_argument(
+        "--sqlite",
+        help="Content database (shared-spec/content-schema.sql) whose article_topics to fill from existing sidecars",
+    )
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[card_features] {message}", file=sys.stderr, flush=True)
+
+
+def main() -> None:
+    args = parse_args()
+    start = time.monotonic()
+    pack_dir = Path(args.pack)
+    if args.sqlite:
+        try:
+            rows = load_article_topics(pack_dir, Path(args.sqlite))
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+        _log(f"Loaded {rows:,} article_topics rows in {time.monotonic() - start:.1f}s")
+        print(json.dumps({"articleTopics": rows}, indent=2))
+        return
+    records = index_pack_features(pack_dir)
+    _log(f"Wrote features for {records:,} cards in {time.monotonic() - start:.1f}s")
+    print(json.dumps({"records": records, "featureSchema": FEATURE_SCHEMA}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Progress checkpoints that let long pipeline stages resume after a crash."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from .atomic_io import atomic_open
+
+CHECKPOINT_VERSION = 1
+
+
+def input_fingerprint(inputs: list[Path], **params: Any) -> dict[str, Any]:
+    """Describe the inputs and arguments a checkpoint is only valid for."""
+    return {
+        "version": CHECKPOINT_VERSION,
+        "inputs": [
+            {
+                "path": str(path.resolve()),
+                "bytes": path.stat().st_size,
+                "mtimeNs": path.stat().st_mtime_ns,
+            }
+            for path in inputs
+        ],
+        "params": params,
+    }
+
+
+def load_checkpoint(path: Path, fingerprint: dict[str, Any]) -> dict[str, Any] | None:
+    """Return saved state, or `None` when there is nothing to resume.
+
+    Raises `ValueError` if the checkpoint belongs to different inputs or
+    arguments, since resuming it would silently mix two runs.
+    """
+    if not path.exists():
+        return None
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    # Round-trip through JSON so tuples and Path-derived strings compare equal.
+    if payload.get("fingerprint") != json.loads(json.dumps(fingerprint)):
+        raise ValueError(
+            f"Checkpoint {path} was written for different inputs or arguments; "
+            "delete it or rerun without --resume"
+        )
+    return payload["state"]
+
+
+def save_checkpoint(path: Path, fingerprint: dict[str, Any], state: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_open(path, "w", encoding="utf-8") as handle:
+        json.dump({"fingerprint": fingerprint, "state": state}, handle, ensure_ascii=False)
+
+
+def output_intact(path: Path, offset: int) -> bool:
+    """Whether `path` still holds the `offset` bytes a checkpoint says were written.
+
+    A missing or truncated output cannot be resumed: reopening it would fail,
+    or seeking past its end would pad the gap with NUL bytes.
+    """
+    try:
+        return path.stat().st_size >= offset
+    except FileNotFoundError:
+        return False
+
+
+def clear_checkpoint(path: Path) -> None:
+    path.unlink(missing_ok=True)
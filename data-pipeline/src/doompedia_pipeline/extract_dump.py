@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
+import sys
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from urllib.parse import quote
 
-from .normalize import clamp_summary, normalize_title
+from .checkpoint import clear_checkpoint, input_fingerprint, load_checkpoint, output_intact, save_checkpoint
+from .normalize import KEYWORD_STOPWORDS, clamp_summary, keyword_form, normalize_title, word_tokens
 
 _COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
 _REF_RE = re.compile(r"<ref[^>/]*?>.*?</ref>|<ref[^>]*/>", re.IGNORECASE | re.DOTALL)
@@ -16,7 +19,6 @@ _HEADING_RE = re.compile(r"^=+.*?=+$", re.MULTILINE)
 _TEMPLATE_RE = re.compile(r"\{\{[^{}]*\}\}")
 _CATEGORY_RE = re.compile(r"\[\[Category:([^|\]]+)", re.IGNORECASE)
 _WIKILINK_RE = re.compile(r"\[\[([^|\]]+)(?:\|([^\]]+))?\]\]")
-_WORD_RE = re.compile(r"[A-Za-z][A-Za-z-]{2,}")
 
 
 def parse_args() -> argparse.Namespace:
@@ -27,9 +29,24 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--max-records", type=int, default=1_000_000)
     parser.add_argument("--min-summary", type=int, default=40)
     parser.add_argument("--max-summary", type=int, default=320)
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=10_000,
+        help="Persist a resumable checkpoint every N written records (0 disables checkpoints)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the checkpoint next to --output instead of starting over",
+    )
     return parser.parse_args()
 
 
+def _log(message: str) -> None:
+    print(f"[extract_dump] {message}", file=sys.stderr, flush=True)
+
+
 def extract_topic_key(title: str, wikitext: str | None = None, summary: str | None = None) -> str:
     """
     Derive a stable topic key for cards.
@@ -114,7 +131,7 @@ def _extract_keywords(title: str, summary: str, topic_key: str) -> list[str]:
     seen: set[str] = set()
 
     def add(value: str) -> None:
-        normalized = normalize_title(value).replace(" ", "-")
+        normalized = keyword_form(value)
         if not normalized or normalized in seen:
             return
         seen.add(normalized)
@@ -122,18 +139,11 @@ def _extract_keywords(title: str, summary: str, topic_key: str) -> list[str]:
 
     add(topic_key)
 
-    title_tokens = [token for token in _WORD_RE.findall(title.lower()) if len(token) >= 4]
-    summary_tokens = [token for token in _WORD_RE.findall(summary.lower()) if len(token) >= 5]
-    stopwords = {
-        "about", "after", "before", "their", "there", "which", "while", "where", "these", "those",
-        "through", "using", "under", "between", "during", "known", "wikipedia", "article",
-    }
-
-    for token in title_tokens[:8]:
-        if token not in stopwords:
+    for token in word_tokens(title, 4)[:8]:
+        if token not in KEYWORD_STOPWORDS:
             add(token)
-    for token in summary_tokens[:16]:
-        if token not in stopwords:
+    for token in word_tokens(summary, 5)[:16]:
+        if token not in KEYWORD_STOPWORDS:
             add(token)
         if len(keywords) >= 12:
             break
@@ -182,18 +192,46 @@ def extract_dump(
     max_records: int,
     min_summary: int,
     max_summary: int,
+    checkpoint_every: int = 0,
+    resume: bool = False,
 ) -> dict[str, int]:
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = output_path.with_name(f"{output_path.name}.checkpoint.json")
+    fingerprint = input_fingerprint(
+        [input_path],
+        language=language,
+        max_records=max_records,
+        min_summary=min_summary,
+        max_summary=max_summary,
+    )
 
     written = 0
     scanned = 0
-    with output_path.open("w", encoding="utf-8") as out:
+    output_offset = 0
+    state = load_checkpoint(checkpoint_path, fingerprint) if resume else None
+    if state is not None and not output_intact(output_path, int(state["outputOffset"])):
+        _log(f"{output_path} is missing or shorter than its checkpoint; starting over")
+        state = None
+    if state is not None:
+        written = int(state["written"])
+        output_offset = int(state["outputOffset"])
+    skip_pages = int(state["scanned"]) if state is not None else 0
+
+    # Output is written as bytes so the checkpointed offset is an exact file position.
+    with output_path.open("r+b" if state is not None else "wb") as out:
+        out.seek(output_offset)
+        out.truncate()
         context = ET.iterparse(input_path, events=("end",))
         for _, elem in context:
             if _local_name(elem.tag) != "page":
                 continue
 
             scanned += 1
+            if scanned <= skip_pages:
+                # XML cannot be re-entered mid-document, so already processed
+                # pages are parsed but skipped without summary extraction.
+                elem.clear()
+                continue
             try:
                 ns_value = int(_child_text(elem, "ns") or "-1")
             except ValueError:
@@ -239,14 +277,23 @@ def extract_dump(
                 "keywords": _extract_keywords(title=title, summary=summary, topic_key=topic_key),
                 "aliases": [],
             }
-            out.write(json.dumps(payload, ensure_ascii=False))
-            out.write("\n")
+            out.write(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+            out.write(b"\n")
             written += 1
 
             elem.clear()
             if written >= max_records:
                 break
-
+            if checkpoint_every > 0 and written % checkpoint_every == 0:
+                out.flush()
+                os.fsync(out.fileno())
+                save_checkpoint(
+                    checkpoint_path,
+                    fingerprint,
+                    {"scanned": scanned, "written": written, "outputOffset": out.tell()},
+                )
+
+    clear_checkpoint(checkpoint_path)
     return {
         "scanned": scanned,
         "written": written,
@@ -262,6 +309,8 @@ def main() -> None:
         max_records=args.max_records,
         min_summary=args.min_summary,
         max_summary=args.max_summary,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume,
     )
     print(json.dumps(summary, indent=2))
 
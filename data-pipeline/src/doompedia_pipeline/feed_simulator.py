@@ -0,0 +1,720 @@
+"""Offline feed-ranking simulator for tuning `ranking-config.v1.json`.
+
+Loads a pack's cards into NumPy arrays (from the shards' `featureIndex`
+sidecars when the pack has them) and replays user sessions against many
+ranking configs at once. Each refresh scores a candidate pool for a whole
+batch of configs with `FeedRanker`'s formulas as array arithmetic. It then
+runs the ranker's two-pass guardrail selection for every config in lockstep.
+Simulated users open, like and hide the cards they are shown according to
+their topic preferences, and affinities and history update the way
+`WikiRepository` updates them. Every config sees the same candidate pools and
+the same random draws, so differences between configs come from the configs.
+
+Reported per config: engagement rates, topic diversity, novelty and
+exploration share. Throughput is reported for the whole run.
+
+Known differences from the clients:
+- affinity updates use the ranker's descriptor keys, which put the explicit
+  topic key first, rather than `CardKeywords.preferenceKeys`;
+- history records the descriptor's primary topic rather than
+  `CardKeywords.primaryTopic`;
+- both only differ for cards whose raw topic is not a canonical key;
+- quality is the sidecars' 1/255 bucket;
+- ties for the two strongest affinities break by key hash.
+
+The `diversity` weight only shifts the scores `FeedRanker` displays, never
+which cards it selects, so it cannot move any metric here.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import itertools
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from .card_features import (
+    KEY_SLOTS,
+    QUALITY_SCALE,
+    ShardFeatures,
+    decode_features,
+    encode_features,
+    key_hash,
+    read_shard_features,
+    shard_cards,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Recorded events that count towards a session's topic preferences.
+EVENT_WEIGHTS = {"open": 1.0, "like": 2.0, "bookmark": 2.0}
+METRICS = (
+    "openRate",
+    "likeRate",
+    "hideRate",
+    "noveltyRate",
+    "repeatRate",
+    "explorationShare",
+    "distinctTopicsPerFeed",
+    "topicEntropyBits",
+    "sessionTopicCoverage",
+    "fillRate",
+)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("feed_simulator needs numpy; install doompedia-pipeline[simulate]")
+
+
+@dataclass(slots=True)
+class CardTable:
+    """One row per card; `topic` indexes `topics`, `keys` holds `key_count` hashes per row."""
+
+    page_ids: np.ndarray
+    topic: np.ndarray
+    topics: list[str]
+    topic_hash: np.ndarray
+    keys: np.ndarray
+    key_count: np.ndarray
+    quality: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.page_ids)
+
+    @classmethod
+    def from_features(cls, shards: Iterable[ShardFeatures]) -> CardTable:
+        _require_numpy()
+        topics: dict[str, int] = {}
+        page_ids, topic, keys, key_count, quality = [], [], [], [], []
+        for features in shards:
+            mapping = np.array([topics.setdefault(name, len(topics)) for name in features.topics], dtype=np.int32)
+            page_ids.append(np.asarray(features.page_ids, dtype=np.uint64))
+            topic.append(mapping[np.asarray(features.primary_topic, dtype=np.intp)] if len(mapping) else np.zeros(0, np.int32))
+            keys.append(np.asarray(features.key_hashes, dtype=np.uint32).reshape(-1, KEY_SLOTS))
+            key_count.append(np.frombuffer(features.key_count, dtype=np.uint8))
+            quality.append(np.frombuffer(features.quality, dtype=np.uint8) / QUALITY_SCALE)
+        names = list(topics)
+        return cls(
+            page_ids=np.concatenate(page_ids) if page_ids else np.zeros(0, np.uint64),
+            topic=np.concatenate(topic) if topic else np.zeros(0, np.int32),
+            topics=names,
+            topic_hash=np.array([key_hash(name) for name in names], dtype=np.uint32),
+            keys=np.concatenate(keys) if keys else np.zeros((0, KEY_SLOTS), np.uint32),
+            key_count=np.concatenate(key_count).astype(np.int64) if key_count else np.zeros(0, np.int64),
+            quality=np.concatenate(quality) if quality else np.zeros(0),
+        )
+
+    @classmethod
+    def from_cards(cls, cards: Iterable[tuple[int, str, str, str, float]]) -> CardTable:
+        """Build from `(page_id, title, summary, topic_key, quality_score)` rows."""
+        return cls.from_features([decode_features(encode_features(cards))])
+
+
+def load_cards(pack_dir: Path) -> CardTable:
+    """Load a local pack's cards, deriving features for shards without a `featureIndex`."""
+    manifest = json.loads((pack_dir / "manifest.json").read_text(encoding="utf-8"))
+    shards = []
+    derived = 0
+    for shard in manifest.get("shards", []):
+        sidecar = shard.get("featureIndex")
+        if isinstance(sidecar, dict):
+            shards.append(read_shard_features(pack_dir / str(sidecar["url"])))
+        else:
+            shards.append(decode_features(encode_features(shard_cards(pack_dir / str(shard["url"])))))
+            derived += 1
+    if derived:
+        _log(f"Derived features for {derived} shard(s) without a featureIndex; build with --feature-index to skip this")
+    return CardTable.from_features(shards)
+
+
+def _lookup(config: dict, path: str) -> object:
+    value: object = config
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            raise ValueError(f"Ranking config has no {path!r}")
+        value = value[part]
+    return value
+
+
+def _with_value(config: dict, path: str, value: object) -> dict:
+    _lookup(config, path)
+    updated = copy.deepcopy(config)
+    *parents, leaf = path.split(".")
+    target = updated
+    for part in parents:
+        target = target[part]
+    target[leaf] = value
+    return updated
+
+
+def expand_sweep(
+    base: dict,
+    spec: dict[str, object],
+    samples: int = 0,
+    seed: int = 0,
+) -> list[tuple[dict[str, object], dict]]:
+    """The configs to simulate, as `(overrides, config)` pairs, baseline first.
+
+    `spec` maps dotted config paths to a list of values or a `{"min", "max"}`
+    range. Lists alone expand to their full grid; `samples` draws that many
+    random configs instead, which ranges require. Ranges over integer
+    settings draw integers.
+    """
+    ranges = {path: values for path, values in spec.items() if isinstance(values, dict)}
+    if ranges and samples <= 0:
+        raise ValueError(f"Ranges ({', '.join(ranges)}) need a sample count")
+    if samples > 0:
+        rng = random.Random(seed)
+        combinations = []
+        for _ in range(samples):
+            combination = {}
+            for path, values in spec.items():
+                if isinstance(values, dict):
+                    low, high = values["min"], values["max"]
+                    if isinstance(_lookup(base, path), int):
+                        combination[path] = rng.randint(int(low), int(high))
+                    else:
+                        combination[path] = round(rng.uniform(float(low), float(high)), 4)
+                else:
+                    combination[path] = rng.choice(list(values))
+            combinations.append(combination)
+    else:
+        paths = list(spec)
+        combinations = [dict(zip(paths, values)) for values in itertools.product(*(spec[path] for path in paths))]
+
+    configs = [({}, base)]
+    for combination in combinations:
+        config = base
+        for path, value in combination.items():
+            config = _with_value(config, path, value)
+        configs.append((combination, config))
+    return configs
+
+
+@dataclass(slots=True)
+class ConfigBatch:
+    """Ranking configs as one array per setting."""
+
+    interest: np.ndarray
+    novelty: np.ndarray
+    quality: np.ndarray
+    repetition: np.ndarray
+    level: np.ndarray
+    exploration_floor: np.ndarray
+    window: np.ndarray
+    max_same: np.ndarray
+    min_distinct: np.ndarray
+    cooldown: np.ndarray
+    open_rate: np.ndarray
+    like_rate: np.ndarray
+    hide_rate: np.ndarray
+    drift_cap: np.ndarray
+    clamp_min: np.ndarray
+    clamp_max: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.interest)
+
+    @classmethod
+    def from_configs(cls, configs: list[dict], level: str | None = None) -> ConfigBatch:
+        """`level` is the personalization level; by default each config's `defaultLevel`."""
+        _require_numpy()
+
+        def column(values: Iterable[object], dtype: type = float) -> np.ndarray:
+            return np.array(list(values), dtype=dtype)
+
+        rates = [dict(config["personalization"]["learningRates"]) for config in configs]
+        return cls(
+            interest=column(config["weights"]["interest"] for config in configs),
+            novelty=column(config["weights"]["novelty"] for config in configs),
+            quality=column(config["weights"]["quality"] for config in configs),
+            repetition=column(config["weights"]["repetitionPenalty"] for config in configs),
+            level=column(
+                config["personalization"]["levels"].get(level or config["personalization"]["defaultLevel"], 0.0)
+                for config in configs
+            ),
+            exploration_floor=column(config["guardrails"]["explorationFloor"] for config in configs),
+            window=column((config["guardrails"]["windowSize"] for config in configs), int),
+            max_same=column((config["guardrails"]["maxSameTopicInWindow"] for config in configs), int),
+            min_distinct=column((config["guardrails"]["minDistinctTopicsInWindow"] for config in configs), int),
+            cooldown=column((config["guardrails"]["cooldownCards"] for config in configs), int),
+            open_rate=column(rate.get("open", 0.0) for rate in rates),
+            like_rate=column(rate.get("like", rate.get("bookmark", 0.7)) for rate in rates),
+            hide_rate=column(rate.get("hide", -0.5) for rate in rates),
+            drift_cap=column(config["personalization"]["dailyDriftCap"] for config in configs),
+            clamp_min=column(config["personalization"]["topicClamp"]["min"] for config in configs),
+            clamp_max=column(config["personalization"]["topicClamp"]["max"] for config in configs),
+        )
+
+
+@dataclass(slots=True)
+class UserModel:
+    """How a simulated user reacts to a shown card, by their preference for its topic.
+
+    With `p` the topic's preference relative to the user's favourite topic, a
+    card is opened with probability `open_floor + (open_ceiling - open_floor) * p`.
+    An opened card is liked with probability `like * p`. A card left unopened
+    is hidden with probability `hide * (1 - p)`.
+    """
+
+    open_floor: float = 0.05
+    open_ceiling: float = 0.6
+    like: float = 0.25
+    hide: float = 0.15
+
+
+def synthetic_sessions(cards: CardTable, count: int, seed: int = 0, favourites: int = 3) -> list[np.ndarray]:
+    """Topic preference vectors of `count` users who each favour a few topics, common ones more often."""
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    frequency = np.bincount(cards.topic, minlength=len(cards.topics)).astype(float)
+    picks = min(favourites, int(np.count_nonzero(frequency)))
+    sessions = []
+    for _ in range(count):
+        preference = np.zeros(len(cards.topics))
+        chosen = rng.choice(len(frequency), size=picks, replace=False, p=frequency / frequency.sum())
+        preference[chosen] = rng.dirichlet(np.ones(picks))
+        sessions.append(preference)
+    return sessions
+
+
+def recorded_sessions(path: Path, cards: CardTable) -> list[np.ndarray]:
+    """Topic preference vectors fitted to recorded sessions.
+
+    `path` is NDJSON of `{"session", "pageId", "event"}` rows; each session's
+    preferences are its `EVENT_WEIGHTS`-weighted event counts per topic.
+    """
+    _require_numpy()
+    order = np.argsort(cards.page_ids)
+    sorted_ids = cards.page_ids[order]
+    preferences: dict[str, np.ndarray] = {}
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            weight = EVENT_WEIGHTS.get(str(row.get("event", "")), 0.0)
+            position = int(np.searchsorted(sorted_ids, np.uint64(int(row["pageId"]))))
+            if not weight or position >= len(sorted_ids) or sorted_ids[position] != int(row["pageId"]):
+                continue
+            preference = preferences.setdefault(str(row["session"]), np.zeros(len(cards.topics)))
+            preference[cards.topic[order[position]]] += weight
+    return [preference for preference in preferences.values() if preference.any()]
+
+
+class _Totals(dict):
+    """Per-config event counts, by name, accumulated over a run's sessions."""
+
+    COUNTS = ("feeds", "shown", "opened", "liked", "hidden", "novel", "repeats", "exploration", "distinct", "entropy", "coverage")
+
+    def __init__(self, configs: int, limit: int) -> None:
+        super().__init__((name, np.zeros(configs)) for name in self.COUNTS)
+        self.limit = limit
+        self.sessions = 0
+
+    def metrics(self, position: int) -> dict[str, float]:
+        value = {name: float(column[position]) for name, column in self.items()}
+        shown = max(value["shown"], 1.0)
+        feeds = max(value["feeds"], 1.0)
+        return {
+            "openRate": value["opened"] / shown,
+            "likeRate": value["liked"] / shown,
+            "hideRate": value["hidden"] / shown,
+            "noveltyRate": value["novel"] / shown,
+            "repeatRate": value["repeats"] / shown,
+            "explorationShare": value["exploration"] / shown,
+            "distinctTopicsPerFeed": value["distinct"] / feeds,
+            "topicEntropyBits": value["entropy"] / feeds,
+            "sessionTopicCoverage": value["coverage"] / max(self.sessions, 1),
+            "fillRate": value["shown"] / (feeds * max(self.limit, 1)),
+        }
+
+
+@dataclass(slots=True)
+class Ranking:
+    """One refresh for a batch of configs: pool positions shown in feed order (-1 past the end)."""
+
+    shown: np.ndarray
+    exploration: np.ndarray
+    in_cooldown: np.ndarray
+
+
+class SessionState:
+    """Per-config affinities and history over the keys and topics one session can meet."""
+
+    def __init__(self, cards: CardTable, session_cards: np.ndarray, configs: int, history: int) -> None:
+        self.cards = cards
+        self.session_cards = session_cards
+        keys = cards.keys[session_cards]
+        counts = cards.key_count[session_cards]
+        self.vocabulary, key_ids = np.unique(keys, return_inverse=True)
+        width = len(self.vocabulary)
+        self.valid = np.arange(KEY_SLOTS)[None, :] < counts[:, None]
+        # Unused slots point at an extra, always-zero column.
+        self.key_ids = np.where(self.valid, key_ids.reshape(keys.shape), width)
+        self.key_count = counts
+        self.topic = cards.topic[session_cards]
+        topic_hashes = cards.topic_hash[self.topic]
+        position = np.minimum(np.searchsorted(self.vocabulary, topic_hashes), max(width - 1, 0))
+        found = (self.vocabulary[position] == topic_hashes) if width else np.zeros(len(topic_hashes), bool)
+        self.topic_key = np.where(found, position, -1)
+        self.local_topics, self.topic_local = np.unique(self.topic, return_inverse=True)
+        self.affinity = np.zeros((configs, width + 1))
+        self.touched = np.zeros((configs, width + 1), bool)
+        self.recent = np.full((configs, max(history, 1)), -1, dtype=np.int64)
+        self.recent_count = np.zeros(configs, dtype=np.int64)
+
+    def set_affinity(self, config: int, key: str, value: float) -> None:
+        """Seed one config's affinity for `key`; keys the session never meets are ignored."""
+        hashed = key_hash(key)
+        position = int(np.searchsorted(self.vocabulary, hashed))
+        if position < len(self.vocabulary) and self.vocabulary[position] == hashed:
+            self.affinity[config, position] = value
+            self.touched[config, position] = True
+
+    def set_history(self, config: int, topics: list[str]) -> None:
+        """Seed one config's recently opened topics, most recent first."""
+        index = {name: position for position, name in enumerate(self.cards.topics)}
+        recent = [index.get(name, -2) for name in topics][: self.recent.shape[1]]
+        self.recent[config, :] = -1
+        self.recent[config, : len(recent)] = recent
+        self.recent_count[config] = len(recent)
+
+
+def rank_pool(state: SessionState, batch: ConfigBatch, pool: np.ndarray, limit: int) -> Ranking:
+    """`FeedRanker.rank` for every config in `batch` over session cards `pool` (in candidate order)."""
+    configs = len(batch)
+    rows = np.arange(configs)
+    cards = state.session_cards[pool]
+
+    key_ids = state.key_ids[pool]
+    valid = state.valid[pool]
+    values = state.affinity[:, key_ids]
+    strongest = np.where(valid, values, -np.inf).max(axis=2)
+    average = np.where(valid, values, 0.0).sum(axis=2) / np.maximum(state.key_count[pool], 1)
+    blended = np.where(state.key_count[pool] > 0, strongest * 0.7 + average * 0.3, 0.0)
+
+    topic = state.topic[pool]
+    slots = np.arange(state.recent.shape[1])[None, :]
+    listed = slots < np.minimum(state.recent_count, batch.window)[:, None]
+    cooling = listed & (slots < batch.cooldown[:, None])
+    matches = state.recent[:, :, None] == topic[None, None, :]
+    repeats = (matches & listed[:, :, None]).sum(axis=1)
+    in_cooldown = (matches & cooling[:, :, None]).any(axis=1)
+
+    interest = blended * batch.interest[:, None] * batch.level[:, None]
+    novelty = np.where(in_cooldown, batch.novelty[:, None] * 0.1, batch.novelty[:, None])
+    quality = state.cards.quality[cards][None, :] * batch.quality[:, None]
+    repetition = repeats * batch.repetition[:, None] * 0.25
+    order = np.argsort(-(interest + novelty + quality - repetition), axis=1, kind="stable")
+
+    # The two strongest affinities; a topic outside them is exploration.
+    masked = np.where(state.touched, state.affinity, -np.inf)
+    strongest_key = masked.argmax(axis=1)
+    masked[rows, strongest_key] = -np.inf
+    runner_up = masked.argmax(axis=1)
+    touched = state.touched.sum(axis=1)
+    topic_key = state.topic_key[pool][None, :]
+    in_top = ((topic_key == strongest_key[:, None]) & (touched >= 1)[:, None]) | (
+        (topic_key == runner_up[:, None]) & (touched >= 2)[:, None]
+    )
+    exploration = (touched > 0)[:, None] & ~in_top
+
+    ranked_topic = state.topic_local[pool][order]
+    ranked_exploration = np.take_along_axis(exploration, order, axis=1)
+    topic_counts = np.zeros((configs, len(state.local_topics)), dtype=np.int64)
+    distinct = np.zeros(configs, dtype=np.int64)
+    size = np.zeros(configs, dtype=np.int64)
+    explored = np.zeros(configs, dtype=np.int64)
+    pointer = np.full(configs, -1)
+    first_pass = np.ones(configs, bool)
+    active = np.ones(configs, bool) if limit > 0 else np.zeros(configs, bool)
+    chosen = np.zeros(order.shape, bool)
+    shown = np.full((configs, limit), -1)
+    shown_exploration = np.zeros((configs, limit), bool)
+    target = np.maximum(1, (limit * batch.exploration_floor).astype(int))
+    guarded = (batch.window > 0) & (batch.min_distinct > 0)
+    positions = np.arange(order.shape[1])[None, :]
+
+    # Both passes walk the ranked list once; a candidate skipped at one step
+    # is never revisited, so each step takes the first eligible candidate past
+    # the config's pointer.
+    while active.any():
+        counts = np.take_along_axis(topic_counts, ranked_topic, axis=1)
+        eligible = active[:, None] & (positions > pointer[:, None]) & (counts < batch.max_same[:, None])
+        most_distinct = distinct[:, None] + (counts == 0) + batch.window[:, None] - (size[:, None] + 1)
+        eligible &= ~((guarded & (size < batch.window))[:, None] & (most_distinct < batch.min_distinct[:, None]))
+        needed = np.maximum(target - explored, 0)
+        eligible &= ~(first_pass[:, None] & ~ranked_exploration & (needed >= limit - size)[:, None])
+        eligible &= ~(~first_pass[:, None] & chosen)
+
+        found = eligible.any(axis=1)
+        exhausted = active & ~found
+        active &= ~(exhausted & ~first_pass)
+        restart = exhausted & first_pass
+        first_pass[restart] = False
+        pointer[restart] = -1
+
+        picked = rows[found]
+        position = eligible[found].argmax(axis=1)
+        picked_topic = ranked_topic[picked, position]
+        picked_exploration = ranked_exploration[picked, position]
+        pointer[picked] = position
+        chosen[picked, position] = True
+        distinct[picked] += topic_counts[picked, picked_topic] == 0
+        topic_counts[picked, picked_topic] += 1
+        shown[picked, size[picked]] = order[picked, position]
+        shown_exploration[picked, size[picked]] = picked_exploration
+        explored[picked] += picked_exploration & first_pass[picked]
+        size[picked] += 1
+        active &= size < limit
+    return Ranking(shown=shown, exploration=shown_exploration, in_cooldown=in_cooldown)
+
+
+def _learn(state: SessionState, batch: ConfigBatch, pool_cards: np.ndarray, events: np.ndarray, rate: np.ndarray) -> None:
+    """Apply `WikiRepository.updateTopicAffinities` for configs with `events`."""
+    apply = events & (batch.level > 0)
+    if not apply.any():
+        return
+    delta = rate * batch.level
+    counts = state.key_count[pool_cards]
+    secondary = np.maximum(counts - 1, 1)
+    primary_delta = np.clip(delta * 0.55, -batch.drift_cap, batch.drift_cap)
+    secondary_delta = np.clip(delta * 0.45 / secondary, -batch.drift_cap, batch.drift_cap)
+    key_ids = state.key_ids[pool_cards]
+    for slot in range(KEY_SLOTS):
+        hit = apply & (slot < counts)
+        if not hit.any():
+            continue
+        rows = np.flatnonzero(hit)
+        columns = key_ids[hit, slot]
+        step = (primary_delta if slot == 0 else secondary_delta)[hit]
+        state.affinity[rows, columns] = np.clip(
+            state.affinity[rows, columns] + step, batch.clamp_min[hit], batch.clamp_max[hit]
+        )
+        state.touched[rows, columns] = True
+
+
+class FeedSimulator:
+    def __init__(
+        self,
+        cards: CardTable,
+        limit: int = 50,
+        pool_size: int = 250,
+        pool_mode: str = "random",
+        user: UserModel | None = None,
+    ) -> None:
+        _require_numpy()
+        if not len(cards):
+            raise ValueError("No cards to simulate")
+        self.cards = cards
+        self.limit = limit
+        self.pool_size = min(pool_size, len(cards))
+        self.pool_mode = pool_mode
+        self.user = user or UserModel()
+        # The clients' candidate order: quality descending, then page id.
+        self._candidate_order = np.lexsort((cards.page_ids, -cards.quality))
+
+    def _pools(self, rng: np.random.Generator, refreshes: int) -> np.ndarray:
+        if self.pool_mode == "quality":
+            return np.tile(self._candidate_order[: self.pool_size], (refreshes, 1))
+        pools = np.empty((refreshes, self.pool_size), dtype=np.int64)
+        for refresh in range(refreshes):
+            pool = rng.choice(len(self.cards), size=self.pool_size, replace=False)
+            pools[refresh] = pool[np.lexsort((self.cards.page_ids[pool], -self.cards.quality[pool]))]
+        return pools
+
+    def run(
+        self,
+        configs: list[dict],
+        sessions: list[np.ndarray],
+        refreshes: int = 10,
+        level: str | None = None,
+        seed: int = 0,
+        batch_size: int = 256,
+    ) -> tuple[list[dict[str, float]], dict[str, float]]:
+        """Replay every session against every config; returns per-config metrics and throughput."""
+        start = time.perf_counter()
+        results: list[dict[str, float]] = []
+        for offset in range(0, len(configs), batch_size):
+            batch = ConfigBatch.from_configs(configs[offset : offset + batch_size], level)
+            totals = _Totals(len(batch), self.limit)
+            for number, preference in enumerate(sessions):
+                # Seeded per session, so every batch replays identical pools and draws.
+                rng = np.random.default_rng([seed, number])
+                self._replay(batch, preference, self._pools(rng, refreshes), rng.random((refreshes, self.pool_size, 3)), totals)
+            results += [totals.metrics(position) for position in range(len(batch))]
+        elapsed = time.perf_counter() - start
+        feeds = len(configs) * len(sessions) * refreshes
+        throughput = {
+            "seconds": round(elapsed, 3),
+            "feeds": feeds,
+            "feedsPerSecond": round(feeds / elapsed, 1) if elapsed else 0.0,
+            "candidatesPerSecond": round(feeds * self.pool_size / elapsed, 1) if elapsed else 0.0,
+        }
+        return results, throughput
+
+    def _replay(
+        self,
+        batch: ConfigBatch,
+        preference: np.ndarray,
+        pools: np.ndarray,
+        draws: np.ndarray,
+        totals: _Totals,
+    ) -> None:
+        configs = len(batch)
+        rows = np.arange(configs)
+        session_cards, pool_positions = np.unique(pools, return_inverse=True)
+        pool_positions = pool_positions.reshape(pools.shape)
+        state = SessionState(self.cards, session_cards, configs, int(batch.window.max(initial=1)))
+        relative = preference / preference.max() if preference.max() > 0 else preference
+        seen = np.zeros((configs, len(session_cards)), bool)
+        topics_seen = np.zeros((configs, len(state.local_topics)), bool)
+        user = self.user
+
+        for refresh, pool in enumerate(pool_positions):
+            ranking = rank_pool(state, batch, pool, self.limit)
+            shown_counts = np.zeros((configs, len(state.local_topics)))
+            for slot in range(self.limit):
+                position = ranking.shown[:, slot]
+                present = position >= 0
+                if not present.any():
+                    break
+                position = np.where(present, position, 0)
+                card = pool[position]
+                topic = state.topic[card]
+                liking = relative[topic]
+                draw = draws[refresh, position]
+                opened = present & (draw[:, 0] < user.open_floor + (user.open_ceiling - user.open_floor) * liking)
+                liked = opened & (draw[:, 1] < user.like * liking)
+                hidden = present & ~opened & (draw[:, 2] < user.hide * (1 - liking))
+
+                totals["shown"] += present
+                totals["opened"] += opened
+                totals["liked"] += liked
+                totals["hidden"] += hidden
+                totals["novel"] += present & ~ranking.in_cooldown[rows, position]
+                totals["repeats"] += present & seen[rows, card]
+                totals["exploration"] += present & ranking.exploration[:, slot]
+                seen[rows[present], card[present]] = True
+                local_topic = state.topic_local[card]
+                topics_seen[rows[present], local_topic[present]] = True
+                shown_counts[rows[present], local_topic[present]] += 1
+
+                # Opening records history, as WikiRepository.recordOpen does, before learning.
+                if opened.any():
+                    state.recent[opened, 1:] = state.recent[opened, :-1]
+                    state.recent[opened, 0] = topic[opened]
+                    state.recent_count = np.minimum(state.recent_count + opened, state.recent.shape[1])
+                _learn(state, batch, card, opened, batch.open_rate)
+                _learn(state, batch, card, liked, batch.like_rate)
+                _learn(state, batch, card, hidden, batch.hide_rate)
+
+            shown = shown_counts.sum(axis=1, keepdims=True)
+            share = np.divide(shown_counts, shown, out=np.zeros_like(shown_counts), where=shown > 0)
+            totals["feeds"] += 1
+            totals["distinct"] += (shown_counts > 0).sum(axis=1)
+            totals["entropy"] -= np.where(share > 0, share * np.log2(np.where(share > 0, share, 1)), 0).sum(axis=1)
+        totals["coverage"] += topics_seen.sum(axis=1)
+        totals.sessions += 1
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay user sessions against ranking configs and compare feed metrics")
+    parser.add_argument("--pack", required=True, help="Local pack directory; --feature-index sidecars load fastest")
+    parser.add_argument("--ranking-config", required=True, help="Baseline ranking-config.v1.json")
+    parser.add_argument(
+        "--sweep",
+        help='JSON mapping dotted config paths to value lists or {"min", "max"} ranges, e.g. {"weights.novelty": [0.1, 0.2]}',
+    )
+    parser.add_argument("--samples", type=int, default=0, help="Draw this many random configs from --sweep instead of its grid")
+    parser.add_argument("--sessions", type=int, default=50, help="Synthetic sessions to replay")
+    parser.add_argument("--recorded", help="NDJSON of recorded {session, pageId, event} rows to fit sessions to instead")
+    parser.add_argument("--refreshes", type=int, default=10, help="Feed refreshes per session")
+    parser.add_argument("--limit", type=int, default=50, help="Cards per feed")
+    parser.add_argument("--pool-size", type=int, default=250, help="Candidates ranked per refresh")
+    parser.add_argument(
+        "--pool-mode",
+        choices=["random", "quality"],
+        default="random",
+        help="Draw a random candidate pool per refresh, or always rank the best-quality cards as the clients do",
+    )
+    parser.add_argument("--level", help="Personalization level (default: each config's defaultLevel)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Configs scored together")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--objective", choices=METRICS, default="openRate", help="Metric to sort configs by")
+    parser.add_argument("--top", type=int, default=10, help="Configs to report")
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[feed_simulator] {message}", file=sys.stderr, flush=True)
+
+
+def main() -> None:
+    args = parse_args()
+    if np is None:
+        raise SystemExit("feed_simulator needs numpy; install doompedia-pipeline[simulate]")
+    base = json.loads(Path(args.ranking_config).read_text(encoding="utf-8"))
+    spec = json.loads(Path(args.sweep).read_text(encoding="utf-8")) if args.sweep else {}
+    try:
+        configs = expand_sweep(base, spec, samples=args.samples, seed=args.seed)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+
+    start = time.monotonic()
+    cards = load_cards(Path(args.pack))
+    _log(f"Loaded {len(cards):,} cards in {time.monotonic() - start:.1f}s")
+    if args.recorded:
+        sessions = recorded_sessions(Path(args.recorded), cards)
+    else:
+        sessions = synthetic_sessions(cards, args.sessions, seed=args.seed)
+    if not sessions:
+        raise SystemExit("No sessions to replay")
+
+    simulator = FeedSimulator(cards, limit=args.limit, pool_size=args.pool_size, pool_mode=args.pool_mode)
+    metrics, throughput = simulator.run(
+        [config for _, config in configs],
+        sessions,
+        refreshes=args.refreshes,
+        level=args.level,
+        seed=args.seed,
+        batch_size=args.batch_size,
+    )
+    _log(
+        f"Simulated {len(configs):,} configs x {len(sessions):,} sessions x {args.refreshes} refreshes "
+        f"in {throughput['seconds']:.1f}s ({throughput['candidatesPerSecond']:,.0f} candidates/s)"
+    )
+    ranked = sorted(
+        ({"overrides": overrides, "metrics": result} for (overrides, _), result in zip(configs, metrics)),
+        key=lambda entry: entry["metrics"][args.objective],
+        reverse=True,
+    )
+    print(
+        json.dumps(
+            {
+                "cards": len(cards),
+                "configs": len(configs),
+                "sessions": len(sessions),
+                "objective": args.objective,
+                "baseline": metrics[0],
+                "throughput": throughput,
+                "results": ranked[: args.top],
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import urllib.parse
+from pathlib import Path
+
+from .build_pack import SHARD_SIDECARS
+from .precompress import strip_encoding_suffix
+
+# publish_pack lists the objects it is placing in `<objects-dir>/.pending-<id>.json`
+# until its manifest lands; links and skipped objects keep an old mtime.
+PENDING_PREFIX = ".pending-"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Delete content-addressed shard objects that no published manifest references"
+    )
+    parser.add_argument("--site-dir", required=True, help="Root scanned recursively for manifest.json files")
+    parser.add_argument("--objects-dir", required=True, help="Object store written by publish_pack --layout content-addressed")
+    parser.add_argument(
+        "--grace-seconds",
+        type=int,
+        default=3600,
+        help="Keep unreferenced objects younger than this (a publish may still be writing its manifest)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting")
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[gc_objects] {message}", file=sys.stderr, flush=True)
+
+
+def referenced_objects(site_dir: Path, objects_dir: Path) -> set[str]:
+    """Return object file names referenced by any manifest under `site_dir`.
+
+    Shard and sidecar (block/topic index) URLs may be relative to the manifest or absolute; an absolute URL
+    counts when its last path segment names a file in `objects_dir`.
+    """
+    objects_root = objects_dir.resolve()
+    referenced: set[str] = set()
+    for manifest_path in site_dir.rglob("manifest.json"):
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            # An unreadable manifest could reference anything; refuse to guess.
+            raise RuntimeError(f"Cannot read {manifest_path}: {exc}") from exc
+        for shard in manifest.get("shards", []):
+            urls = [str(shard.get("url", ""))]
+            for key in SHARD_SIDECARS:
+                if isinstance(shard.get(key), dict):
+                    urls.append(str(shard[key].get("url", "")))
+            for url in urls:
+                if urllib.parse.urlsplit(url).scheme:
+                    referenced.add(url.rsplit("/", 1)[-1])
+                    continue
+                target = (manifest_path.parent / url).resolve()
+                if target.parent == objects_root:
+                    referenced.add(target.name)
+    return referenced
+
+
+def pending_objects(objects_dir: Path, cutoff: float) -> tuple[set[str], set[str]]:
+    """Return `(object names, marker names)` from pending-publish markers newer than `cutoff`."""
+    names: set[str] = set()
+    markers: set[str] = set()
+    for marker in objects_dir.glob(f"{PENDING_PREFIX}*.json"):
+        try:
+            if marker.stat().st_mtime <= cutoff:
+                continue
+            names.update(json.loads(marker.read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            # The publish finished while we looked.
+            continue
+        markers.add(marker.name)
+    return names, markers
+
+
+def gc_objects(
+    site_dir: Path,
+    objects_dir: Path,
+    grace_seconds: int = 3600,
+    dry_run: bool = False,
+) -> dict[str, object]:
+    if not objects_dir.is_dir():
+        raise FileNotFoundError(f"Objects directory not found: {objects_dir}")
+    cutoff = time.time() - grace_seconds
+    # Read markers first: a publish that removes its marker has already written its manifest.
+    pending, markers = pending_objects(objects_dir, cutoff)
+    referenced = referenced_objects(site_dir, objects_dir)
+    protected = referenced | pending | markers
+
+    deleted: list[str] = []
+    kept_recent = 0
+    freed_bytes = 0
+    for path in sorted(objects_dir.iterdir()):
+        # Precompressed siblings (`<object>.br`, ...) live as long as their object.
+        if not path.is_file() or path.name in protected or strip_encoding_suffix(path.name) in protected:
+            continue
+        stat = path.stat()
+        if stat.st_mtime > cutoff:
+            kept_recent += 1
+            continue
+        deleted.append(path.name)
+        freed_bytes += stat.st_size
+        if not dry_run:
+            path.unlink()
+
+    _log(f"{'Would delete' if dry_run else 'Deleted'} {len(deleted)} objects ({freed_bytes} bytes)")
+    return {
+        "referenced": len(referenced),
+        "deleted": deleted,
+        "freedBytes": freed_bytes,
+        "keptRecent": kept_recent,
+        "dryRun": dry_run,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    result = gc_objects(
+        site_dir=Path(args.site_dir),
+        objects_dir=Path(args.objects_dir),
+        grace_seconds=args.grace_seconds,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
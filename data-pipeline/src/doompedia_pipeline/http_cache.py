@@ -0,0 +1,167 @@
+"""On-disk cache for JSON API responses.
+
+Entries are keyed by the request URL (endpoint plus sorted query), carry the
+response's `ETag`/`Last-Modified` validators and expire after a TTL. Expired
+entries are revalidated with a conditional request instead of being
+re-downloaded, and the cache is trimmed least-recently-used first once it
+grows past its size bound. In offline mode only cached entries are served,
+whatever their age, which makes reruns and tests deterministic.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .atomic_io import atomic_write_text
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode for requests that were never cached."""
+
+
+def cache_key(url: str, params: dict[str, Any]) -> str:
+    query = urllib.parse.urlencode(sorted((str(key), str(value)) for key, value in params.items()))
+    return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    payload: Any
+    stored_at: float
+    etag: str = ""
+    last_modified: str = ""
+
+    def validators(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    stored: int = 0
+    evicted: int = 0
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        directory: Path,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        offline: bool = False,
+    ) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        directory.mkdir(parents=True, exist_ok=True)
+        self._total_bytes = sum(path.stat().st_size for path in directory.glob("*.json"))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def load(self, key: str) -> CacheEntry | None:
+        path = self._path(key)
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # A torn or foreign file is just a miss; the next store replaces it.
+            return None
+        # Reads refresh the mtime, which is the LRU clock for eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return CacheEntry(
+            payload=record.get("payload"),
+            stored_at=float(record.get("storedAt", 0)),
+            etag=str(record.get("etag", "")),
+            last_modified=str(record.get("lastModified", "")),
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.offline or time.time() - entry.stored_at < self.ttl_seconds
+
+    def store(self, key: str, payload: Any, etag: str = "", last_modified: str = "") -> None:
+        text = json.dumps(
+            {"storedAt": time.time(), "etag": etag, "lastModified": last_modified, "payload": payload},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        path = self._path(key)
+        with self._lock:
+            try:
+                previous = path.stat().st_size
+            except FileNotFoundError:
+                previous = 0
+            atomic_write_text(path, text)
+            self._total_bytes += path.stat().st_size - previous
+            self.stats.stored += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=path)
+
+    def refresh(self, key: str, entry: CacheEntry) -> None:
+        """Restart an entry's TTL after a `304 Not Modified`."""
+        self.store(key, entry.payload, entry.etag, entry.last_modified)
+
+    def _evict(self, keep: Path) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        # Trim to 90% so a full cache does not evict on every store.
+        target = int(self.max_bytes * 0.9)
+        for _, path, size in sorted(entries):
+            if self._total_bytes <= target:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            self._total_bytes -= size
+            self.stats.evicted += 1
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            if outcome == "hit":
+                self.stats.hits += 1
+            elif outcome == "revalidated":
+                self.stats.revalidated += 1
+            else:
+                self.stats.misses += 1
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "hits": self.stats.hits,
+                "revalidated": self.stats.revalidated,
+                "misses": self.stats.misses,
+                "stored": self.stats.stored,
+                "evicted": self.stats.evicted,
+                "bytes": self._total_bytes,
+                "offline": self.offline,
+            }
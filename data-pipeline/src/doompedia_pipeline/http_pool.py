@@ -0,0 +1,126 @@
+"""Keep-alive HTTP connection pooling on top of `http.client`."""
+
+from __future__ import annotations
+
+import http.client
+import queue
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive connections to a single endpoint."""
+
+    def __init__(self, endpoint_url: str, max_idle: int = 8, timeout: float = 60.0) -> None:
+        parsed = urllib.parse.urlsplit(endpoint_url)
+        if parsed.scheme not in {"http", "https"} or not parsed.hostname:
+            raise ValueError(f"Invalid endpoint URL: {endpoint_url!r}")
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.base_path = parsed.path.rstrip("/")
+        self._hostname = parsed.hostname
+        self._port = parsed.port
+        self._timeout = timeout
+        self._idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue(maxsize=max_idle)
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            self.opened += 1
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self._hostname, self._port, timeout=self._timeout)
+        return http.client.HTTPConnection(self._hostname, self._port, timeout=self._timeout)
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(
+        self,
+        method: str,
+        target: str,
+        body: bytes,
+        headers: dict[str, str],
+    ) -> tuple[int, dict[str, str], bytes]:
+        connection = self._acquire()
+        try:
+            connection.request(method, target, body=body or None, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        return response.status, {key.lower(): value for key, value in response.getheaders()}, data
+
+    @contextmanager
+    def stream(self, method: str, target: str, headers: dict[str, str]) -> Iterator[http.client.HTTPResponse]:
+        """Yield the response unread, for bodies that should not be buffered in memory.
+
+        The connection returns to the pool only if the body was read to the end.
+        """
+        connection = self._acquire()
+        try:
+            connection.request(method, target, headers=headers)
+            response = connection.getresponse()
+            yield response
+        except BaseException:
+            connection.close()
+            raise
+        if response.will_close or not response.isclosed():
+            connection.close()
+        else:
+            self._release(connection)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class HostPools:
+    """One `ConnectionPool` per scheme and host, created on first use."""
+
+    def __init__(self, max_idle: int = 8, timeout: float = 60.0) -> None:
+        self._max_idle = max_idle
+        self._timeout = timeout
+        self._pools: dict[str, ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> tuple[ConnectionPool, str]:
+        """Return the pool serving `url` and the request target (path and query)."""
+        parsed = urllib.parse.urlsplit(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        with self._lock:
+            pool = self._pools.get(origin)
+            if pool is None:
+                pool = self._pools[origin] = ConnectionPool(origin, self._max_idle, self._timeout)
+        target = parsed.path or "/"
+        if parsed.query:
+            target += f"?{parsed.query}"
+        return pool, target
+
+    @property
+    def opened(self) -> dict[str, int]:
+        with self._lock:
+            return {origin: pool.opened for origin, pool in self._pools.items()}
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Collection
+
+
+def latency_summary(samples: Collection[float]) -> dict[str, float | None]:
+    """p50/p95/p99/max of latencies in seconds, reported in milliseconds."""
+    if not samples:
+        return {"p50Ms": None, "p95Ms": None, "p99Ms": None, "maxMs": None}
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 2)
+
+    return {
+        "p50Ms": percentile(0.50),
+        "p95Ms": percentile(0.95),
+        "p99Ms": percentile(0.99),
+        "maxMs": round(ordered[-1] * 1000, 2),
+    }
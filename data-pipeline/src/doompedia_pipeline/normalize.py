@@ -2,8 +2,17 @@ from __future__ import annotations
 
 import re
 import unicodedata
+from functools import lru_cache
 
 _WHITESPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z-]{2,}")
+
+KEYWORD_STOPWORDS = frozenset(
+    {
+        "about", "after", "before", "their", "there", "which", "while", "where", "these", "those",
+        "through", "using", "under", "between", "during", "known", "wikipedia", "article",
+    }
+)
 
 
 def normalize_title(value: str) -> str:
@@ -23,3 +32,20 @@ def clamp_summary(summary: str, minimum: int = 40, maximum: int = 320) -> str |
     if len(cleaned) > maximum:
         return cleaned[: maximum - 1].rstrip() + "…"
     return cleaned
+
+
+def word_tokens(text: str, min_length: int) -> list[str]:
+    """Lower-cased word tokens of at least `min_length` characters, in text order."""
+    return [token for token in _WORD_RE.findall(text.lower()) if len(token) >= min_length]
+
+
+@lru_cache(maxsize=1 << 16)
+def keyword_form(token: str) -> str:
+    """The form a token takes in card `keywords`."""
+    return normalize_title(token).replace(" ", "-")
+
+
+def summary_terms(summary: str) -> list[str]:
+    """Distinct summary keywords, in text order, as `extract_dump` draws them for card keywords."""
+    terms = (keyword_form(token) for token in word_tokens(summary, 5) if token not in KEYWORD_STOPWORDS)
+    return list(dict.fromkeys(term for term in terms if term))
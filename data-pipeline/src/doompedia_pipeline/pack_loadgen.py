@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import sys
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+
+from .latency import latency_summary
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulate concurrent clients downloading a pack's shards")
+    parser.add_argument("--manifest-url", required=True, help="e.g. http://127.0.0.1:8787/packs/en-core-1m/v1/manifest.json")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent simulated clients")
+    parser.add_argument("--shards-per-client", type=int, default=0, help="Random shards per client (0 = all)")
+    parser.add_argument(
+        "--range-chunk",
+        type=int,
+        default=0,
+        help="Download each shard in Range requests of this many bytes, like a resuming client (0 = whole file)",
+    )
+    parser.add_argument("--accept-encoding", default="", help="Accept-Encoding header to send, e.g. br,gzip")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[pack_loadgen] {message}", file=sys.stderr, flush=True)
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client for Content-Length responses."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def request(self, path: str, headers: dict[str, str] | None = None) -> tuple[int, dict[str, str], bytes]:
+        if self._writer is None or self._writer.is_closing():
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        assert self._reader is not None
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self._writer.drain()
+
+        head = (await self._reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ", 2)[1])
+        response_headers: dict[str, str] = {}
+        for line in head[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                response_headers[name.strip().lower()] = value.strip()
+        body = await self._reader.readexactly(int(response_headers.get("content-length", "0")))
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response_headers, body
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = None
+
+
+@dataclass(slots=True)
+class LoadResult:
+    shards: int = 0
+    requests: int = 0
+    bytes: int = 0
+    errors: list[str] = field(default_factory=list)
+    latencies: list[float] = field(default_factory=list)
+    shard_seconds: list[float] = field(default_factory=list)
+
+
+async def _download_shard(
+    connection: HttpConnection,
+    path: str,
+    expected_sha256: str,
+    range_chunk: int,
+    accept_encoding: str,
+    result: LoadResult,
+) -> None:
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    start = time.monotonic()
+    parts: list[bytes] = []
+    offset = 0
+    etag = ""
+    encoded = False
+    while True:
+        request_headers = dict(headers)
+        if range_chunk:
+            request_headers["Range"] = f"bytes={offset}-{offset + range_chunk - 1}"
+            if etag:
+                request_headers["If-Range"] = etag
+        request_start = time.monotonic()
+        status, response_headers, body = await connection.request(path, request_headers)
+        result.latencies.append(time.monotonic() - request_start)
+        result.requests += 1
+        result.bytes += len(body)
+        if status not in (200, 206):
+            result.errors.append(f"{path}: HTTP {status}")
+            return
+        etag = etag or response_headers.get("etag", "")
+        encoded = encoded or bool(response_headers.get("content-encoding"))
+        if status == 200:
+            parts = [body]
+            break
+        parts.append(body)
+        offset += len(body)
+        total = int(response_headers["content-range"].rsplit("/", 1)[1])
+        if offset >= total:
+            break
+    result.shard_seconds.append(time.monotonic() - start)
+    result.shards += 1
+    # Encoded representations hash differently; their digests live under shard.encodings.
+    if not encoded and hashlib.sha256(b"".join(parts)).hexdigest() != expected_sha256:
+        result.errors.append(f"{path}: sha256 mismatch")
+
+
+async def run_load(
+    manifest_url: str,
+    clients: int = 16,
+    shards_per_client: int = 0,
+    range_chunk: int = 0,
+    accept_encoding: str = "",
+    seed: int = 7,
+) -> dict[str, object]:
+    parsed = urllib.parse.urlsplit(manifest_url)
+    host, port = parsed.hostname or "127.0.0.1", parsed.port or 80
+    bootstrap = HttpConnection(host, port)
+    status, _, body = await bootstrap.request(parsed.path)
+    await bootstrap.close()
+    if status != 200:
+        raise RuntimeError(f"Manifest request failed with HTTP {status}")
+    manifest = json.loads(body)
+    shards = [
+        (urllib.parse.urlsplit(urllib.parse.urljoin(manifest_url, str(shard["url"]))).path, str(shard["sha256"]))
+        for shard in manifest.get("shards", [])
+    ]
+
+    result = LoadResult()
+    rng = random.Random(seed)
+    plans = [
+        rng.sample(shards, min(shards_per_client, len(shards))) if shards_per_client else list(shards)
+        for _ in range(max(1, clients))
+    ]
+
+    async def client(plan: list[tuple[str, str]]) -> None:
+        connection = HttpConnection(host, port)
+        try:
+            for path, sha256 in plan:
+                await _download_shard(connection, path, sha256, range_chunk, accept_encoding, result)
+        except (OSError, asyncio.IncompleteReadError) as exc:
+            result.errors.append(f"client error: {exc!r}")
+        finally:
+            await connection.close()
+
+    start = time.monotonic()
+    await asyncio.gather(*(client(plan) for plan in plans))
+    elapsed = time.monotonic() - start
+    return {
+        "clients": len(plans),
+        "shardsDownloaded": result.shards,
+        "requests": result.requests,
+        "bytes": result.bytes,
+        "elapsedSeconds": round(elapsed, 3),
+        "throughputMBps": round(result.bytes / 1024 / 1024 / elapsed, 2) if elapsed > 0 else None,
+        "requestLatency": latency_summary(result.latencies),
+        "shardLatency": latency_summary(result.shard_seconds),
+        "errors": result.errors[:50],
+        "errorCount": len(result.errors),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    summary = asyncio.run(
+        run_load(
+            args.manifest_url,
+            clients=args.clients,
+            shards_per_client=args.shards_per_client,
+            range_chunk=args.range_chunk,
+            accept_encoding=args.accept_encoding,
+            seed=args.seed,
+        )
+    )
+    _log(f"{summary['shardsDownloaded']} shards, {summary['bytes']} bytes, {summary['errorCount']} errors")
+    print(json.dumps(summary, indent=2))
+    if summary["errorCount"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Precompressed sibling files (`.gz`, `.br`, `.zst`) for static hosting.
+
+A web server with precompressed file serving (Caddy's `file_server
+precompressed`) picks the sibling that matches the request's
+`Accept-Encoding`, so nothing is compressed on the fly. Brotli and Zstandard
+are optional; install the `precompress` extra to enable them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import zlib
+from pathlib import Path
+from typing import Any
+
+from .atomic_io import DirectorySync, atomic_open
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Encoding name (as in Accept-Encoding) -> sibling suffix.
+ENCODINGS = {"gzip": ".gz", "br": ".br", "zstd": ".zst"}
+DEFAULT_LEVELS = {"gzip": 9, "br": 9, "zstd": 19}
+_CHUNK = 1024 * 1024
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def available_encodings() -> list[str]:
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def parse_encodings(value: str) -> list[str]:
+    """Parse a comma-separated encoding list, failing early on missing modules."""
+    encodings = [item.strip() for item in value.split(",") if item.strip()]
+    for encoding in encodings:
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding!r}; expected one of {', '.join(ENCODINGS)}")
+        if encoding not in available_encodings():
+            raise ValueError(
+                f"Encoding {encoding!r} needs an optional module; "
+                "install it with `pip install doompedia-pipeline[precompress]`"
+            )
+    return list(dict.fromkeys(encodings))
+
+
+def _compressor(encoding: str, level: int | None) -> Any:
+    level = DEFAULT_LEVELS[encoding] if level is None else level
+    if encoding == "gzip":
+        # wbits 31 writes a gzip header with mtime 0, so output is reproducible.
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if encoding == "br":
+        return _BrotliCompressor(level)
+    return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+def sibling_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + ENCODINGS[encoding])
+
+
+def strip_encoding_suffix(name: str) -> str:
+    for suffix in ENCODINGS.values():
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def _digest(path: Path) -> dict[str, Any]:
+    hasher = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK), b""):
+            hasher.update(chunk)
+    return {"bytes": path.stat().st_size, "sha256": hasher.hexdigest()}
+
+
+def write_precompressed(
+    path: Path,
+    encoding: str,
+    level: int | None = None,
+    sync: DirectorySync | None = None,
+    reuse_existing: bool = False,
+) -> dict[str, Any]:
+    """Stream `path` into its `encoding` sibling and return its size and sha256.
+
+    With `reuse_existing`, a sibling at least as new as `path` is kept and
+    only re-hashed.
+    """
+    target = sibling_path(path, encoding)
+    if reuse_existing and target.exists() and target.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+        return _digest(target)
+
+    compressor = _compressor(encoding, level)
+    hasher = hashlib.sha256()
+    size = 0
+    with path.open("rb") as source, atomic_open(target, "wb", sync=sync) as out:
+        for chunk in iter(lambda: source.read(_CHUNK), b""):
+            data = compressor.compress(chunk)
+            if data:
+                out.write(data)
+                hasher.update(data)
+                size += len(data)
+        data = compressor.flush()
+        out.write(data)
+        hasher.update(data)
+        size += len(data)
+    return {"bytes": size, "sha256": hasher.hexdigest()}
@@ -0,0 +1,83 @@
+"""Byte-level row prefilter for NDJSON scanners.
+
+Most rows a filtered scan reads are rejected, and `json.loads` dominates the
+cost of rejecting them. `RowPrefilter` looks for the `"lang"` and
+`"topic_key"` values directly in the raw line bytes and rejects rows that
+cannot match without decoding them. It only ever rejects: any line it cannot
+judge with certainty goes to the decoder as before. That includes lines with
+a missing key, an escaped value, or a raw topic that `infer_topic` would
+replace by inference from the title and summary.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+
+from .topics import STABLE_TOPICS, canonical_topic
+
+_BACKSLASH = ord("\\")
+
+
+def value_pattern(key: str) -> re.Pattern[bytes]:
+    """Match `"key": "value"` with any JSON whitespace; escaped values do not match."""
+    return re.compile(b'"' + re.escape(key.encode("utf-8")) + rb'"\s*:\s*"([^"\\]*)"')
+
+
+def field_value(pattern: re.Pattern[bytes], line: bytes) -> bytes | None:
+    """The raw value `pattern` finds for its key in `line`, or `None` when only decoding can tell."""
+    match = pattern.search(line)
+    # A key's opening quote is never escaped; the same text inside a string value always is.
+    while match is not None and match.start() > 0 and line[match.start() - 1] == _BACKSLASH:
+        match = pattern.search(line, match.start() + 1)
+    return match.group(1) if match is not None else None
+
+
+@lru_cache(maxsize=4096)
+def stable_topic(raw: bytes) -> str | None:
+    """The topic `infer_topic` returns for raw topic `raw` regardless of the text, if any."""
+    try:
+        canonical = canonical_topic(raw.decode("utf-8"))
+    except UnicodeDecodeError:
+        return None
+    return canonical if canonical in STABLE_TOPICS else None
+
+
+_LANG = value_pattern("lang")
+_TOPIC = value_pattern("topic_key")
+
+
+class RowPrefilter:
+    def __init__(self, language: str | None = None, topics: Iterable[str] | None = None) -> None:
+        self.language = language.encode("utf-8") if language is not None else None
+        self.topics = frozenset(topics) if topics is not None else None
+        self.rejected = 0
+        # Raw topic value -> whether rows carrying it may match.
+        self._topic_verdicts: dict[bytes, bool] = {}
+
+    def _topic_verdict(self, raw: bytes) -> bool:
+        topic = stable_topic(raw)
+        verdict = topic is None or topic in self.topics
+        if len(self._topic_verdicts) < 4096:
+            self._topic_verdicts[raw] = verdict
+        return verdict
+
+    def __call__(self, line: bytes) -> bool:
+        """Return `False` when `line` certainly fails the filter, `True` when it must be decoded."""
+        # Topics first: they reject far more rows than languages in practice.
+        if self.topics is not None:
+            value = field_value(_TOPIC, line)
+            if value is not None:
+                verdict = self._topic_verdicts.get(value)
+                if verdict is None:
+                    verdict = self._topic_verdict(value)
+                if not verdict:
+                    self.rejected += 1
+                    return False
+        if self.language is not None:
+            value = field_value(_LANG, line)
+            if value is not None and value != self.language:
+                self.rejected += 1
+                return False
+        return True
@@ -1,10 +1,28 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
+import hashlib
 import json
+import os
+import posixpath
 import shutil
+import sys
+import time
+import urllib.parse
+import uuid
 from pathlib import Path
 
+from .atomic_io import DirectorySync, atomic_copy, atomic_link, atomic_reflink, atomic_write_text
+from .build_pack import PACK_ARTIFACTS, SHARD_SIDECARS
+from .gc_objects import PENDING_PREFIX
+from .precompress import parse_encodings, sibling_path, write_precompressed
+from .s3_upload import DEFAULT_PART_SIZE, MIN_PART_SIZE, S3Client, S3Config, S3Uploader
+
+LINK_MODES = ("auto", "reflink", "copy")
+LAYOUTS = ("versioned", "content-addressed")
+TRANSFER_KINDS = ("copied", "reflinked", "hardlinked", "skipped")
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Publish a generated pack directory for static hosting")
@@ -21,7 +39,59 @@ def parse_args() -> argparse.Namespace:
         help="Optional path to write latest.json with manifest URL metadata",
     )
     parser.add_argument("--clean", action="store_true", help="Delete output directory before publishing")
-    return parser.parse_args()
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="auto",
+        help=(
+            "auto: reflink, else hardlink, else copy; reflink: reflink, else copy "
+            "(never share inodes with the pack dir); copy: always copy"
+        ),
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Files published (and S3 parts uploaded) in parallel")
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default="versioned",
+        help="versioned: shards under <output-dir>/shards; content-addressed: shards once under --objects-dir",
+    )
+    parser.add_argument(
+        "--objects-dir",
+        default="",
+        help="Shared object store for --layout content-addressed, e.g. data/site/objects",
+    )
+    parser.add_argument(
+        "--precompress",
+        default="",
+        help="Comma-separated encodings (gzip,br,zstd) written as sibling files of uncompressed shards and the manifest",
+    )
+    parser.add_argument(
+        "--s3-bucket",
+        default="",
+        help="Also upload the published files to this S3-compatible bucket (credentials from AWS_* env vars)",
+    )
+    parser.add_argument("--s3-endpoint-url", default="", help="S3 endpoint, e.g. an R2 or MinIO URL")
+    parser.add_argument("--s3-region", default="", help="Signing region (defaults to AWS_REGION or auto)")
+    parser.add_argument("--s3-prefix", default="", help="Key prefix for the pack files, e.g. packs/en-core-1m/v1")
+    parser.add_argument(
+        "--s3-latest-key",
+        default="",
+        help="Key for latest.json (defaults to latest.json next to --s3-prefix)",
+    )
+    parser.add_argument(
+        "--s3-part-size-mb",
+        type=int,
+        default=DEFAULT_PART_SIZE // (1024 * 1024),
+        help="Multipart part size; files up to this size use a single PUT",
+    )
+    args = parser.parse_args()
+    if args.s3_part_size_mb * 1024 * 1024 < MIN_PART_SIZE:
+        parser.error(f"--s3-part-size-mb must be at least {MIN_PART_SIZE // (1024 * 1024)}")
+    return args
+
+
+def _log(message: str) -> None:
+    print(f"[publish_pack] {message}", file=sys.stderr, flush=True)
 
 
 def _resolve_pack_path(pack_dir: Path, relative_path: str) -> Path:
@@ -34,53 +104,300 @@ def _resolve_pack_path(pack_dir: Path, relative_path: str) -> Path:
     return direct
 
 
+def _sha256_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _is_unchanged(source: Path, destination: Path, sha256: str | None, trust_name: bool = False) -> bool:
+    if not destination.exists():
+        return False
+    if destination.samefile(source):
+        return True
+    size = source.stat().st_size
+    if destination.stat().st_size != size:
+        return False
+    if trust_name:
+        return True
+    return _sha256_file(destination) == (sha256 or _sha256_file(source))
+
+
+def object_name(sha256: str, source: Path) -> str:
+    """Content-addressed file name: the digest plus the shard's suffixes.
+
+    Clients pick a decoder by file extension, so `.ndjson.gz` is kept.
+    """
+    return f"{sha256}{''.join(source.suffixes)}"
+
+
+def publish_file(
+    source: Path,
+    destination: Path,
+    sha256: str | None = None,
+    link_mode: str = "auto",
+    sync: DirectorySync | None = None,
+    content_addressed: bool = False,
+) -> str:
+    """Place `source` at `destination` as cheaply as possible.
+
+    Returns one of `TRANSFER_KINDS`. A destination that already has the
+    expected size and sha256 (from the manifest, else the source's) is left
+    untouched. Content-addressed destinations are named by their digest and
+    only ever written atomically, so a matching size is enough. Otherwise the
+    file is reflinked or hardlinked when both paths share a filesystem, and
+    copied as a last resort.
+    """
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode {link_mode!r}; expected one of {', '.join(LINK_MODES)}")
+    if _is_unchanged(source, destination, sha256, trust_name=content_addressed):
+        return "skipped"
+    if link_mode != "copy":
+        try:
+            atomic_reflink(source, destination, sync=sync)
+            return "reflinked"
+        except OSError:
+            pass
+    if link_mode == "auto":
+        try:
+            atomic_link(source, destination, sync=sync)
+            return "hardlinked"
+        except OSError:
+            pass
+    atomic_copy(source, destination, sync=sync)
+    return "copied"
+
+
+def upload_published(
+    uploader: S3Uploader,
+    output_dir: Path,
+    files: list[tuple[Path, str | None]],
+    prefix: str = "",
+    latest_pointer: Path | None = None,
+    latest_key: str = "",
+    manifest_variants: list[Path] | None = None,
+    content_encodings: dict[Path, str] | None = None,
+) -> dict[str, dict[str, int]]:
+    """Upload published `(path, sha256)` files, then the manifest, then `latest.json`.
+
+    Shards (and their precompressed siblings) finish before the manifest that
+    references them is uploaded, and the manifest, with its own
+    `manifest_variants`, before the pointer that makes it live. Siblings listed
+    in `content_encodings` are sent with a matching `Content-Encoding`.
+    """
+    content_encodings = content_encodings or {}
+    prefix = prefix.strip("/")
+
+    def key_for(path: Path) -> str:
+        # Objects outside the version dir (content-addressed layout) resolve
+        # against the prefix the same way their relative manifest URLs do.
+        key = posixpath.normpath(posixpath.join(prefix, Path(os.path.relpath(path, output_dir)).as_posix()))
+        if key.startswith("../"):
+            raise ValueError(f"{path} is outside the bucket layout implied by prefix {prefix!r}")
+        return key
+
+    report = uploader.upload_many(
+        [(path, key_for(path), sha256, content_encodings.get(path, "")) for path, sha256 in files]
+    )
+    stages = [(path, key_for(path), "") for path in manifest_variants or []]
+    stages.append((output_dir / "manifest.json", key_for(output_dir / "manifest.json"), ""))
+    if latest_pointer is not None:
+        latest_key = latest_key or posixpath.join(posixpath.dirname(prefix), latest_pointer.name)
+        stages.append((latest_pointer, latest_key.lstrip("/"), "no-cache"))
+    for path, key, cache_control in stages:
+        kind, size = uploader.upload_file(
+            path, key, cache_control=cache_control, content_encoding=content_encodings.get(path, "")
+        )
+        report[kind]["files"] += 1
+        report[kind]["bytes"] += size
+    return report
+
+
 def publish_pack(
     pack_dir: Path,
     output_dir: Path,
     base_url: str = "",
     latest_pointer: Path | None = None,
     clean: bool = False,
+    link_mode: str = "auto",
+    workers: int = 4,
+    layout: str = "versioned",
+    objects_dir: Path | None = None,
+    precompress: str = "",
+    s3: S3Config | None = None,
+    s3_prefix: str = "",
+    s3_latest_key: str = "",
+    s3_part_size: int = DEFAULT_PART_SIZE,
 ) -> dict[str, object]:
     manifest_path = pack_dir / "manifest.json"
     if not manifest_path.exists():
         raise FileNotFoundError(f"Manifest not found: {manifest_path}")
 
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}; expected one of {', '.join(LAYOUTS)}")
+    content_addressed = layout == "content-addressed"
+    if content_addressed and objects_dir is None:
+        raise ValueError("--objects-dir is required for the content-addressed layout")
+    encodings = parse_encodings(precompress)
+
     if clean and output_dir.exists():
         shutil.rmtree(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
-    shards_out = output_dir / "shards"
+    shards_out = objects_dir if content_addressed else output_dir / "shards"
     shards_out.mkdir(parents=True, exist_ok=True)
 
     manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
     base_url_norm = base_url.rstrip("/")
+    sync = DirectorySync()
+    # (source, destination, expected sha256) for every file the manifest needs.
+    transfers: list[tuple[Path, Path, str | None]] = []
+    shard_destinations: list[tuple[dict[str, object], Path]] = []
 
     for shard in manifest.get("shards", []):
         source = _resolve_pack_path(pack_dir, shard["url"])
         if not source.exists():
             raise FileNotFoundError(f"Shard not found: {source}")
-        file_name = source.name
-        destination = shards_out / file_name
-        shutil.copy2(source, destination)
-        shard["url"] = f"{base_url_norm}/shards/{file_name}" if base_url_norm else f"shards/{file_name}"
+        if content_addressed:
+            if not shard.get("sha256"):
+                raise ValueError(f"Shard {shard.get('id')} has no sha256; cannot publish content-addressed")
+            destination = shards_out / object_name(str(shard["sha256"]), source)
+            relative = Path(os.path.relpath(destination, output_dir)).as_posix()
+            shard["url"] = urllib.parse.urljoin(f"{base_url_norm}/", relative) if base_url_norm else relative
+        else:
+            destination = shards_out / source.name
+            shard["url"] = f"{base_url_norm}/shards/{source.name}" if base_url_norm else f"shards/{source.name}"
+        transfers.append((source, destination, shard.get("sha256")))
+        shard_destinations.append((shard, destination))
+
+        for key, suffix in SHARD_SIDECARS.items():
+            sidecar = shard.get(key)
+            if not isinstance(sidecar, dict) or not sidecar.get("url"):
+                continue
+            sidecar_source = _resolve_pack_path(pack_dir, str(sidecar["url"]))
+            if not sidecar_source.exists():
+                raise FileNotFoundError(f"Shard sidecar {key} not found: {sidecar_source}")
+            sidecar_name = f"{sidecar['sha256']}{suffix}" if content_addressed else sidecar_source.name
+            transfers.append((sidecar_source, shards_out / sidecar_name, str(sidecar["sha256"])))
+            # Sidecars sit next to their shard, so their URLs only swap the file name.
+            shard_dir_url, _, _ = str(shard["url"]).rpartition("/")
+            sidecar["url"] = f"{shard_dir_url}/{sidecar_name}" if shard_dir_url else sidecar_name
 
     delta = manifest.get("delta")
     if isinstance(delta, dict) and "url" in delta:
         delta_source = _resolve_pack_path(pack_dir, str(delta["url"]))
         if delta_source.exists():
             delta_name = delta_source.name
-            shutil.copy2(delta_source, output_dir / delta_name)
+            transfers.append((delta_source, output_dir / delta_name, delta.get("sha256")))
             delta["url"] = f"{base_url_norm}/{delta_name}" if base_url_norm else delta_name
 
-    published_manifest_path = output_dir / "manifest.json"
-    published_manifest_path.write_text(
-        json.dumps(manifest, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    for key in PACK_ARTIFACTS:
+        artifact = manifest.get(key)
+        if not isinstance(artifact, dict) or not artifact.get("url"):
+            continue
+        artifact_source = _resolve_pack_path(pack_dir, str(artifact["url"]))
+        if not artifact_source.exists():
+            raise FileNotFoundError(f"Pack artifact {key} not found: {artifact_source}")
+        transfers.append((artifact_source, output_dir / artifact_source.name, str(artifact["sha256"])))
+        artifact["url"] = f"{base_url_norm}/{artifact_source.name}" if base_url_norm else artifact_source.name
 
     checksums = pack_dir / "checksums.txt"
     if checksums.exists():
-        shutil.copy2(checksums, output_dir / "checksums.txt")
+        transfers.append((checksums, output_dir / "checksums.txt", None))
+
+    # Identical shards map to one object; publish it once.
+    transfers = list({destination: (source, destination, sha256) for source, destination, sha256 in transfers}.values())
+    pending = None
+    if content_addressed:
+        # Tell gc_objects which objects this publish needs until its manifest lands.
+        pending = shards_out / f"{PENDING_PREFIX}{uuid.uuid4().hex}.json"
+        objects = sorted({destination.name for _, destination, _ in transfers if destination.parent == shards_out})
+        atomic_write_text(pending, json.dumps(objects))
+
+    report = {kind: {"files": 0, "bytes": 0} for kind in TRANSFER_KINDS}
+    kinds: dict[Path, str] = {}
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(
+                publish_file,
+                source,
+                destination,
+                sha256,
+                link_mode,
+                sync,
+                content_addressed and destination.parent == shards_out,
+            ): (source, destination)
+            for source, destination, sha256 in transfers
+        }
+        for future in concurrent.futures.as_completed(futures):
+            kind = future.result()
+            source, destination = futures[future]
+            kinds[destination] = kind
+            report[kind]["files"] += 1
+            report[kind]["bytes"] += source.stat().st_size
+    _log(
+        ", ".join(f"{kind} {report[kind]['files']} files / {report[kind]['bytes']} bytes" for kind in TRANSFER_KINDS)
+        + f" (elapsed: {time.monotonic() - start:.1f}s)"
+    )
+
+    precompressed = {encoding: {"files": 0, "bytes": 0} for encoding in encodings}
+    # (path, sha256) of every precompressed shard sibling, for the S3 upload.
+    variant_files: list[tuple[Path, str | None]] = []
+    content_encodings: dict[Path, str] = {}
+    if encodings:
+        start = time.monotonic()
+        # Already-compressed shards gain nothing from a second encoding.
+        plain = list(
+            dict.fromkeys(destination for _, destination in shard_destinations if destination.suffix != ".gz")
+        )
+        variants: dict[tuple[Path, str], dict[str, object]] = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(
+                    write_precompressed,
+                    destination,
+                    encoding,
+                    sync=sync,
+                    reuse_existing=kinds.get(destination) == "skipped",
+                ): (destination, encoding)
+                for destination in plain
+                for encoding in encodings
+            }
+            for future in concurrent.futures.as_completed(futures):
+                variants[futures[future]] = future.result()
+        for shard, destination in shard_destinations:
+            if destination.suffix != ".gz":
+                shard["encodings"] = {encoding: variants[(destination, encoding)] for encoding in encodings}
+        for (destination, encoding), variant in variants.items():
+            variant_files.append((sibling_path(destination, encoding), str(variant["sha256"])))
+            content_encodings[sibling_path(destination, encoding)] = encoding
+            precompressed[encoding]["files"] += 1
+            precompressed[encoding]["bytes"] += int(variant["bytes"])
+        _log(f"Precompressed {len(plain)} shards as {', '.join(encodings)} (elapsed: {time.monotonic() - start:.1f}s)")
 
+    if pending is not None:
+        # Restart the grace period for long publishes; objects themselves may be
+        # hardlinks of the pack's shards, so their mtimes are left alone.
+        os.utime(pending)
+
+    # Shards must be durable before the manifest that references them appears.
+    sync.flush()
+    published_manifest_path = output_dir / "manifest.json"
+    atomic_write_text(
+        published_manifest_path,
+        json.dumps(manifest, ensure_ascii=False, indent=2),
+        sync=sync,
+    )
+    for encoding in encodings:
+        write_precompressed(published_manifest_path, encoding, sync=sync)
+        content_encodings[sibling_path(published_manifest_path, encoding)] = encoding
+    sync.flush()
+    if pending is not None:
+        pending.unlink()
+
+    # latest.json is swapped last so clients never follow it to a partial version.
     if latest_pointer is not None:
         latest_pointer.parent.mkdir(parents=True, exist_ok=True)
         manifest_url = f"{base_url_norm}/manifest.json" if base_url_norm else "manifest.json"
@@ -89,9 +406,31 @@ def publish_pack(
             "version": manifest.get("version"),
             "manifestUrl": manifest_url,
         }
-        latest_pointer.write_text(
+        atomic_write_text(
+            latest_pointer,
             json.dumps(latest_payload, ensure_ascii=False, indent=2),
-            encoding="utf-8",
+        )
+
+    upload_report = None
+    if s3 is not None:
+        start = time.monotonic()
+        uploader = S3Uploader(S3Client(s3, pool_size=max(1, workers) * 2), workers=workers, part_size=s3_part_size)
+        try:
+            upload_report = upload_published(
+                uploader,
+                output_dir,
+                [(destination, sha256) for _, destination, sha256 in transfers] + variant_files,
+                prefix=s3_prefix,
+                latest_pointer=latest_pointer,
+                latest_key=s3_latest_key,
+                manifest_variants=[sibling_path(published_manifest_path, encoding) for encoding in encodings],
+                content_encodings=content_encodings,
+            )
+        finally:
+            uploader.close()
+        _log(
+            f"S3 uploaded {upload_report['uploaded']['files']} files / {upload_report['uploaded']['bytes']} bytes, "
+            f"skipped {upload_report['skipped']['files']} (elapsed: {time.monotonic() - start:.1f}s)"
         )
 
     return {
@@ -100,6 +439,10 @@ def publish_pack(
         "shards": len(manifest.get("shards", [])),
         "outputDir": str(output_dir),
         "baseUrl": base_url_norm,
+        "layout": layout,
+        "transfer": report,
+        "precompressed": precompressed if encodings else None,
+        "upload": upload_report,
     }
 
 
@@ -112,6 +455,19 @@ def main() -> None:
         base_url=args.base_url,
         latest_pointer=latest_pointer,
         clean=args.clean,
+        link_mode=args.link_mode,
+        workers=args.workers,
+        layout=args.layout,
+        objects_dir=Path(args.objects_dir) if args.objects_dir else None,
+        precompress=args.precompress,
+        s3=(
+            S3Config.from_env(args.s3_bucket, endpoint_url=args.s3_endpoint_url, region=args.s3_region)
+            if args.s3_bucket
+            else None
+        ),
+        s3_prefix=args.s3_prefix,
+        s3_latest_key=args.s3_latest_key,
+        s3_part_size=args.s3_part_size_mb * 1024 * 1024,
     )
     print(json.dumps(result, indent=2))
 
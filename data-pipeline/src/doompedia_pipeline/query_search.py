@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from .latency import latency_summary
+from .search_index import SearchConfig, SearchIndex
+from .summary_index import SummaryIndex
+from .typo_index import TypoIndex
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run searches against a pack's search or summary index and report latency")
+    parser.add_argument("--pack", required=True, help="Pack directory whose manifest.json has a searchIndex or summaryIndex")
+    parser.add_argument("--query", action="append", default=[], help="Query to run and print results for (repeatable)")
+    parser.add_argument("--queries-file", help="File with one query per line; only latency is reported")
+    parser.add_argument("--repeat", type=int, default=1, help="Run the query set this many times")
+    parser.add_argument("--ranking-config", help="ranking-config.v1.json whose `search` block sets the limits")
+    parser.add_argument(
+        "--scan-typos",
+        action="store_true",
+        help="Walk the first-character/length window for typos even when the pack has a typoIndex",
+    )
+    parser.add_argument(
+        "--summaries",
+        action="store_true",
+        help="Run conjunctive full-text queries against the pack's summaryIndex instead of title search",
+    )
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[query_search] {message}", file=sys.stderr, flush=True)
+
+
+def run_queries(
+    index: SearchIndex,
+    queries: list[str],
+    config: SearchConfig,
+    repeat: int = 1,
+    typo_index: TypoIndex | None = None,
+) -> tuple[list[dict[str, object]], list[float]]:
+    """Return the results of the first pass and every query's latency in seconds."""
+    results: list[dict[str, object]] = []
+    latencies: list[float] = []
+    for round_number in range(max(1, repeat)):
+        for query in queries:
+            start = time.perf_counter()
+            hits = index.search(query, config, typo_index)
+            latencies.append(time.perf_counter() - start)
+            if round_number == 0:
+                results.append(
+                    {
+                        "query": query,
+                        "hits": [{"pageId": hit.page_id, "text": hit.text, "match": hit.match} for hit in hits],
+                    }
+                )
+    return results, latencies
+
+
+def run_summary_queries(
+    index: SummaryIndex,
+    queries: list[str],
+    limit: int,
+    repeat: int = 1,
+) -> tuple[list[dict[str, object]], list[float]]:
+    """Like `run_queries`, for the top-`limit` summary matches of each query."""
+    results: list[dict[str, object]] = []
+    latencies: list[float] = []
+    for round_number in range(max(1, repeat)):
+        for query in queries:
+            start = time.perf_counter()
+            hits = index.search(query, limit)
+            latencies.append(time.perf_counter() - start)
+            if round_number == 0:
+                results.append(
+                    {"query": query, "hits": [{"pageId": hit.page_id, "quality": round(hit.quality, 4)} for hit in hits]}
+                )
+    return results, latencies
+
+
+def main() -> None:
+    args = parse_args()
+    pack_dir = Path(args.pack)
+    manifest = json.loads((pack_dir / "manifest.json").read_text(encoding="utf-8"))
+    queries = list(args.query)
+    if args.queries_file:
+        queries += [
+            line.strip() for line in Path(args.queries_file).read_text(encoding="utf-8").splitlines() if line.strip()
+        ]
+    if not queries:
+        raise SystemExit("Pass --query or --queries-file")
+    config = SearchConfig.from_ranking_config(Path(args.ranking_config)) if args.ranking_config else SearchConfig()
+
+    if args.summaries:
+        summary_entry = manifest.get("summaryIndex")
+        if not isinstance(summary_entry, dict):
+            raise SystemExit(f"{pack_dir} has no summaryIndex; build one with doompedia_pipeline.summary_index")
+        with SummaryIndex(pack_dir / str(summary_entry["url"]).split("/")[-1]) as summary_index:
+            results, latencies = run_summary_queries(summary_index, queries, config.max_results, args.repeat)
+        _log(f"{len(latencies):,} queries against {summary_entry['documents']:,} summaries")
+        report: dict[str, object] = {"queries": len(latencies), "latency": latency_summary(latencies)}
+        if not args.queries_file:
+            report["results"] = results
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+
+    entry = manifest.get("searchIndex")
+    if not isinstance(entry, dict):
+        raise SystemExit(f"{pack_dir} has no searchIndex; build one with doompedia_pipeline.search_index")
+
+    typo_entry = manifest.get("typoIndex")
+    typo_index = None
+    if isinstance(typo_entry, dict) and not args.scan_typos:
+        if typo_entry.get("searchIndexSha256") != entry.get("sha256"):
+            raise SystemExit("typoIndex was built for a different searchIndex; rebuild it with doompedia_pipeline.typo_index")
+        typo_index = TypoIndex(pack_dir / str(typo_entry["url"]).split("/")[-1])
+
+    try:
+        with SearchIndex(pack_dir / str(entry["url"]).split("/")[-1]) as index:
+            results, latencies = run_queries(index, queries, config, args.repeat, typo_index)
+    finally:
+        if typo_index is not None:
+            typo_index.close()
+    typo_mode = "typo index" if typo_index is not None else "window scan"
+    _log(f"{len(latencies):,} queries against {entry['titles']:,} titles ({typo_mode})")
+    summary: dict[str, object] = {
+        "queries": len(latencies),
+        "typoLookup": typo_mode,
+        "latency": latency_summary(latencies),
+    }
+    if not args.queries_file:
+        summary["results"] = results
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Adaptive request scheduling for polite bulk downloads.
+
+`AdaptiveRateLimiter` combines a token bucket (steady rate plus burst
+capacity) with an AIMD concurrency window: every throttling response
+(429/503) halves both the rate and the window and pauses all requests for
+`Retry-After`, while a run of successes grows them back additively.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+from .latency import latency_summary
+
+THROTTLE_STATUS = {429, 503}
+# Latency percentiles cover this many most recent requests.
+LATENCY_WINDOW = 10_000
+
+
+@dataclass(slots=True)
+class LimiterStats:
+    requests: int = 0
+    throttled: int = 0
+    errors: int = 0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        rate: float = 2.5,
+        burst: int = 5,
+        max_concurrency: int = 8,
+        min_rate: float = 0.2,
+        max_rate: float | None = None,
+        rate_step: float = 0.1,
+    ) -> None:
+        if rate <= 0 or burst < 1 or max_concurrency < 1:
+            raise ValueError("rate, burst and max_concurrency must be positive")
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.rate_step = rate_step
+        self.max_concurrency = max_concurrency
+        self.concurrency = max(1, max_concurrency // 2)
+        self.stats = LimiterStats()
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def acquire(self) -> float:
+        """Block until a request may start; returns its start time for `release`."""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._in_flight >= self.concurrency:
+                    wait = None
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    self._in_flight += 1
+                    return now
+                else:
+                    wait = (1 - self._tokens) / self.rate
+                self._condition.wait(wait)
+
+    def release(self, started: float, status: int, retry_after: float | None = None) -> None:
+        """Record the outcome of a request started with `acquire`.
+
+        `status` is the HTTP status, or 0 when the request failed without one.
+        """
+        now = time.monotonic()
+        with self._condition:
+            self._in_flight -= 1
+            self.stats.requests += 1
+            self.stats.latencies.append(now - started)
+            if status in THROTTLE_STATUS:
+                self.stats.throttled += 1
+                self._successes = 0
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.concurrency = max(1, self.concurrency // 2)
+                self._tokens = min(self._tokens, 0.0)
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+            elif 200 <= status < 400:
+                self._successes += 1
+                self.rate = min(self.max_rate, self.rate + self.rate_step)
+                if self._successes >= self.concurrency * 4 and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self._successes = 0
+            else:
+                self.stats.errors += 1
+            self._condition.notify_all()
+
+    def snapshot(self) -> dict[str, object]:
+        with self._condition:
+            return {
+                "requests": self.stats.requests,
+                "throttled": self.stats.throttled,
+                "errors": self.stats.errors,
+                "rate": round(self.rate, 3),
+                "concurrency": self.concurrency,
+                "latency": latency_summary(self.stats.latencies),
+            }
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds from a `Retry-After` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,315 @@
+"""Upload published pack files to S3-compatible storage (AWS S3, R2, MinIO).
+
+Only the standard library is used: requests are signed with AWS Signature
+Version 4 and sent over a small pool of keep-alive `http.client` connections.
+Objects carry their sha256 as `x-amz-meta-sha256`, so a re-upload of an
+unchanged file costs one HEAD request.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import datetime as dt
+import hashlib
+import hmac
+import http.client
+import os
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from .http_pool import ConnectionPool
+
+DEFAULT_PART_SIZE = 32 * 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024
+SHA256_METADATA = "x-amz-meta-sha256"
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+_RETRYABLE_STATUS = {500, 502, 503, 504}
+_CONTENT_TYPES = {
+    ".json": "application/json",
+    ".ndjson": "application/x-ndjson",
+    ".gz": "application/gzip",
+    ".txt": "text/plain; charset=utf-8",
+}
+
+
+@dataclass(slots=True)
+class S3Config:
+    bucket: str
+    endpoint_url: str = ""
+    region: str = "auto"
+    access_key: str = ""
+    secret_key: str = ""
+    session_token: str = ""
+
+    @classmethod
+    def from_env(cls, bucket: str, endpoint_url: str = "", region: str = "") -> "S3Config":
+        """Read credentials from the standard `AWS_*` environment variables."""
+        region = region or os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION") or "auto"
+        access_key = os.environ.get("AWS_ACCESS_KEY_ID", "")
+        secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY", "")
+        if not access_key or not secret_key:
+            raise ValueError("AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY must be set for S3 uploads")
+        return cls(
+            bucket=bucket,
+            endpoint_url=endpoint_url or f"https://s3.{region}.amazonaws.com",
+            region=region,
+            access_key=access_key,
+            secret_key=secret_key,
+            session_token=os.environ.get("AWS_SESSION_TOKEN", ""),
+        )
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return urllib.parse.quote(value, safe=safe)
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def sign_request(
+    config: S3Config,
+    method: str,
+    host: str,
+    path: str,
+    query: dict[str, str],
+    headers: dict[str, str],
+    payload_sha256: str,
+    now: dt.datetime | None = None,
+) -> dict[str, str]:
+    """Return `headers` plus the SigV4 `Authorization`, `x-amz-date` and content hash.
+
+    `path` must already be URI-encoded (as it will be sent on the wire).
+    """
+    now = now or dt.datetime.now(dt.timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    date_stamp = now.strftime("%Y%m%d")
+
+    signed = {key.lower(): " ".join(str(value).split()) for key, value in headers.items()}
+    signed["host"] = host
+    signed["x-amz-date"] = amz_date
+    signed["x-amz-content-sha256"] = payload_sha256
+    if config.session_token:
+        signed["x-amz-security-token"] = config.session_token
+
+    signed_names = ";".join(sorted(signed))
+    canonical_headers = "".join(f"{name}:{signed[name]}\n" for name in sorted(signed))
+    canonical_query = "&".join(f"{_quote(key)}={_quote(value)}" for key, value in sorted(query.items()))
+    canonical_request = "\n".join(
+        [method, path, canonical_query, canonical_headers, signed_names, payload_sha256]
+    )
+    scope = f"{date_stamp}/{config.region}/s3/aws4_request"
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ]
+    )
+    key = _hmac(f"AWS4{config.secret_key}".encode("utf-8"), date_stamp)
+    for part in (config.region, "s3", "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    signed["authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={config.access_key}/{scope}, "
+        f"SignedHeaders={signed_names}, Signature={signature}"
+    )
+    return signed
+
+
+class S3Client:
+    """The handful of S3 object operations pack publishing needs (path-style URLs)."""
+
+    def __init__(self, config: S3Config, pool_size: int = 8, retries: int = 4) -> None:
+        self.config = config
+        self.pool = ConnectionPool(config.endpoint_url, max_idle=pool_size)
+        self.retries = retries
+
+    def _send(
+        self,
+        method: str,
+        key: str,
+        query: dict[str, str] | None = None,
+        body: bytes = b"",
+        headers: dict[str, str] | None = None,
+        expect: Iterable[int] = (200,),
+    ) -> tuple[int, dict[str, str], bytes]:
+        query = query or {}
+        path = f"{self.pool.base_path}/{_quote(self.config.bucket)}/{_quote(key, safe='-_.~/')}"
+        target = path
+        if query:
+            target += "?" + "&".join(f"{_quote(name)}={_quote(value)}" for name, value in sorted(query.items()))
+        payload_sha256 = hashlib.sha256(body).hexdigest() if body else EMPTY_SHA256
+
+        for attempt in range(self.retries):
+            signed = sign_request(
+                self.config, method, self.pool.host, path, query, headers or {}, payload_sha256
+            )
+            try:
+                status, response_headers, data = self.pool.request(method, target, body, signed)
+            except (OSError, http.client.HTTPException):
+                if attempt == self.retries - 1:
+                    raise
+            else:
+                if status in expect:
+                    return status, response_headers, data
+                if status not in _RETRYABLE_STATUS or attempt == self.retries - 1:
+                    raise RuntimeError(
+                        f"S3 {method} {key} failed with HTTP {status}: {data[:300].decode('utf-8', 'replace')}"
+                    )
+            time.sleep(0.5 * 2**attempt)
+        raise RuntimeError("unreachable")
+
+    def head_object(self, key: str) -> dict[str, str] | None:
+        status, headers, _ = self._send("HEAD", key, expect=(200, 404))
+        return headers if status == 200 else None
+
+    def put_object(self, key: str, body: bytes, headers: dict[str, str]) -> None:
+        self._send("PUT", key, body=body, headers=headers)
+
+    def create_multipart_upload(self, key: str, headers: dict[str, str]) -> str:
+        _, _, data = self._send("POST", key, query={"uploads": ""}, headers=headers)
+        upload_id = _xml_text(data, "UploadId")
+        if not upload_id:
+            raise RuntimeError(f"S3 did not return an UploadId for {key}")
+        return upload_id
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, body: bytes) -> str:
+        _, headers, _ = self._send(
+            "PUT",
+            key,
+            query={"partNumber": str(part_number), "uploadId": upload_id},
+            body=body,
+        )
+        return headers.get("etag", "")
+
+    def complete_multipart_upload(self, key: str, upload_id: str, etags: list[str]) -> None:
+        parts = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+            for number, etag in enumerate(etags, start=1)
+        )
+        body = f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode("utf-8")
+        _, _, data = self._send("POST", key, query={"uploadId": upload_id}, body=body)
+        # S3 can report a failed completion inside a 200 response.
+        if b"<Error>" in data:
+            raise RuntimeError(f"S3 multipart completion failed for {key}: {data[:300].decode('utf-8', 'replace')}")
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        self._send("DELETE", key, query={"uploadId": upload_id}, expect=(200, 204, 404))
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def _xml_text(data: bytes, tag: str) -> str:
+    root = ET.fromstring(data)
+    for element in root.iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text or ""
+    return ""
+
+
+def sha256_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _read_range(path: Path, offset: int, size: int) -> bytes:
+    with path.open("rb") as handle:
+        handle.seek(offset)
+        return handle.read(size)
+
+
+class S3Uploader:
+    """Upload files in parallel, splitting large ones into concurrent parts."""
+
+    def __init__(
+        self,
+        client: S3Client,
+        workers: int = 4,
+        part_size: int = DEFAULT_PART_SIZE,
+    ) -> None:
+        self.client = client
+        self.workers = max(1, workers)
+        self.part_size = part_size
+        # Separate pools so file tasks can block on their parts without deadlocking.
+        self._parts = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+
+    def upload_file(
+        self,
+        path: Path,
+        key: str,
+        sha256: str | None = None,
+        cache_control: str = "",
+        content_encoding: str = "",
+    ) -> tuple[str, int]:
+        """Upload `path` to `key` unless the stored object has the same sha256.
+
+        A `content_encoding` marks `path` as an encoded sibling (`x.ndjson.br`):
+        it is served with the type of the file it encodes plus that encoding.
+        Returns `("skipped" | "uploaded", bytes)`.
+        """
+        sha256 = sha256 or sha256_file(path)
+        size = path.stat().st_size
+        existing = self.client.head_object(key)
+        if existing is not None and existing.get(SHA256_METADATA) == sha256:
+            return "skipped", size
+
+        suffix = Path(path.stem).suffix if content_encoding else path.suffix
+        headers = {
+            "content-type": _CONTENT_TYPES.get(suffix, "application/octet-stream"),
+            SHA256_METADATA: sha256,
+        }
+        if content_encoding:
+            headers["content-encoding"] = content_encoding
+        if cache_control:
+            headers["cache-control"] = cache_control
+        if size <= self.part_size:
+            self.client.put_object(key, path.read_bytes(), headers)
+            return "uploaded", size
+
+        upload_id = self.client.create_multipart_upload(key, headers)
+        try:
+            futures = [
+                self._parts.submit(
+                    lambda number, offset: self.client.upload_part(
+                        key, upload_id, number, _read_range(path, offset, self.part_size)
+                    ),
+                    number,
+                    offset,
+                )
+                for number, offset in enumerate(range(0, size, self.part_size), start=1)
+            ]
+            etags = [future.result() for future in futures]
+            self.client.complete_multipart_upload(key, upload_id, etags)
+        except BaseException:
+            self.client.abort_multipart_upload(key, upload_id)
+            raise
+        return "uploaded", size
+
+    def upload_many(self, items: list[tuple[Path, str, str | None, str]]) -> dict[str, dict[str, int]]:
+        """Upload `(path, key, sha256, content_encoding)` items concurrently and summarise the transfer."""
+        report = {kind: {"files": 0, "bytes": 0} for kind in ("uploaded", "skipped")}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(self.upload_file, path, key, sha256, content_encoding=content_encoding)
+                for path, key, sha256, content_encoding in items
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                kind, size = future.result()
+                report[kind]["files"] += 1
+                report[kind]["bytes"] += size
+        return report
+
+    def close(self) -> None:
+        self._parts.shutdown(wait=True)
+        self.client.close()
@@ -0,0 +1,454 @@
+"""Precomputed title-search index for a pack, and a query engine over it.
+
+Implements `shared-spec/search-spec.md` the way the app clients do in SQLite
+(exact title, title prefix, alias exact/prefix, then edit-distance-1 typo
+candidates), but over one binary file that is memory-mapped rather than
+imported. All integers are little-endian:
+
+    header    magic "DPSI", version, title/alias/bucket counts, section offsets
+    titles    (page_id u64, string offset u32, string length u32, quality f32),
+              sorted by normalized title bytes, then page id
+    aliases   (page_id u64, string offset u32, string length u32), sorted the same way
+    buckets   (first code point << 32 | title length u64, start u32, count u32),
+              sorted by key; the typo prefilter's first-character/length buckets
+    entries   u32 title indexes per bucket, best quality first
+    strings   UTF-8 normalized titles and aliases
+
+Byte order of UTF-8 matches SQLite's `ORDER BY normalized_title` and code point
+order, so prefix lookups are binary searches over the title and alias tables.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import gzip
+import hashlib
+import heapq
+import json
+import mmap
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from .atomic_io import DirectorySync, atomic_write_bytes, atomic_write_text
+from .normalize import normalize_title
+
+if TYPE_CHECKING:
+    from .typo_index import TypoIndex
+
+SEARCH_INDEX_NAME = "search-index.bin"
+SEARCH_INDEX_FORMAT = "doompedia-search-v1"
+MAGIC = b"DPSI"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sIIIIIQQQQQ")
+_TITLE = struct.Struct("<QIIf")
+_ALIAS = struct.Struct("<QII")
+_BUCKET = struct.Struct("<QII")
+_ENTRY = struct.Struct("<I")
+_F32 = struct.Struct("<f")
+
+
+@dataclass(slots=True)
+class SearchConfig:
+    """The `search` block of `shared-spec/ranking-config.v1.json`."""
+
+    typo_distance: int = 1
+    typo_min_query_length: int = 5
+    max_typo_candidates: int = 200
+    max_results: int = 30
+
+    @classmethod
+    def from_ranking_config(cls, path: Path) -> SearchConfig:
+        search = json.loads(path.read_text(encoding="utf-8")).get("search", {})
+        defaults = cls()
+        return cls(
+            typo_distance=int(search.get("typoDistance", defaults.typo_distance)),
+            typo_min_query_length=int(search.get("typoMinQueryLength", defaults.typo_min_query_length)),
+            max_typo_candidates=int(search.get("maxTypoCandidates", defaults.max_typo_candidates)),
+            max_results=int(search.get("maxResults", defaults.max_results)),
+        )
+
+
+@dataclass(slots=True)
+class SearchHit:
+    page_id: int
+    text: str
+    match: str
+
+
+def edit_distance_at_most_one(left: str, right: str) -> bool:
+    """Same check as the clients' `editDistanceAtMostOne`."""
+    if left == right:
+        return True
+    if abs(len(left) - len(right)) > 1:
+        return False
+    i = j = edits = 0
+    while i < len(left) and j < len(right):
+        if left[i] == right[j]:
+            i += 1
+            j += 1
+            continue
+        edits += 1
+        if edits > 1:
+            return False
+        if len(left) > len(right):
+            i += 1
+        elif len(right) > len(left):
+            j += 1
+        else:
+            i += 1
+            j += 1
+    if i < len(left) or j < len(right):
+        edits += 1
+    return edits <= 1
+
+
+def _bucket_key(first_char: str, length: int) -> int:
+    return ord(first_char) << 32 | length
+
+
+def write_search_index(
+    cards: Iterable[tuple[int, str, float, list[str]]],
+    path: Path,
+    sync: DirectorySync | None = None,
+) -> dict[str, object]:
+    """Write the index for `(page_id, normalized_title, quality_score, normalized_aliases)` rows."""
+    titles: list[tuple[bytes, int, float, str]] = []
+    aliases: list[tuple[bytes, int]] = []
+    for page_id, title, quality, card_aliases in cards:
+        if title:
+            # Rank buckets by the stored f32 so readers see the same order.
+            stored_quality = _F32.unpack(_F32.pack(quality))[0]
+            titles.append((title.encode("utf-8"), page_id, stored_quality, title))
+        for alias in dict.fromkeys(card_aliases):
+            if alias:
+                aliases.append((alias.encode("utf-8"), page_id))
+    titles.sort(key=lambda row: (row[0], row[1]))
+    aliases.sort()
+
+    strings = bytearray()
+    offsets: dict[bytes, int] = {}
+
+    def intern(value: bytes) -> int:
+        offset = offsets.get(value)
+        if offset is None:
+            offset = offsets[value] = len(strings)
+            strings.extend(value)
+        return offset
+
+    title_table = bytearray()
+    buckets: dict[int, list[tuple[float, int, int]]] = {}
+    for position, (encoded, page_id, quality, title) in enumerate(titles):
+        title_table += _TITLE.pack(page_id, intern(encoded), len(encoded), quality)
+        buckets.setdefault(_bucket_key(title[0], len(title)), []).append((-quality, page_id, position))
+    alias_table = bytearray()
+    for encoded, page_id in aliases:
+        alias_table += _ALIAS.pack(page_id, intern(encoded), len(encoded))
+    bucket_table = bytearray()
+    entries = bytearray()
+    for key in sorted(buckets):
+        members = sorted(buckets[key])
+        bucket_table += _BUCKET.pack(key, len(entries) // _ENTRY.size, len(members))
+        for _, _, position in members:
+            entries += _ENTRY.pack(position)
+
+    sections = [title_table, alias_table, bucket_table, entries, strings]
+    section_offsets = []
+    position = _HEADER.size
+    for section in sections:
+        section_offsets.append(position)
+        position += len(section)
+    header = _HEADER.pack(MAGIC, VERSION, len(titles), len(aliases), len(buckets), 0, *section_offsets)
+    body = header + b"".join(sections)
+    atomic_write_bytes(path, body, sync=sync)
+    return {
+        "url": path.name,
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "bytes": len(body),
+        "format": SEARCH_INDEX_FORMAT,
+        "titles": len(titles),
+        "aliases": len(aliases),
+    }
+
+
+def _pack_rows(shard_paths: Iterable[Path]) -> Iterator[tuple[int, str, float, list[str]]]:
+    for shard_path in shard_paths:
+        opener = gzip.open if shard_path.suffix == ".gz" else open
+        with opener(shard_path, "rb") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                payload = json.loads(line)
+                article = payload["article"]
+                yield (
+                    int(article["page_id"]),
+                    article.get("normalized_title") or normalize_title(str(article.get("title", ""))),
+                    float(article.get("quality_score", 0.5)),
+                    [normalize_title(str(alias)) for alias in payload.get("aliases") or []],
+                )
+
+
+def build_pack_search_index(
+    pack_dir: Path,
+    shard_paths: Iterable[Path],
+    sync: DirectorySync | None = None,
+) -> dict[str, object]:
+    """Index the given pack shards into `<pack_dir>/search-index.bin`; returns its manifest entry."""
+    return write_search_index(_pack_rows(shard_paths), pack_dir / SEARCH_INDEX_NAME, sync=sync)
+
+
+class _Keys:
+    """Sequence view of a sorted table's string keys, for `bisect`."""
+
+    def __init__(self, index: SearchIndex, offset: int, record: struct.Struct, count: int) -> None:
+        self._index = index
+        self._offset = offset
+        self._record = record
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> bytes:
+        _, start, length = self._record.unpack_from(self._index.data, self._offset + position * self._record.size)[:3]
+        return self._index.string(start, length)
+
+
+class SearchIndex:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = path.open("rb")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.titles, self.aliases, self.buckets, _, *offsets = _HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} search index")
+        self._titles_at, self._aliases_at, self._buckets_at, self._entries_at, self._strings_at = offsets
+        self._title_keys = _Keys(self, self._titles_at, _TITLE, self.titles)
+        self._alias_keys = _Keys(self, self._aliases_at, _ALIAS, self.aliases)
+
+    def close(self) -> None:
+        self.data.close()
+        self._file.close()
+
+    def __enter__(self) -> SearchIndex:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def string(self, start: int, length: int) -> bytes:
+        start += self._strings_at
+        return self.data[start : start + length]
+
+    def title(self, position: int) -> tuple[int, bytes, float]:
+        page_id, start, length, quality = _TITLE.unpack_from(self.data, self._titles_at + position * _TITLE.size)
+        return page_id, self.string(start, length), quality
+
+    def alias(self, position: int) -> tuple[int, bytes]:
+        page_id, start, length = _ALIAS.unpack_from(self.data, self._aliases_at + position * _ALIAS.size)
+        return page_id, self.string(start, length)
+
+    def exact(self, query: bytes, limit: int) -> Iterator[tuple[int, bytes]]:
+        position = bisect.bisect_left(self._title_keys, query)
+        while limit > 0 and position < self.titles:
+            page_id, text, _ = self.title(position)
+            if text != query:
+                return
+            yield page_id, text
+            position += 1
+            limit -= 1
+
+    def prefix(self, query: bytes, limit: int) -> Iterator[tuple[int, bytes]]:
+        position = bisect.bisect_left(self._title_keys, query)
+        while limit > 0 and position < self.titles:
+            page_id, text, _ = self.title(position)
+            if not text.startswith(query):
+                return
+            yield page_id, text
+            position += 1
+            limit -= 1
+
+    def alias_prefix(self, query: bytes, limit: int) -> Iterator[tuple[int, bytes]]:
+        """Aliases equal to or starting with `query`; exact matches sort first."""
+        position = bisect.bisect_left(self._alias_keys, query)
+        while limit > 0 and position < self.aliases:
+            page_id, text = self.alias(position)
+            if not text.startswith(query):
+                return
+            yield page_id, text
+            position += 1
+            limit -= 1
+
+    def _bucket(self, key: int) -> tuple[int, int]:
+        low, high = 0, self.buckets
+        while low < high:
+            middle = (low + high) // 2
+            middle_key, start, count = _BUCKET.unpack_from(self.data, self._buckets_at + middle * _BUCKET.size)
+            if middle_key == key:
+                return start, count
+            if middle_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return 0, 0
+
+    def _rank_key(self, position: int) -> tuple[float, int]:
+        page_id, _, quality = self.title(position)
+        return -quality, page_id
+
+    def _bucket_rank(self, start: int, count: int, key: tuple[float, int]) -> int:
+        """Number of bucket members ranked ahead of `key`."""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            (position,) = _ENTRY.unpack_from(self.data, self._entries_at + (start + middle) * _ENTRY.size)
+            if self._rank_key(position) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _bucket_members(self, start: int, count: int) -> Iterator[tuple[float, int, int]]:
+        for offset in range(self._entries_at + start * _ENTRY.size, self._entries_at + (start + count) * _ENTRY.size, _ENTRY.size):
+            (position,) = _ENTRY.unpack_from(self.data, offset)
+            page_id, _, quality = self.title(position)
+            yield -quality, page_id, position
+
+    def typo_candidates(self, first_char: str, min_length: int, max_length: int, limit: int) -> Iterator[tuple[int, bytes]]:
+        """Titles starting with `first_char` within the length window, best quality first."""
+        buckets = [self._bucket(_bucket_key(first_char, length)) for length in range(max(min_length, 1), max_length + 1)]
+        merged = heapq.merge(*(self._bucket_members(start, count) for start, count in buckets if count))
+        for _, page_id, position in islice(merged, max(limit, 0)):
+            yield page_id, self.title(position)[1]
+
+    def indexed_typo_candidates(
+        self,
+        positions: Iterable[int],
+        first_char: str,
+        min_length: int,
+        max_length: int,
+        limit: int,
+    ) -> list[tuple[int, bytes]]:
+        """The members of `positions` that `typo_candidates` would return, in the same order.
+
+        A title qualifies when it is in the first-character/length window and
+        fewer than `limit` titles of the window rank ahead of it, which takes a
+        binary search per window bucket instead of walking the window.
+        """
+        buckets = [self._bucket(_bucket_key(first_char, length)) for length in range(max(min_length, 1), max_length + 1)]
+        ranked = []
+        for position in positions:
+            page_id, text, quality = self.title(position)
+            title = text.decode("utf-8")
+            if not title.startswith(first_char) or not min_length <= len(title) <= max_length:
+                continue
+            key = (-quality, page_id)
+            if sum(self._bucket_rank(start, count, key) for start, count in buckets if count) < limit:
+                ranked.append((key, page_id, text))
+        return [(page_id, text) for _, page_id, text in sorted(ranked)]
+
+    def search(
+        self,
+        query: str,
+        config: SearchConfig | None = None,
+        typo_index: TypoIndex | None = None,
+    ) -> list[SearchHit]:
+        """Rank title matches for `query` per the search contract.
+
+        With a paired `typo_index`, typo candidates come from its deletion
+        neighbourhood lookup instead of a walk over the typo window; results
+        are identical.
+        """
+        config = config or SearchConfig()
+        normalized = normalize_title(query)
+        if not normalized:
+            return []
+        encoded = normalized.encode("utf-8")
+        limit = config.max_results
+
+        hits: list[SearchHit] = []
+        seen: set[int] = set()
+
+        def add(rows: Iterable[tuple[int, bytes]], match: str) -> None:
+            for page_id, text in rows:
+                if page_id not in seen:
+                    seen.add(page_id)
+                    hits.append(SearchHit(page_id=page_id, text=text.decode("utf-8"), match=match))
+
+        add(self.exact(encoded, limit), "exact")
+        add(self.prefix(encoded, limit), "prefix")
+        add(self.alias_prefix(encoded, limit), "alias")
+        if len(normalized) >= config.typo_min_query_length:
+            window = (
+                normalized[0],
+                len(normalized) - config.typo_distance,
+                len(normalized) + config.typo_distance,
+                config.max_typo_candidates,
+            )
+            if typo_index is None:
+                candidates: Iterable[tuple[int, bytes]] = self.typo_candidates(*window)
+            else:
+                candidates = self.indexed_typo_candidates(typo_index.neighbours(normalized), *window)
+            add(
+                (
+                    (page_id, text)
+                    for page_id, text in candidates
+                    if page_id not in seen and edit_distance_at_most_one(normalized, text.decode("utf-8"))
+                ),
+                "typo",
+            )
+        return hits[:limit]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build a pack's precomputed title-search index")
+    parser.add_argument("--pack", required=True, help="Pack directory containing manifest.json")
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[search_index] {message}", file=sys.stderr, flush=True)
+
+
+def record_pack_artifact(pack_dir: Path, key: str, entry: dict[str, object]) -> None:
+    """Point manifest key `key` of an existing pack at `entry` and update its checksums."""
+    manifest_path = pack_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest[key] = entry
+    checksums_path = pack_dir / "checksums.txt"
+    if checksums_path.exists():
+        lines = [
+            line
+            for line in checksums_path.read_text(encoding="utf-8").splitlines()
+            if line.strip() and not line.endswith(f"  {entry['url']}")
+        ]
+        lines.append(f"{entry['sha256']}  {entry['url']}")
+        atomic_write_text(checksums_path, "\n".join(lines) + "\n")
+    atomic_write_text(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+def index_pack(pack_dir: Path) -> dict[str, object]:
+    """Build the index for an existing pack and record it in its manifest and checksums."""
+    manifest = json.loads((pack_dir / "manifest.json").read_text(encoding="utf-8"))
+    entry = build_pack_search_index(pack_dir, [pack_dir / str(shard["url"]) for shard in manifest.get("shards", [])])
+    record_pack_artifact(pack_dir, "searchIndex", entry)
+    return entry
+
+
+def main() -> None:
+    args = parse_args()
+    start = time.monotonic()
+    entry = index_pack(Path(args.pack))
+    _log(f"Indexed {entry['titles']:,} titles and {entry['aliases']:,} aliases in {time.monotonic() - start:.1f}s")
+    print(json.dumps(entry, indent=2))
+
+
+if __name__ == "__main__":
+    main()
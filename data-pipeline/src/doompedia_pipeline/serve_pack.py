@@ -0,0 +1,324 @@
+"""Static dev server for published packs, for exercising the download path offline.
+
+Behaves like the production Caddy origin where it matters to clients: strong
+ETags (the manifest sha256 of shards and their precompressed variants),
+`If-None-Match`, single-range `Range`/`If-Range` requests and
+`Accept-Encoding` negotiation over `.br`/`.zst`/`.gz` siblings. `GET /_stats`
+returns request, byte, status and latency counters.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import mimetypes
+import sys
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from pathlib import Path
+
+from .build_pack import PACK_ARTIFACTS, SHARD_SIDECARS
+from .latency import latency_summary
+from .precompress import ENCODINGS, sibling_path
+
+STATS_PATH = "/_stats"
+# Preference order when a client accepts several encodings (matches deploy/Caddyfile).
+ENCODING_PREFERENCE = ("br", "zstd", "gzip")
+_MAX_HEADER_BYTES = 16 * 1024
+_CONTENT_TYPES = {
+    ".ndjson": "application/x-ndjson",
+    ".json": "application/json",
+    ".gz": "application/gzip",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve a published pack directory for local download testing")
+    parser.add_argument("--root", required=True, help="Directory to serve, e.g. data/site")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[serve_pack] {message}", file=sys.stderr, flush=True)
+
+
+@dataclass(slots=True)
+class ServerStats:
+    started: float = field(default_factory=time.monotonic)
+    requests: int = 0
+    bytes_sent: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+    encodings: dict[str, int] = field(default_factory=dict)
+    latencies: list[float] = field(default_factory=list)
+
+    def record(self, status: int, sent: int, encoding: str | None, latency: float) -> None:
+        self.requests += 1
+        self.bytes_sent += sent
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if encoding:
+            self.encodings[encoding] = self.encodings.get(encoding, 0) + 1
+        self.latencies.append(latency)
+        # Keep memory flat on long runs; recent samples are what matter.
+        if len(self.latencies) > 100_000:
+            del self.latencies[:50_000]
+
+    def snapshot(self) -> dict[str, object]:
+        uptime = time.monotonic() - self.started
+        return {
+            "uptimeSeconds": round(uptime, 3),
+            "requests": self.requests,
+            "bytesSent": self.bytes_sent,
+            "throughputMBps": round(self.bytes_sent / 1024 / 1024 / uptime, 2) if uptime > 0 else None,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "encodings": dict(sorted(self.encodings.items())),
+            "latency": latency_summary(self.latencies),
+        }
+
+
+def collect_etags(root: Path) -> dict[Path, str]:
+    """Map files referenced by any manifest under `root` to their sha256."""
+    etags: dict[Path, str] = {}
+    for manifest_path in root.rglob("manifest.json"):
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for shard in manifest.get("shards", []):
+            url = urllib.parse.urlsplit(str(shard.get("url", "")))
+            if url.scheme:
+                # Absolute URLs: assume the usual layout next to the manifest.
+                shard_path = (manifest_path.parent / "shards" / Path(url.path).name).resolve()
+            else:
+                shard_path = (manifest_path.parent / url.path).resolve()
+            if shard.get("sha256"):
+                etags[shard_path] = str(shard["sha256"])
+            for encoding, variant in dict(shard.get("encodings") or {}).items():
+                if encoding in ENCODINGS and variant.get("sha256"):
+                    etags[sibling_path(shard_path, encoding)] = str(variant["sha256"])
+            for key in SHARD_SIDECARS:
+                sidecar = shard.get(key)
+                if isinstance(sidecar, dict) and sidecar.get("sha256"):
+                    etags[shard_path.with_name(str(sidecar.get("url", "")).split("/")[-1])] = str(sidecar["sha256"])
+        for key in PACK_ARTIFACTS:
+            artifact = manifest.get(key)
+            if isinstance(artifact, dict) and artifact.get("sha256"):
+                name = str(artifact.get("url", "")).split("/")[-1]
+                etags[(manifest_path.parent / name).resolve()] = str(artifact["sha256"])
+    return etags
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single `bytes=` range into inclusive `(start, end)`.
+
+    Returns `None` for headers that should be ignored (multi-range, other
+    units) and raises `ValueError` when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if start is None:
+        if end is None:
+            return None
+        # A suffix range of an empty file selects nothing.
+        if end <= 0 or size == 0:
+            raise ValueError(header)
+        return max(size - end, 0), size - 1
+    if end is None:
+        end = size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted: set[str] = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in {"q=0", "q=0.0", "q=0.00", "q=0.000"}:
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class PackServer:
+    def __init__(self, root: Path) -> None:
+        self.root = root.resolve()
+        self.etags = collect_etags(self.root)
+        self.stats = ServerStats()
+
+    def _etag(self, path: Path) -> str:
+        digest = self.etags.get(path)
+        if digest:
+            return f'"{digest}"'
+        stat = path.stat()
+        return f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def _resolve(self, target: str) -> Path | None:
+        path = urllib.parse.unquote(urllib.parse.urlsplit(target).path)
+        candidate = (self.root / path.lstrip("/")).resolve()
+        if not candidate.is_relative_to(self.root):
+            return None
+        if candidate.is_dir():
+            candidate = candidate / "index.html"
+        return candidate if candidate.is_file() else None
+
+    def _negotiate(self, path: Path, accept_encoding: str) -> tuple[Path, str | None]:
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ENCODING_PREFERENCE:
+            if encoding in accepted:
+                variant = sibling_path(path, encoding)
+                if variant.is_file():
+                    return variant, encoding
+        return path, None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                if len(head) > _MAX_HEADER_BYTES:
+                    return
+                keep_alive = await self._respond(head, writer)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, head: bytes, writer: asyncio.StreamWriter) -> bool:
+        start = time.monotonic()
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            await self._send_simple(writer, 400, start, keep_alive=False)
+            return False
+        headers: dict[str, str] = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+        if method not in {"GET", "HEAD"}:
+            await self._send_simple(writer, 405, start, keep_alive, {"Allow": "GET, HEAD"})
+            return keep_alive
+        if urllib.parse.urlsplit(target).path == STATS_PATH:
+            body = json.dumps(self.stats.snapshot(), indent=2).encode("utf-8")
+            await self._send_simple(writer, 200, start, keep_alive, {"Content-Type": "application/json"}, body)
+            return keep_alive
+
+        path = self._resolve(target)
+        if path is None:
+            await self._send_simple(writer, 404, start, keep_alive)
+            return keep_alive
+
+        served, encoding = self._negotiate(path, headers.get("accept-encoding", ""))
+        size = served.stat().st_size
+        etag = self._etag(served)
+        response_headers = {
+            "Content-Type": _CONTENT_TYPES.get(path.suffix) or mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding",
+        }
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+
+        if etag in {tag.strip() for tag in headers.get("if-none-match", "").split(",")}:
+            await self._send_simple(writer, 304, start, keep_alive, response_headers, encoding=encoding)
+            return keep_alive
+
+        status, offset, length = 200, 0, size
+        range_header = headers.get("range")
+        if_range = headers.get("if-range")
+        # If-Range needs a strong comparison; a weak size-mtime ETag never matches.
+        if range_header and (if_range is None or (if_range == etag and not etag.startswith("W/"))):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                response_headers["Content-Range"] = f"bytes */{size}"
+                await self._send_simple(writer, 416, start, keep_alive, response_headers, encoding=encoding)
+                return keep_alive
+            if byte_range is not None:
+                status, offset, length = 206, byte_range[0], byte_range[1] - byte_range[0] + 1
+                response_headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+
+        response_headers["Content-Length"] = str(length)
+        writer.write(self._head(status, response_headers, keep_alive))
+        sent = 0
+        if method == "GET" and length:
+            await writer.drain()
+            with served.open("rb") as handle:
+                sent = await asyncio.get_running_loop().sendfile(writer.transport, handle, offset, length)
+        await writer.drain()
+        self.stats.record(status, sent, encoding, time.monotonic() - start)
+        return keep_alive
+
+    @staticmethod
+    def _head(status: int, headers: dict[str, str], keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_simple(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        start: float,
+        keep_alive: bool,
+        headers: dict[str, str] | None = None,
+        body: bytes = b"",
+        encoding: str | None = None,
+    ) -> None:
+        headers = dict(headers or {})
+        headers["Content-Length"] = str(len(body))
+        writer.write(self._head(status, headers, keep_alive) + body)
+        await writer.drain()
+        self.stats.record(status, len(body), encoding, time.monotonic() - start)
+
+
+async def start_server(root: Path, host: str = "127.0.0.1", port: int = 0) -> tuple[asyncio.Server, PackServer]:
+    pack_server = PackServer(root)
+    server = await asyncio.start_server(pack_server.handle, host, port)
+    return server, pack_server
+
+
+async def _serve(root: Path, host: str, port: int) -> None:
+    server, pack_server = await start_server(root, host, port)
+    bound = server.sockets[0].getsockname()
+    _log(f"Serving {pack_server.root} on http://{bound[0]}:{bound[1]}/ ({len(pack_server.etags)} files with manifest ETags)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        _log(json.dumps(pack_server.stats.snapshot()))
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        asyncio.run(_serve(Path(args.root), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import heapq
+import json
+import pickle
+import sys
+import tempfile
+import time
+from itertools import count, islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from .normalize import normalize_title
+
+SORT_KEYS = ("page_id", "title", "quality")
+DEFAULT_RUN_SIZE = 250_000
+MAX_MERGE_FAN_IN = 128
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sort card NDJSON by page id, title or quality with bounded memory")
+    parser.add_argument("--input", required=True, help="NDJSON input path")
+    parser.add_argument("--output", required=True, help="Sorted NDJSON output path")
+    parser.add_argument("--key", choices=SORT_KEYS, default="page_id")
+    parser.add_argument(
+        "--run-size",
+        type=int,
+        default=DEFAULT_RUN_SIZE,
+        help="Records sorted in memory per spill run",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to sort spill runs in parallel",
+    )
+    parser.add_argument("--temp-dir", default=None, help="Directory for spill runs (defaults to system temp)")
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[sort_cards] {message}", file=sys.stderr, flush=True)
+
+
+def _page_id_key(payload: dict[str, Any]) -> tuple[Any, ...]:
+    return (int(payload["page_id"]),)
+
+
+def _title_key(payload: dict[str, Any]) -> tuple[Any, ...]:
+    title = payload.get("normalized_title") or normalize_title(str(payload.get("title", "")))
+    return (title, int(payload["page_id"]))
+
+
+def _quality_key(payload: dict[str, Any]) -> tuple[Any, ...]:
+    return (-float(payload.get("quality_score", 0.5)), int(payload["page_id"]))
+
+
+_KEY_FUNCS: dict[str, Callable[[dict[str, Any]], tuple[Any, ...]]] = {
+    "page_id": _page_id_key,
+    "title": _title_key,
+    "quality": _quality_key,
+}
+
+
+def card_sort_key(key: str) -> Callable[[dict[str, Any]], tuple[Any, ...]]:
+    """Return the sort-key function for a card payload.
+
+    Title and quality orders break ties by page id so output is deterministic.
+    """
+    try:
+        return _KEY_FUNCS[key]
+    except KeyError:
+        raise ValueError(f"Unknown sort key {key!r}; expected one of {', '.join(SORT_KEYS)}") from None
+
+
+def _keyed(lines: Iterable[str], key: str) -> list[tuple[tuple[Any, ...], str]]:
+    key_func = card_sort_key(key)
+    keyed = [(key_func(json.loads(line)), line) for line in lines]
+    keyed.sort(key=lambda item: item[0])
+    return keyed
+
+
+def _write_run(lines: list[str], key: str, run_path: str) -> int:
+    keyed = _keyed(lines, key)
+    with open(run_path, "wb") as out:
+        pickler = pickle.Pickler(out, protocol=pickle.HIGHEST_PROTOCOL)
+        for item in keyed:
+            pickler.dump(item)
+    return len(keyed)
+
+
+def _read_run(path: Path) -> Iterator[tuple[tuple[Any, ...], str]]:
+    with path.open("rb") as handle:
+        unpickler = pickle.Unpickler(handle)
+        while True:
+            try:
+                yield unpickler.load()
+            except EOFError:
+                return
+
+
+def _merge(paths: list[Path]) -> Iterator[tuple[tuple[Any, ...], str]]:
+    return heapq.merge(*(_read_run(path) for path in paths), key=lambda item: item[0])
+
+
+def _non_empty(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def iter_sorted_lines(
+    lines: Iterable[str],
+    key: str,
+    run_size: int = DEFAULT_RUN_SIZE,
+    workers: int = 1,
+    temp_dir: Path | None = None,
+) -> Iterator[str]:
+    """Yield NDJSON card lines (without trailing newline) in `key` order.
+
+    At most `run_size` records per worker are held in memory. Input that fits
+    in a single run is sorted in place; otherwise sorted runs are spilled to
+    temp files and k-way merged with `heapq.merge`.
+    """
+    card_sort_key(key)
+    run_size = max(1, run_size)
+    workers = max(1, workers)
+    iterator = _non_empty(lines)
+
+    first = list(islice(iterator, run_size))
+    if len(first) < run_size:
+        for _, line in _keyed(first, key):
+            yield line
+        return
+
+    with tempfile.TemporaryDirectory(prefix="doompedia-sort-", dir=temp_dir) as workdir:
+        run_paths: list[Path] = []
+        run_numbers = count()
+        start = time.monotonic()
+
+        def next_run_path() -> Path:
+            return Path(workdir) / f"run-{next(run_numbers):06d}.pkl"
+
+        if workers == 1:
+            batch = first
+            while batch:
+                run_paths.append(next_run_path())
+                _write_run(batch, key, str(run_paths[-1]))
+                batch = list(islice(iterator, run_size))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                pending: set[concurrent.futures.Future[int]] = set()
+                batch = first
+                while batch:
+                    if len(pending) >= workers:
+                        done, pending = concurrent.futures.wait(
+                            pending,
+                            return_when=concurrent.futures.FIRST_COMPLETED,
+                        )
+                        for future in done:
+                            future.result()
+                    run_paths.append(next_run_path())
+                    pending.add(executor.submit(_write_run, batch, key, str(run_paths[-1])))
+                    batch = list(islice(iterator, run_size))
+                for future in concurrent.futures.as_completed(pending):
+                    future.result()
+
+        _log(f"Wrote {len(run_paths)} sorted runs (elapsed: {time.monotonic() - start:.1f}s)")
+
+        # Bound open file handles by merging wide run sets in intermediate passes.
+        while len(run_paths) > MAX_MERGE_FAN_IN:
+            groups = [
+                run_paths[index : index + MAX_MERGE_FAN_IN]
+                for index in range(0, len(run_paths), MAX_MERGE_FAN_IN)
+            ]
+            run_paths = []
+            for group in groups:
+                merged_path = next_run_path()
+                with merged_path.open("wb") as out:
+                    pickler = pickle.Pickler(out, protocol=pickle.HIGHEST_PROTOCOL)
+                    for item in _merge(group):
+                        pickler.dump(item)
+                for path in group:
+                    path.unlink()
+                run_paths.append(merged_path)
+
+        for _, line in _merge(run_paths):
+            yield line
+
+
+def sort_cards(
+    input_path: Path,
+    output_path: Path,
+    key: str = "page_id",
+    run_size: int = DEFAULT_RUN_SIZE,
+    workers: int = 1,
+    temp_dir: Path | None = None,
+) -> dict[str, object]:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.monotonic()
+    written = 0
+    with input_path.open("r", encoding="utf-8") as handle, output_path.open("w", encoding="utf-8") as out:
+        for line in iter_sorted_lines(handle, key=key, run_size=run_size, workers=workers, temp_dir=temp_dir):
+            out.write(line)
+            out.write("\n")
+            written += 1
+
+    return {
+        "key": key,
+        "records": written,
+        "output": str(output_path),
+        "elapsedSeconds": round(time.monotonic() - start, 3),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    summary = sort_cards(
+        input_path=Path(args.input),
+        output_path=Path(args.output),
+        key=args.key,
+        run_size=args.run_size,
+        workers=args.workers,
+        temp_dir=Path(args.temp_dir) if args.temp_dir else None,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Compressed inverted index over card summaries, and a top-k query engine.
+
+Terms are the summary keywords `extract_dump` derives (`normalize.summary_terms`),
+without its per-card cap. Documents are numbered best quality first (quality
+descending, then page id), so every posting list in ascending document order
+is also in quality order: a conjunctive query walks its lists together and
+stops at the k-th common document, which is the k-th best match. All integers
+are little-endian:
+
+    header    magic "DPSX", version, document/term/skip counts, section offsets
+    documents (page_id u64, quality f32) by document number
+    terms     (string offset u32, string length u32, document count u32,
+              postings offset u64, postings length u32, first skip u32, skip count u32),
+              sorted by term bytes
+    skips     (document number u32, postings offset u32) before every
+              `SKIP_INTERVAL`-th posting of long lists
+    postings  document number gaps as LEB128 varints, first gap from -1
+    strings   UTF-8 terms
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import gzip
+import hashlib
+import json
+import mmap
+import struct
+import sys
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .atomic_io import DirectorySync, atomic_write_bytes
+from .normalize import summary_terms
+from .search_index import record_pack_artifact
+
+SUMMARY_INDEX_NAME = "summary-index.bin"
+SUMMARY_INDEX_FORMAT = "doompedia-summary-v1"
+MAGIC = b"DPSX"
+VERSION = 1
+SKIP_INTERVAL = 128
+
+_HEADER = struct.Struct("<4sIIIIQQQQQ")
+_DOCUMENT = struct.Struct("<Qf")
+_TERM = struct.Struct("<IIIQIII")
+_SKIP = struct.Struct("<II")
+
+
+@dataclass(slots=True)
+class SummaryHit:
+    page_id: int
+    quality: float
+
+
+def encode_postings(documents: Iterable[int]) -> tuple[bytearray, list[tuple[int, int]]]:
+    """Varint gap-encode ascending document numbers; returns the bytes and their skip entries."""
+    encoded = bytearray()
+    skips: list[tuple[int, int]] = []
+    previous = -1
+    for count, document in enumerate(documents):
+        if count and count % SKIP_INTERVAL == 0:
+            skips.append((previous, len(encoded)))
+        gap = document - previous
+        while gap >= 0x80:
+            encoded.append(gap & 0x7F | 0x80)
+            gap >>= 7
+        encoded.append(gap)
+        previous = document
+    return encoded, skips
+
+
+def write_summary_index(
+    cards: Iterable[tuple[int, float, str]],
+    path: Path,
+    sync: DirectorySync | None = None,
+) -> dict[str, object]:
+    """Write the index for `(page_id, quality_score, summary)` rows."""
+    ranking: list[tuple[float, int]] = []
+    row_postings: dict[str, array] = {}
+    for row, (page_id, quality, summary) in enumerate(cards):
+        ranking.append((-quality, page_id))
+        for term in summary_terms(summary):
+            postings = row_postings.get(term)
+            if postings is None:
+                postings = row_postings[term] = array("I")
+            postings.append(row)
+
+    order = sorted(range(len(ranking)), key=ranking.__getitem__)
+    document_of_row = array("I", bytes(4 * len(order)))
+    document_table = bytearray()
+    for document, row in enumerate(order):
+        document_of_row[row] = document
+        document_table += _DOCUMENT.pack(ranking[row][1], -ranking[row][0])
+    del ranking, order
+
+    term_table = bytearray()
+    skip_table = bytearray()
+    postings_section = bytearray()
+    strings = bytearray()
+    skip_count = 0
+    for term in sorted(row_postings, key=lambda value: value.encode("utf-8")):
+        documents = sorted(document_of_row[row] for row in row_postings.pop(term))
+        encoded, skips = encode_postings(documents)
+        for document, offset in skips:
+            skip_table += _SKIP.pack(document, offset)
+        text = term.encode("utf-8")
+        term_table += _TERM.pack(
+            len(strings), len(text), len(documents), len(postings_section), len(encoded), skip_count, len(skips)
+        )
+        strings += text
+        postings_section += encoded
+        skip_count += len(skips)
+    terms = len(term_table) // _TERM.size
+
+    sections = [document_table, term_table, skip_table, postings_section, strings]
+    section_offsets = []
+    position = _HEADER.size
+    for section in sections:
+        section_offsets.append(position)
+        position += len(section)
+    header = _HEADER.pack(MAGIC, VERSION, len(document_of_row), terms, skip_count, *section_offsets)
+    body = header + b"".join(sections)
+    atomic_write_bytes(path, body, sync=sync)
+    return {
+        "url": path.name,
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "bytes": len(body),
+        "format": SUMMARY_INDEX_FORMAT,
+        "documents": len(document_of_row),
+        "terms": terms,
+    }
+
+
+def _pack_rows(shard_paths: Iterable[Path]) -> Iterator[tuple[int, float, str]]:
+    for shard_path in shard_paths:
+        opener = gzip.open if shard_path.suffix == ".gz" else open
+        with opener(shard_path, "rb") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                article = json.loads(line)["article"]
+                yield int(article["page_id"]), float(article.get("quality_score", 0.5)), str(article.get("summary", ""))
+
+
+def build_pack_summary_index(
+    pack_dir: Path,
+    shard_paths: Iterable[Path],
+    sync: DirectorySync | None = None,
+) -> dict[str, object]:
+    """Index the given pack shards into `<pack_dir>/summary-index.bin`; returns its manifest entry."""
+    return write_summary_index(_pack_rows(shard_paths), pack_dir / SUMMARY_INDEX_NAME, sync=sync)
+
+
+class _Cursor:
+    """Forward-only reader over one term's posting list."""
+
+    def __init__(self, index: SummaryIndex, term: tuple[int, int, int, int, int]) -> None:
+        self.length, start, size, self._first_skip, self._skips = term
+        self._data = index.data
+        self._skips_at = index._skips_at
+        self._position = index._postings_at + start
+        self._end = self._position + size
+        self._start = self._position
+        self._next_skip = 0
+        self.document = -1
+
+    def next(self) -> int:
+        """Advance to the next document; -1 once the list is exhausted."""
+        if self._position >= self._end:
+            self.document = -1
+            return -1
+        data = self._data
+        gap = shift = 0
+        while True:
+            byte = data[self._position]
+            self._position += 1
+            gap |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        self.document += gap
+        return self.document
+
+    def seek(self, target: int) -> int:
+        """Advance to the first document at or after `target`; -1 if there is none."""
+        # Jump over whole skip blocks that end before the target.
+        while self._next_skip < self._skips:
+            document, offset = _SKIP.unpack_from(self._data, self._skips_at + (self._first_skip + self._next_skip) * _SKIP.size)
+            if document >= target:
+                break
+            if self._start + offset > self._position:
+                self._position = self._start + offset
+                self.document = document
+            self._next_skip += 1
+        document = self.document
+        while document < target:
+            document = self.next()
+            if document < 0:
+                return -1
+        return document
+
+
+class _Terms:
+    """Sequence view of the sorted term strings, for `bisect`."""
+
+    def __init__(self, index: SummaryIndex) -> None:
+        self._index = index
+
+    def __len__(self) -> int:
+        return self._index.terms
+
+    def __getitem__(self, position: int) -> bytes:
+        offset, length = struct.unpack_from("<II", self._index.data, self._index._terms_at + position * _TERM.size)
+        start = self._index._strings_at + offset
+        return self._index.data[start : start + length]
+
+
+class SummaryIndex:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = path.open("rb")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.documents,
+            self.terms,
+            _,
+            self._documents_at,
+            self._terms_at,
+            self._skips_at,
+            self._postings_at,
+            self._strings_at,
+        ) = _HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} summary index")
+        self._keys = _Terms(self)
+
+    def close(self) -> None:
+        self.data.close()
+        self._file.close()
+
+    def __enter__(self) -> SummaryIndex:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def document(self, number: int) -> SummaryHit:
+        page_id, quality = _DOCUMENT.unpack_from(self.data, self._documents_at + number * _DOCUMENT.size)
+        return SummaryHit(page_id, quality)
+
+    def _term(self, term: str) -> tuple[int, int, int, int, int] | None:
+        encoded = term.encode("utf-8")
+        position = bisect.bisect_left(self._keys, encoded)
+        if position >= self.terms or self._keys[position] != encoded:
+            return None
+        _, _, length, start, size, first_skip, skips = _TERM.unpack_from(self.data, self._terms_at + position * _TERM.size)
+        return length, start, size, first_skip, skips
+
+    def document_frequency(self, term: str) -> int:
+        entry = self._term(term)
+        return entry[0] if entry is not None else 0
+
+    def postings(self, term: str) -> Iterator[int]:
+        """Document numbers containing `term`, best quality first."""
+        entry = self._term(term)
+        if entry is None:
+            return
+        cursor = _Cursor(self, entry)
+        while (document := cursor.next()) >= 0:
+            yield document
+
+    def search(self, query: str, k: int = 30) -> list[SummaryHit]:
+        """The `k` best-quality cards whose summaries contain every term of `query`."""
+        terms = summary_terms(query)
+        if not terms or k <= 0:
+            return []
+        entries = [self._term(term) for term in terms]
+        if any(entry is None for entry in entries):
+            return []
+        # Drive the intersection from the shortest list; the others only seek.
+        cursors = sorted((_Cursor(self, entry) for entry in entries), key=lambda cursor: cursor.length)
+        lead, others = cursors[0], cursors[1:]
+        hits: list[SummaryHit] = []
+        candidate = lead.next()
+        while candidate >= 0:
+            for cursor in others:
+                document = cursor.seek(candidate)
+                if document < 0:
+                    return hits
+                if document != candidate:
+                    candidate = lead.seek(document)
+                    break
+            else:
+                hits.append(self.document(candidate))
+                if len(hits) == k:
+                    return hits
+                candidate = lead.next()
+        return hits
+
+
+def index_pack_summaries(pack_dir: Path) -> dict[str, object]:
+    """Build the summary index for an existing pack and record it in its manifest and checksums."""
+    manifest = json.loads((pack_dir / "manifest.json").read_text(encoding="utf-8"))
+    entry = build_pack_summary_index(pack_dir, [pack_dir / str(shard["url"]) for shard in manifest.get("shards", [])])
+    record_pack_artifact(pack_dir, "summaryIndex", entry)
+    return entry
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build a pack's compressed summary full-text index")
+    parser.add_argument("--pack", required=True, help="Pack directory containing manifest.json")
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[summary_index] {message}", file=sys.stderr, flush=True)
+
+
+def main() -> None:
+    args = parse_args()
+    start = time.monotonic()
+    entry = index_pack_summaries(Path(args.pack))
+    _log(f"Indexed {entry['terms']:,} terms over {entry['documents']:,} summaries in {time.monotonic() - start:.1f}s")
+    print(json.dumps(entry, indent=2))
+
+
+if __name__ == "__main__":
+    main()
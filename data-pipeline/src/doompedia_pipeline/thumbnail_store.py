@@ -0,0 +1,168 @@
+"""Content-hashed thumbnail directory with a metadata index.
+
+Downloads are streamed to disk while being hashed, so no image is held in
+memory. The index records each file's size, mtime, sha256 and MIME type, so a
+rerun trusts files whose size and mtime still match instead of re-reading
+them. Articles whose images hash identically share one file. The thumbnail
+directory is published as-is, so the index lives elsewhere; without one, a
+rerun re-hashes every file it finds.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+from typing import IO, Any
+
+from .atomic_io import atomic_write_text
+
+_CHUNK = 64 * 1024
+_SAVE_EVERY = 100
+_THUMBNAIL_NAME_RE = re.compile(r"^(\d+)-\d+\.[A-Za-z0-9]+$")
+
+
+def _record(filename: str, entry: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "filename": filename,
+        "bytes": entry["bytes"],
+        "sha256": entry["sha256"],
+        "mime_type": entry["mime"],
+    }
+
+
+class ThumbnailStore:
+    def __init__(self, directory: Path, index_path: Path | None = None) -> None:
+        self.directory = directory
+        self.index_path = index_path
+        directory.mkdir(parents=True, exist_ok=True)
+        self.files: dict[str, dict[str, Any]] = {}
+        self.articles: dict[str, str] = {}
+        self.stats = {"reused": 0, "rehashed": 0, "downloaded": 0, "deduplicated": 0}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        if index_path is not None and index_path.exists():
+            try:
+                index = json.loads(index_path.read_text(encoding="utf-8"))
+                self.files = dict(index.get("files", {}))
+                self.articles = dict(index.get("articles", {}))
+            except (OSError, ValueError):
+                # Unreadable index: rebuild it from the files on disk.
+                self.files, self.articles = {}, {}
+        # Files written before the index existed (or lost from it) are found by name, once.
+        for path in directory.iterdir():
+            match = _THUMBNAIL_NAME_RE.match(path.name)
+            if match and path.name not in self.files:
+                self.articles.setdefault(match.group(1), path.name)
+        self._by_digest = {entry["sha256"]: name for name, entry in self.files.items()}
+
+    def lookup(self, page_id: int, max_bytes: int) -> dict[str, Any] | None:
+        """Return the stored thumbnail for `page_id`, or `None` when it must be downloaded."""
+        with self._lock:
+            filename = self.articles.get(str(page_id))
+            entry = self.files.get(filename, {}) if filename else {}
+        if filename is None:
+            return None
+        try:
+            stat = (self.directory / filename).stat()
+        except FileNotFoundError:
+            return None
+        if not 0 < stat.st_size <= max_bytes:
+            return None
+        if entry.get("bytes") == stat.st_size and entry.get("mtimeNs") == stat.st_mtime_ns:
+            with self._lock:
+                self.stats["reused"] += 1
+            return _record(filename, entry)
+
+        hasher = hashlib.sha256()
+        with (self.directory / filename).open("rb") as handle:
+            for chunk in iter(lambda: handle.read(_CHUNK), b""):
+                hasher.update(chunk)
+        entry = {
+            "bytes": stat.st_size,
+            "mtimeNs": stat.st_mtime_ns,
+            "sha256": hasher.hexdigest(),
+            "mime": entry.get("mime") or mimetypes.guess_type(filename)[0] or "image/jpeg",
+        }
+        with self._lock:
+            self.stats["rehashed"] += 1
+            self._index(str(page_id), filename, entry)
+        return _record(filename, entry)
+
+    def write(self, page_id: int, filename: str, mime: str, stream: IO[bytes], max_bytes: int) -> dict[str, Any]:
+        """Stream `stream` into `filename`, or link `page_id` to an identical stored image."""
+        temp_path = self.directory / f".{filename}.{uuid.uuid4().hex[:12]}.tmp"
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with temp_path.open("wb") as out:
+                for chunk in iter(lambda: stream.read(_CHUNK), b""):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(f"Thumbnail exceeds {max_bytes} bytes")
+                    hasher.update(chunk)
+                    out.write(chunk)
+            digest = hasher.hexdigest()
+            with self._lock:
+                shared = self._by_digest.get(digest)
+                if shared and shared != filename and (self.directory / shared).exists():
+                    temp_path.unlink()
+                    self.stats["deduplicated"] += 1
+                    self.articles[str(page_id)] = shared
+                    self._changed()
+                    return _record(shared, self.files[shared])
+                os.replace(temp_path, self.directory / filename)
+                stat = (self.directory / filename).stat()
+                entry = {"bytes": size, "mtimeNs": stat.st_mtime_ns, "sha256": digest, "mime": mime}
+                self.stats["downloaded"] += 1
+                self._index(str(page_id), filename, entry)
+                return _record(filename, entry)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def _index(self, page_key: str, filename: str, entry: dict[str, Any]) -> None:
+        previous = self.files.get(filename)
+        if previous and self._by_digest.get(previous["sha256"]) == filename:
+            del self._by_digest[previous["sha256"]]
+        self.files[filename] = entry
+        self._by_digest.setdefault(entry["sha256"], filename)
+        self.articles[page_key] = filename
+        self._changed()
+
+    def _changed(self) -> None:
+        self._unsaved += 1
+        if self._unsaved >= _SAVE_EVERY:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        self._unsaved = 0
+        if self.index_path is None:
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(
+            self.index_path,
+            json.dumps({"version": 1, "files": self.files, "articles": self.articles}, sort_keys=True) + "\n",
+        )
+
+    def save(self) -> None:
+        with self._lock:
+            self._save_locked()
+
+    def retain(self, filenames: set[str]) -> int:
+        """Delete every file except `filenames`; returns the number deleted."""
+        deleted = 0
+        with self._lock:
+            for path in self.directory.iterdir():
+                if path.is_file() and path.name not in filenames:
+                    path.unlink()
+                    deleted += 1
+            self.files = {name: entry for name, entry in self.files.items() if name in filenames}
+            self.articles = {key: name for key, name in self.articles.items() if name in filenames}
+            self._by_digest = {entry["sha256"]: name for name, entry in self.files.items()}
+            self._save_locked()
+        return deleted
@@ -0,0 +1,73 @@
+"""Canonical topic keys shared by pack builders and subset tools.
+
+`infer_topic` is the single definition of the topic a card belongs to: the
+shard topic counts `build_pack` writes into manifests must agree with what
+`build_topic_subset` filters on.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+
+STABLE_TOPICS = frozenset(
+    {
+        "science",
+        "technology",
+        "history",
+        "geography",
+        "culture",
+        "politics",
+        "economics",
+        "sports",
+        "health",
+        "environment",
+        "society",
+        "biography",
+    }
+)
+
+
+def normalize_token(value: str) -> str:
+    text = unicodedata.normalize("NFKC", value).casefold().strip()
+    text = text.replace("_", "-").replace(" ", "-")
+    text = re.sub(r"-+", "-", text)
+    return text
+
+
+def canonical_topic(raw_topic: str) -> str:
+    normalized = normalize_token(raw_topic)
+    if normalized == "history-of":
+        return "history"
+    if normalized == "geography-of":
+        return "geography"
+    if normalized == "economy-of":
+        return "economics"
+    if normalized == "list-of":
+        return "culture"
+    return normalized
+
+
+def infer_topic(title: str, summary: str, raw_topic: str) -> str:
+    canonical = canonical_topic(raw_topic)
+    if canonical in STABLE_TOPICS:
+        return canonical
+
+    text = f"{title} {summary}".lower()
+    rules: list[tuple[str, tuple[str, ...]]] = [
+        ("biography", ("born", "died", "actor", "author", "scientist", "politician", "player")),
+        ("history", ("empire", "war", "century", "kingdom", "revolution", "historical")),
+        ("science", ("physics", "chemistry", "biology", "mathematics", "astronomy", "scientific")),
+        ("technology", ("software", "computer", "internet", "digital", "algorithm", "device")),
+        ("geography", ("river", "mountain", "city", "country", "region", "province", "capital")),
+        ("politics", ("election", "government", "parliament", "minister", "policy", "party")),
+        ("economics", ("economy", "market", "trade", "finance", "currency", "industry")),
+        ("health", ("disease", "medical", "medicine", "health", "hospital", "symptom")),
+        ("sports", ("football", "basketball", "olympic", "league", "athlete", "championship")),
+        ("environment", ("climate", "ecology", "forest", "wildlife", "pollution", "conservation")),
+        ("culture", ("music", "film", "literature", "art", "religion", "language")),
+    ]
+    for topic, keywords in rules:
+        if any(keyword in text for keyword in keywords):
+            return topic
+    return "general"
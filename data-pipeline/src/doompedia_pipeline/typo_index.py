@@ -0,0 +1,219 @@
+"""Symmetric-deletion typo index over a pack's search index.
+
+Two strings are within edit distance 1 only if one of them, or a
+one-character deletion of each, coincide. The index therefore stores a
+64-bit hash of every normalized title and of each of its single-character
+deletions. A lookup probes the query and its deletions, a handful of hash
+probes whatever the pack size, and returns title positions in the paired
+`search-index.bin`. Those positions are a superset of the true neighbours
+(hash collisions, transpositions), so callers still verify edit distance.
+All integers are little-endian:
+
+    header     magic "DPTI", version, slot bits, entry count, title count,
+               section offsets, sha256 of the paired search index
+    directory  (2**slot_bits + 1) u64 entry offsets, one slot per top-bits hash prefix
+    entries    u64 (top 32 hash bits << 32 | title position), sorted
+
+Building spills hash entries into partitions on disk, so memory stays bounded
+by one partition rather than the whole deletion neighbourhood.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+
+from .atomic_io import DirectorySync, atomic_open
+from .search_index import SEARCH_INDEX_NAME, SearchIndex, record_pack_artifact
+
+TYPO_INDEX_NAME = "typo-index.bin"
+TYPO_INDEX_FORMAT = "doompedia-typo-v1"
+MAGIC = b"DPTI"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sIIIQQQQ32s")
+_OFFSET = struct.Struct("<Q")
+_PARTITION_BITS = 4
+_SPILL_ENTRIES = 1 << 20
+
+
+def deletion_neighbourhood(text: str) -> set[str]:
+    """`text` and every string one character deletion away from it."""
+    return {text, *(text[:i] + text[i + 1 :] for i in range(len(text)))}
+
+
+def key_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _slot_bits(entries: int) -> int:
+    """About four entries per slot."""
+    return min(28, (entries // 4).bit_length())
+
+
+def write_typo_index(search_index_path: Path, path: Path, sync: DirectorySync | None = None) -> dict[str, object]:
+    """Index every title of `search_index_path` into `path`; returns the manifest entry."""
+    search_digest = hashlib.sha256()
+    with search_index_path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            search_digest.update(chunk)
+    search_sha256 = search_digest.digest()
+    partitions = 1 << _PARTITION_BITS
+    with SearchIndex(search_index_path) as index, tempfile.TemporaryDirectory(dir=path.parent) as spill_dir:
+        spill_paths = [Path(spill_dir) / f"partition-{number:02d}.bin" for number in range(partitions)]
+        buffers = [array("Q") for _ in range(partitions)]
+        total = 0
+
+        def spill(number: int) -> None:
+            with spill_paths[number].open("ab") as handle:
+                buffers[number].tofile(handle)
+            del buffers[number][:]
+
+        for position in range(index.titles):
+            title = index.title(position)[1].decode("utf-8")
+            for key in deletion_neighbourhood(title):
+                top = key_hash(key) >> 32
+                number = top >> (32 - _PARTITION_BITS)
+                buffers[number].append(top << 32 | position)
+                total += 1
+                if len(buffers[number]) >= _SPILL_ENTRIES:
+                    spill(number)
+        for number in range(partitions):
+            spill(number)
+
+        slot_bits = _slot_bits(total)
+        directory = array("Q", [0]) * ((1 << slot_bits) + 1)
+        sorted_paths = []
+        # Partitions split on the top hash bits, so sorted partitions concatenate into one sorted run.
+        for number, spill_path in enumerate(spill_paths):
+            entries = array("Q")
+            with spill_path.open("rb") as handle:
+                entries.frombytes(handle.read())
+            entries = array("Q", sorted(entries))
+            for value in entries:
+                directory[(value >> 32 >> (32 - slot_bits)) + 1 if slot_bits else 1] += 1
+            sorted_path = Path(spill_dir) / f"sorted-{number:02d}.bin"
+            with sorted_path.open("wb") as handle:
+                _write_le(handle, entries)
+            sorted_paths.append(sorted_path)
+            spill_path.unlink()
+        for slot in range(1, len(directory)):
+            directory[slot] += directory[slot - 1]
+
+        directory_at = _HEADER.size
+        entries_at = directory_at + len(directory) * _OFFSET.size
+        header = _HEADER.pack(MAGIC, VERSION, slot_bits, 0, total, index.titles, directory_at, entries_at, search_sha256)
+        digest = hashlib.sha256()
+        size = 0
+        with atomic_open(path, "wb", sync=sync) as out:
+            for chunk in (header, b"".join(_OFFSET.pack(offset) for offset in directory)):
+                out.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            for sorted_path in sorted_paths:
+                with sorted_path.open("rb") as handle:
+                    for chunk in iter(lambda: handle.read(1 << 20), b""):
+                        out.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+    return {
+        "url": path.name,
+        "sha256": digest.hexdigest(),
+        "bytes": size,
+        "format": TYPO_INDEX_FORMAT,
+        "keys": total,
+        "searchIndexSha256": search_sha256.hex(),
+    }
+
+
+def _write_le(handle, values: array) -> None:
+    if sys.byteorder != "little":
+        values = array("Q", values)
+        values.byteswap()
+    values.tofile(handle)
+
+
+class TypoIndex:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = path.open("rb")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.slot_bits, _, self.entries, self.titles, self._directory_at, self._entries_at, sha256 = (
+            _HEADER.unpack_from(self.data, 0)
+        )
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} typo index")
+        self.search_index_sha256 = sha256.hex()
+
+    def close(self) -> None:
+        self.data.close()
+        self._file.close()
+
+    def __enter__(self) -> TypoIndex:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _probe(self, key: str) -> list[int]:
+        top = key_hash(key) >> 32
+        slot = top >> (32 - self.slot_bits) if self.slot_bits else 0
+        start, end = struct.unpack_from("<QQ", self.data, self._directory_at + slot * _OFFSET.size)
+        matches = []
+        for (value,) in struct.iter_unpack("<Q", self.data[self._entries_at + start * 8 : self._entries_at + end * 8]):
+            if value >> 32 == top:
+                matches.append(value & 0xFFFFFFFF)
+        return matches
+
+    def neighbours(self, query: str) -> set[int]:
+        """Search-index positions of titles that may be within edit distance 1 of `query`."""
+        positions: set[int] = set()
+        for key in deletion_neighbourhood(query):
+            positions.update(self._probe(key))
+        return positions
+
+
+def index_pack_typos(pack_dir: Path) -> dict[str, object]:
+    """Build the typo index for a pack that has a search index and record it in its manifest."""
+    manifest_path = pack_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    search_entry = manifest.get("searchIndex")
+    if not isinstance(search_entry, dict):
+        raise ValueError(f"{pack_dir} has no searchIndex; build it first")
+    entry = write_typo_index(pack_dir / str(search_entry["url"]).split("/")[-1], pack_dir / TYPO_INDEX_NAME)
+    record_pack_artifact(pack_dir, "typoIndex", entry)
+    return entry
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"Build the deletion-neighbourhood typo index for a pack's {SEARCH_INDEX_NAME}")
+    parser.add_argument("--pack", required=True, help="Pack directory whose manifest.json has a searchIndex")
+    return parser.parse_args()
+
+
+def _log(message: str) -> None:
+    print(f"[typo_index] {message}", file=sys.stderr, flush=True)
+
+
+def main() -> None:
+    args = parse_args()
+    start = time.monotonic()
+    try:
+        entry = index_pack_typos(Path(args.pack))
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    _log(f"Indexed {entry['keys']:,} deletion keys ({entry['bytes']:,} bytes) in {time.monotonic() - start:.1f}s")
+    print(json.dumps(entry, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,29 @@
 from __future__ import annotations
 
 import argparse
+import bisect
+import concurrent.futures
 import gzip
+import hashlib
+import heapq
 import json
+import os
+import re
+import time
+import zlib
+from array import array
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
+
+from .build_pack import PACK_ARTIFACTS
+from .normalize import normalize_title
+from .precompress import sibling_path
+
+_READ_BLOCK = 8 * 1024 * 1024
+_PAGE_ID_RE = re.compile(rb'"page_id"\s*:\s*(\d+)')
+_MAX_DEEP_ERRORS = 50
+_ARTICLE_STRING_FIELDS = ("lang", "title", "normalized_title", "summary", "wiki_url", "topic_key", "updated_at")
 
 
 def parse_args() -> argparse.Namespace:
@@ -14,7 +34,40 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Count actual NDJSON lines in every shard (slower but stronger verification)",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--spot-check",
+        type=int,
+        action="append",
+        default=[],
+        metavar="PAGE_ID",
+        help="Confirm a page id is present, reading only the shard(s) whose page-id range covers it",
+    )
+    parser.add_argument(
+        "--verify-hashes",
+        action="store_true",
+        help="Hash every shard and the delta and compare against manifest.json and checksums.txt",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 4,
+        help="Parallel file scans for --verify-hashes/--count-lines, worker processes for --deep",
+    )
+    parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="Validate rows against the shardRow contract and detect duplicate page ids across shards",
+    )
+    parser.add_argument(
+        "--sample-rate",
+        type=float,
+        default=1.0,
+        help="Fraction of rows --deep validates field by field (duplicate detection always covers every row)",
+    )
+    args = parser.parse_args()
+    if not 0.0 < args.sample_rate <= 1.0:
+        parser.error("--sample-rate must be greater than 0 and at most 1")
+    return args
 
 
 def _open_text(path: Path):
@@ -23,7 +76,338 @@ def _open_text(path: Path):
     return path.open("r", encoding="utf-8")
 
 
-def verify_pack(manifest_path: Path, count_lines: bool) -> dict[str, object]:
+@dataclass(slots=True)
+class FileScan:
+    path: Path
+    bytes: int
+    sha256: str | None
+    lines: int | None
+
+
+def _count_gzip_lines(decompressor: Any, chunk: bytes) -> tuple[Any, int, bytes]:
+    """Feed `chunk` through a (possibly multi-member) gzip stream and count newlines."""
+    lines = 0
+    tail = b""
+    data = chunk
+    while data:
+        output = decompressor.decompress(data)
+        lines += output.count(b"\n")
+        if output:
+            tail = output[-1:]
+        if not decompressor.eof:
+            break
+        data = decompressor.unused_data
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    return decompressor, lines, tail
+
+
+def scan_file(path: Path, want_hash: bool, want_lines: bool) -> FileScan:
+    """Hash and/or count NDJSON records in one pass of large raw reads.
+
+    Lines are counted on bytes (decompressed for `.gz`), never decoded text;
+    a final line without a trailing newline still counts as a record.
+    """
+    hasher = hashlib.sha256() if want_hash else None
+    is_gzip = path.suffix == ".gz"
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    lines = 0
+    size = 0
+    last_byte = b""
+    with path.open("rb", buffering=0) as handle:
+        while True:
+            chunk = handle.read(_READ_BLOCK)
+            if not chunk:
+                break
+            size += len(chunk)
+            if hasher is not None:
+                hasher.update(chunk)
+            if not want_lines:
+                continue
+            if is_gzip:
+                decompressor, counted, tail = _count_gzip_lines(decompressor, chunk)
+                lines += counted
+                last_byte = tail or last_byte
+            else:
+                lines += chunk.count(b"\n")
+                last_byte = chunk[-1:]
+    if want_lines and last_byte and last_byte != b"\n":
+        lines += 1
+    return FileScan(
+        path=path,
+        bytes=size,
+        sha256=hasher.hexdigest() if hasher is not None else None,
+        lines=lines if want_lines else None,
+    )
+
+
+def verify_blocks(shard_path: Path, index_path: Path, index_sha256: str, records: int) -> list[str]:
+    """Check a shard's block index: its digest, block digests and full coverage of the file."""
+    if not index_path.exists():
+        return [f"block index {index_path.name} is missing"]
+    index_body = index_path.read_bytes()
+    if hashlib.sha256(index_body).hexdigest() != index_sha256:
+        return [f"block index {index_path.name} does not match its manifest sha256"]
+    blocks = json.loads(index_body)["blocks"]
+
+    problems: list[str] = []
+    offset = 0
+    first_record = 0
+    with shard_path.open("rb") as handle:
+        for number, block in enumerate(blocks):
+            if int(block["offset"]) != offset or int(block["firstRecord"]) != first_record:
+                problems.append(f"block {number} does not start where block {number - 1} ends")
+            handle.seek(int(block["offset"]))
+            data = handle.read(int(block["bytes"]))
+            if hashlib.sha256(data).hexdigest() != block["sha256"]:
+                problems.append(f"block {number} sha256 mismatch")
+            offset = int(block["offset"]) + int(block["bytes"])
+            first_record = int(block["firstRecord"]) + int(block["records"])
+    if offset != shard_path.stat().st_size:
+        problems.append(f"blocks cover {offset} bytes of {shard_path.stat().st_size}")
+    if first_record != records:
+        problems.append(f"blocks cover {first_record} records of {records}")
+    return problems
+
+
+def _read_checksums(path: Path) -> dict[str, str]:
+    if not path.exists():
+        return {}
+    checksums: dict[str, str] = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        digest, _, name = line.strip().partition("  ")
+        if digest and name:
+            checksums[name.split("/")[-1]] = digest
+    return checksums
+
+
+def validate_row(row: Any, language: str) -> list[str]:
+    """Return contract violations for one decoded shard row.
+
+    Mirrors `$defs/shardRow` in `shared-spec/pack-manifest.schema.json`, which
+    is what the app importers deserialize into `ShardRow`/`ShardArticle`.
+    """
+    if not isinstance(row, dict):
+        return ["row is not an object"]
+    article = row.get("article")
+    if not isinstance(article, dict):
+        return ["missing article object"]
+
+    problems: list[str] = []
+    page_id = article.get("page_id")
+    if isinstance(page_id, bool) or not isinstance(page_id, int) or page_id < 1:
+        problems.append(f"page_id must be a positive integer, got {page_id!r}")
+    for field_name in _ARTICLE_STRING_FIELDS:
+        if not isinstance(article.get(field_name), str):
+            problems.append(f"{field_name} must be a string")
+    if isinstance(article.get("lang"), str) and article["lang"] != language:
+        problems.append(f"lang {article['lang']!r} does not match pack language {language!r}")
+    if isinstance(article.get("title"), str):
+        if not article["title"].strip():
+            problems.append("title is empty")
+        elif isinstance(article.get("normalized_title"), str) and article["normalized_title"] != normalize_title(
+            article["title"]
+        ):
+            problems.append("normalized_title does not match normalize_title(title)")
+    if isinstance(article.get("summary"), str) and not article["summary"].strip():
+        problems.append("summary is empty")
+    quality = article.get("quality_score")
+    if isinstance(quality, bool) or not isinstance(quality, (int, float)):
+        problems.append("quality_score must be a number")
+    rev_id = article.get("source_rev_id")
+    if rev_id is not None and (isinstance(rev_id, bool) or not isinstance(rev_id, int)):
+        problems.append("source_rev_id must be an integer or null")
+    if not isinstance(article.get("is_disambiguation", False), (bool, int, str)):
+        problems.append("is_disambiguation must be a boolean")
+    aliases = row.get("aliases", [])
+    if not isinstance(aliases, list) or not all(isinstance(alias, str) for alias in aliases):
+        problems.append("aliases must be a list of strings")
+    return problems
+
+
+def _sampled(line: bytes, sample_rate: float) -> bool:
+    # Hash the row itself so the same rows are picked on every run and machine.
+    return sample_rate >= 1.0 or zlib.crc32(line) < sample_rate * 0x1_0000_0000
+
+
+def _deep_scan_shard(shard_path: str, language: str, sample_rate: float) -> dict[str, Any]:
+    """Validate one shard in a worker process.
+
+    Page ids are returned as a sorted `array('q')` so the parent can find
+    duplicates across shards with a single k-way merge.
+    """
+    path = Path(shard_path)
+    page_ids = array("q")
+    rows = 0
+    validated = 0
+    invalid = 0
+    errors: list[dict[str, Any]] = []
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            rows += 1
+            problems: list[str] = []
+            page_id: int | None = None
+            if _sampled(line, sample_rate):
+                validated += 1
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    problems = [f"invalid JSON: {exc}"]
+                else:
+                    problems = validate_row(row, language)
+                    article = row.get("article") if isinstance(row, dict) else None
+                    if isinstance(article, dict) and type(article.get("page_id")) is int:
+                        page_id = article["page_id"]
+            else:
+                match = _PAGE_ID_RE.search(line)
+                if match:
+                    page_id = int(match.group(1))
+            if page_id is not None:
+                page_ids.append(page_id)
+            if problems:
+                invalid += 1
+                if len(errors) < _MAX_DEEP_ERRORS:
+                    errors.append({"file": path.name, "line": line_number, "pageId": page_id, "problems": problems})
+    ordered = array("q", sorted(page_ids))
+    return {
+        "file": path.name,
+        "rows": rows,
+        "validated": validated,
+        "invalid": invalid,
+        "errors": errors,
+        "minPageId": ordered[0] if ordered else None,
+        "maxPageId": ordered[-1] if ordered else None,
+        "pageIds": ordered,
+    }
+
+
+def _find_duplicates(sorted_ids: list[array]) -> tuple[int, list[int]]:
+    count = 0
+    samples: list[int] = []
+    previous: int | None = None
+    reported: int | None = None
+    for page_id in heapq.merge(*sorted_ids):
+        if page_id == previous and page_id != reported:
+            count += 1
+            reported = page_id
+            if len(samples) < _MAX_DEEP_ERRORS:
+                samples.append(page_id)
+        previous = page_id
+    return count, samples
+
+
+def deep_validate(
+    present: list[tuple[dict[str, object], Path]],
+    language: str,
+    sample_rate: float = 1.0,
+    workers: int = 4,
+) -> dict[str, Any]:
+    """Validate every shard row and check per-shard metadata against the content."""
+    if not 0.0 < sample_rate <= 1.0:
+        raise ValueError(f"sample rate must be in (0, 1], got {sample_rate}")
+    start = time.monotonic()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(_deep_scan_shard, str(path), language, sample_rate)
+            for _, path in present
+        ]
+        results = [future.result() for future in futures]
+
+    errors: list[dict[str, Any]] = []
+    shard_mismatches: list[dict[str, Any]] = []
+    for (shard, _), result in zip(present, results):
+        errors.extend(result["errors"][: _MAX_DEEP_ERRORS - len(errors)])
+        actual = {"records": result["rows"], "minPageId": result["minPageId"], "maxPageId": result["maxPageId"]}
+        for field_name, value in actual.items():
+            if field_name in shard and shard[field_name] != value:
+                shard_mismatches.append(
+                    {"shard": shard.get("id"), "field": field_name, "declared": shard[field_name], "actual": value}
+                )
+    duplicate_count, duplicate_samples = _find_duplicates([result["pageIds"] for result in results])
+
+    return {
+        "sampleRate": sample_rate,
+        "rows": sum(result["rows"] for result in results),
+        "validatedRows": sum(result["validated"] for result in results),
+        "invalidRows": sum(result["invalid"] for result in results),
+        "errors": errors,
+        "duplicatePageIds": duplicate_count,
+        "duplicateSamples": duplicate_samples,
+        "shardMismatches": shard_mismatches,
+        "elapsedSeconds": round(time.monotonic() - start, 3),
+    }
+
+
+def locate_shards(manifest: dict[str, object], page_id: int) -> list[dict[str, object]]:
+    """Return the shards whose `minPageId`/`maxPageId` range covers `page_id`.
+
+    Packs built with `shardOrder: page_id` have disjoint ranges, so at most one
+    shard is returned via binary search. Older manifests without ranges fall
+    back to every shard.
+    """
+    shards = list(manifest.get("shards", []))
+    if not all("minPageId" in shard and "maxPageId" in shard for shard in shards):
+        return shards
+    if manifest.get("shardOrder") == "page_id":
+        index = bisect.bisect_right([int(shard["minPageId"]) for shard in shards], page_id) - 1
+        if index >= 0 and page_id <= int(shards[index]["maxPageId"]):
+            return [shards[index]]
+        return []
+    return [
+        shard
+        for shard in shards
+        if int(shard["minPageId"]) <= page_id <= int(shard["maxPageId"])
+    ]
+
+
+def _local_path(pack_dir: Path, url: str, fallback_dir: Path | None = None) -> Path:
+    """Resolve a manifest `url` against the manifest dir, like a client would.
+
+    Content-addressed publishes point outside the pack (`../../../objects/<sha>`);
+    absolute or stale urls fall back to the file name under `fallback_dir`.
+    """
+    if url and "://" not in url:
+        direct = pack_dir / url
+        if direct.exists():
+            return direct
+    return (fallback_dir or pack_dir) / url.split("/")[-1]
+
+
+def _shard_path(pack_dir: Path, shard: dict[str, object]) -> Path:
+    return _local_path(pack_dir, str(shard.get("url", "")), pack_dir / "shards")
+
+
+def _sidecar_path(pack_dir: Path, shard_path: Path, sidecar: dict[str, object]) -> Path:
+    return _local_path(pack_dir, str(sidecar.get("url", "")), shard_path.parent)
+
+
+def _spot_check(pack_dir: Path, manifest: dict[str, object], page_id: int) -> dict[str, object]:
+    scanned: list[str] = []
+    for shard in locate_shards(manifest, page_id):
+        shard_path = _shard_path(pack_dir, shard)
+        if not shard_path.exists():
+            continue
+        scanned.append(str(shard.get("id")))
+        with _open_text(shard_path) as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                if int(json.loads(line)["article"]["page_id"]) == page_id:
+                    return {"pageId": page_id, "found": True, "shard": shard.get("id"), "scannedShards": scanned}
+    return {"pageId": page_id, "found": False, "shard": None, "scannedShards": scanned}
+
+
+def verify_pack(
+    manifest_path: Path,
+    count_lines: bool,
+    spot_check_ids: list[int] | None = None,
+    verify_hashes: bool = False,
+    workers: int = 4,
+    deep: bool = False,
+    sample_rate: float = 1.0,
+) -> dict[str, object]:
     manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
     pack_dir = manifest_path.parent
     shards = manifest.get("shards", [])
@@ -32,24 +416,122 @@ def verify_pack(manifest_path: Path, count_lines: bool) -> dict[str, object]:
     missing: list[str] = []
     declared_sum = 0
     actual_sum = 0
+    present: list[tuple[dict[str, object], Path]] = []
 
     for shard in shards:
-        shard_url = str(shard.get("url", ""))
-        shard_name = shard_url.split("/")[-1]
-        shard_path = pack_dir / "shards" / shard_name
+        shard_path = _shard_path(pack_dir, shard)
         if not shard_path.exists():
-            missing.append(shard_name)
+            missing.append(shard_path.name)
             continue
 
         declared_records = int(shard.get("records", 0))
         declared_sum += declared_records
+        present.append((shard, shard_path))
+
+    # Expected digests per file: manifest entries plus checksums.txt.
+    expected: list[tuple[Path, str, int | None, str]] = []
+    if verify_hashes:
+        checksums = _read_checksums(pack_dir / "checksums.txt")
+        for shard, shard_path in present:
+            expected.append((shard_path, str(shard.get("sha256", "")), int(shard.get("bytes", 0)), "manifest"))
+            if shard_path.name in checksums:
+                expected.append((shard_path, checksums[shard_path.name], None, "checksums.txt"))
+            for encoding, variant in dict(shard.get("encodings") or {}).items():
+                expected.append(
+                    (
+                        sibling_path(shard_path, encoding),
+                        str(variant.get("sha256", "")),
+                        int(variant.get("bytes", 0)),
+                        f"encodings.{encoding}",
+                    )
+                )
+            for key in ("topicIndex", "featureIndex"):
+                sidecar = shard.get(key)
+                if isinstance(sidecar, dict):
+                    expected.append(
+                        (
+                            _sidecar_path(pack_dir, shard_path, sidecar),
+                            str(sidecar.get("sha256", "")),
+                            int(sidecar["bytes"]) if "bytes" in sidecar else None,
+                            key,
+                        )
+                    )
+        delta = manifest.get("delta")
+        if isinstance(delta, dict) and delta.get("url"):
+            delta_path = _local_path(pack_dir, str(delta["url"]))
+            expected.append((delta_path, str(delta.get("sha256", "")), None, "manifest"))
+        for key in PACK_ARTIFACTS:
+            artifact = manifest.get(key)
+            if isinstance(artifact, dict) and artifact.get("url"):
+                artifact_path = _local_path(pack_dir, str(artifact["url"]))
+                size = int(artifact["bytes"]) if "bytes" in artifact else None
+                expected.append((artifact_path, str(artifact.get("sha256", "")), size, key))
+
+    scans: dict[Path, FileScan] = {}
+    scan_paths = list(
+        dict.fromkeys(
+            [path for _, path in present if count_lines]
+            + [path for path, *_ in expected if path.exists()]
+        )
+    )
+    start = time.monotonic()
+    if scan_paths:
+        shard_paths = {path for _, path in present}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [
+                executor.submit(scan_file, path, verify_hashes, count_lines and path in shard_paths)
+                for path in scan_paths
+            ]
+            for future in futures:
+                scan = future.result()
+                scans[scan.path] = scan
+    elapsed = time.monotonic() - start
+
+    if count_lines:
+        actual_sum = sum(scans[path].lines or 0 for _, path in present)
+
+    hash_mismatches: list[dict[str, object]] = []
+    for path, digest, size, source in expected:
+        scan = scans.get(path)
+        if scan is None or scan.sha256 != digest or (size is not None and scan.bytes != size):
+            hash_mismatches.append(
+                {
+                    "file": path.name,
+                    "source": source,
+                    "expectedSha256": digest,
+                    "actualSha256": scan.sha256 if scan else None,
+                    "expectedBytes": size,
+                    "actualBytes": scan.bytes if scan else None,
+                }
+            )
 
-        if count_lines:
-            with _open_text(shard_path) as fh:
-                actual_sum += sum(1 for _ in fh)
+    block_mismatches: list[dict[str, object]] = []
+    indexed = [(shard, path) for shard, path in present if isinstance(shard.get("blockIndex"), dict)]
+    if verify_hashes and indexed:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(
+                    verify_blocks,
+                    path,
+                    _sidecar_path(pack_dir, path, shard["blockIndex"]),
+                    str(shard["blockIndex"].get("sha256", "")),
+                    int(shard.get("records", 0)),
+                ): shard
+                for shard, path in indexed
+            }
+            for future, shard in futures.items():
+                for problem in future.result():
+                    block_mismatches.append({"shard": shard.get("id"), "problem": problem})
 
+    scanned_bytes = sum(scan.bytes for scan in scans.values())
     status = "ok"
     messages: list[str] = []
+    if hash_mismatches:
+        status = "failed"
+        messages.append(f"Hash mismatches: {len(hash_mismatches)}")
+    if block_mismatches:
+        status = "failed"
+        messages.append(f"Block index problems: {len(block_mismatches)}")
     if missing:
         status = "failed"
         messages.append(f"Missing shards: {len(missing)}")
@@ -64,6 +546,25 @@ def verify_pack(manifest_path: Path, count_lines: bool) -> dict[str, object]:
             f"Actual line count mismatch: recordCount={expected_record_count}, actualLineSum={actual_sum}"
         )
 
+    deep_result = None
+    if deep:
+        deep_result = deep_validate(present, str(manifest.get("language", "")), sample_rate, workers)
+        if deep_result["invalidRows"]:
+            status = "failed"
+            messages.append(f"Invalid rows: {deep_result['invalidRows']}")
+        if deep_result["duplicatePageIds"]:
+            status = "failed"
+            messages.append(f"Duplicate page ids across shards: {deep_result['duplicatePageIds']}")
+        if deep_result["shardMismatches"]:
+            status = "failed"
+            messages.append(f"Shard metadata mismatches: {len(deep_result['shardMismatches'])}")
+
+    spot_checks = [_spot_check(pack_dir, manifest, page_id) for page_id in spot_check_ids or []]
+    not_found = [check["pageId"] for check in spot_checks if not check["found"]]
+    if not_found:
+        status = "failed"
+        messages.append(f"Spot-check page ids not found: {not_found}")
+
     return {
         "status": status,
         "packId": manifest.get("packId"),
@@ -73,13 +574,33 @@ def verify_pack(manifest_path: Path, count_lines: bool) -> dict[str, object]:
         "declaredShardRecordSum": declared_sum,
         "actualShardLineSum": actual_sum if count_lines else None,
         "missingShards": missing,
+        "spotChecks": spot_checks,
+        "hashMismatches": hash_mismatches if verify_hashes else None,
+        "blockMismatches": block_mismatches if verify_hashes else None,
+        "deep": deep_result,
+        "scan": {
+            "files": len(scans),
+            "bytes": scanned_bytes,
+            "elapsedSeconds": round(elapsed, 3),
+            "throughputMBps": round(scanned_bytes / 1024 / 1024 / elapsed, 1) if elapsed > 0 else None,
+        }
+        if scans
+        else None,
         "messages": messages,
     }
 
 
 def main() -> None:
     args = parse_args()
-    result = verify_pack(Path(args.manifest), count_lines=args.count_lines)
+    result = verify_pack(
+        Path(args.manifest),
+        count_lines=args.count_lines,
+        spot_check_ids=args.spot_check,
+        verify_hashes=args.verify_hashes,
+        workers=args.workers,
+        deep=args.deep,
+        sample_rate=args.sample_rate,
+    )
     print(json.dumps(result, indent=2))
     if result["status"] != "ok":
         raise SystemExit(1)
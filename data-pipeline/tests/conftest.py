@@ -0,0 +1,56 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Iterable
+
+import pytest
+
+from doompedia_pipeline import build_pack
+
+
+def synthetic_card(page_id: int, **fields: object) -> dict[str, object]:
+    """A card row that passes build_pack's filters; `fields` replace any column."""
+    return {
+        "page_id": page_id,
+        "lang": "en",
+        "title": f"Card {page_id}",
+        "summary": f"Card {page_id} is a synthetic summary long enough to pass the clamp filter.",
+        "wiki_url": f"https://en.wikipedia.org/wiki/Card_{page_id}",
+        "topic_key": "general",
+        **fields,
+    }
+
+
+@pytest.fixture
+def pack_args(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Callable[..., argparse.Namespace]:
+    """Build `build_pack` arguments from its CLI defaults plus overrides.
+
+    `make(cards, output, **overrides)` first writes `cards` to
+    `tmp_path / "cards.ndjson"` (page ids or partial rows, filled in by
+    `synthetic_card`); pass `None` to keep the cards already written.
+    `output` is relative to `tmp_path`.
+    """
+    source = tmp_path / "cards.ndjson"
+
+    def make(
+        cards: Iterable[int | dict[str, object]] | None = None,
+        output: str | Path = "pack",
+        **overrides: object,
+    ) -> argparse.Namespace:
+        if cards is not None:
+            rows = [synthetic_card(card) if isinstance(card, int) else synthetic_card(**card) for card in cards]
+            source.write_text(
+                "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows),
+                encoding="utf-8",
+            )
+        argv = ["build_pack", "--input", str(source), "--output", str(tmp_path / output), "--pack-id", "en-test"]
+        monkeypatch.setattr(sys, "argv", [*argv, "--progress-every", "0"])
+        args = build_pack.parse_args()
+        unknown = set(overrides) - set(vars(args))
+        if unknown:
+            raise TypeError(f"build_pack has no arguments {sorted(unknown)}")
+        vars(args).update(overrides)
+        return args
+
+    return make
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pytest
+
+from doompedia_pipeline.atomic_io import DirectorySync, atomic_copy, atomic_open, atomic_write_text
+
+
+def test_atomic_open_keeps_previous_file_on_failure(tmp_path: Path) -> None:
+    target = tmp_path / "shard-0001.ndjson"
+    target.write_text("complete\n", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with atomic_open(target, "w", encoding="utf-8") as handle:
+            handle.write("partial")
+            raise RuntimeError("simulated crash")
+
+    assert target.read_text(encoding="utf-8") == "complete\n"
+    assert [path.name for path in tmp_path.iterdir()] == ["shard-0001.ndjson"]
+
+
+def test_batched_sync_writes_and_copies(tmp_path: Path) -> None:
+    sync = DirectorySync()
+    source = tmp_path / "manifest.json"
+    atomic_write_text(source, "{}", sync=sync)
+    atomic_copy(source, tmp_path / "copy.json", sync=sync)
+    sync.flush()
+
+    assert (tmp_path / "copy.json").read_text(encoding="utf-8") == "{}"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["copy.json", "manifest.json"]
@@ -2,6 +2,9 @@ import gzip
 import json
 from pathlib import Path
 
+import pytest
+
+from doompedia_pipeline import build_en_1m_from_sql as sql_module
 from doompedia_pipeline.build_en_1m_from_sql import (
     _parse_sql_values,
     build_cards,
@@ -57,3 +60,57 @@ def test_build_cards_from_small_sql_dumps(tmp_path: Path) -> None:
     assert len(rows) == 2
     assert rows[0]["title"] == "Ada Lovelace"
     assert rows[0]["wiki_url"].startswith("https://en.wikipedia.org/wiki/")
+
+
+def test_build_cards_resumes_write_phase(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    page_sql = tmp_path / "page.sql.gz"
+    props_sql = tmp_path / "page_props.sql.gz"
+    ids = range(1, 7)
+    with gzip.open(page_sql, "wt", encoding="utf-8") as fh:
+        fh.write(
+            "INSERT INTO `page` VALUES "
+            + ",".join(f"({page_id},0,'Page_{page_id}','',0,0,0,'',NULL,0,0,'wikitext',NULL)" for page_id in ids)
+            + ";\n"
+        )
+    with gzip.open(props_sql, "wt", encoding="utf-8") as fh:
+        fh.write(
+            "INSERT INTO `page_props` VALUES "
+            + ",".join(
+                f"({page_id},'wikibase-shortdesc','Synthetic description number {page_id} for resume coverage',NULL)"
+                for page_id in ids
+            )
+            + ";\n"
+        )
+    options = {"language": "en", "target": 6, "oversample": 1.0}
+
+    clean = tmp_path / "clean.ndjson"
+    build_cards(page_sql_gz=page_sql, page_props_sql_gz=props_sql, output_ndjson=clean, **options)
+
+    original = sql_module._stabilize_summary
+    calls = {"count": 0}
+
+    def crash_on_fifth_card(**kwargs: str):
+        calls["count"] += 1
+        if calls["count"] == 5:
+            raise RuntimeError("simulated crash")
+        return original(**kwargs)
+
+    out = tmp_path / "cards.ndjson"
+    monkeypatch.setattr(sql_module, "_stabilize_summary", crash_on_fifth_card)
+    with pytest.raises(RuntimeError):
+        build_cards(page_sql_gz=page_sql, page_props_sql_gz=props_sql, output_ndjson=out, checkpoint_every=2, **options)
+
+    monkeypatch.setattr(sql_module, "_stabilize_summary", original)
+    monkeypatch.setattr(sql_module, "collect_candidate_pages", lambda **_: pytest.fail("page dump re-read"))
+    summary = build_cards(
+        page_sql_gz=page_sql,
+        page_props_sql_gz=props_sql,
+        output_ndjson=out,
+        checkpoint_every=2,
+        resume=True,
+        **options,
+    )
+
+    assert summary["written"] == 6
+    assert out.read_bytes() == clean.read_bytes()
+    assert not out.with_name("cards.ndjson.checkpoint").exists()
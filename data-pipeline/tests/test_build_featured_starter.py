@@ -1,6 +1,94 @@
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
-from doompedia_pipeline.build_featured_starter import content_output_dir
+import pytest
+
+from doompedia_pipeline.build_featured_starter import (
+    ApiClient,
+    FeaturedArticle,
+    ThumbnailDownloader,
+    content_output_dir,
+    download_thumbnail,
+    fetch_articles,
+)
+from doompedia_pipeline.rate_limit import AdaptiveRateLimiter
+from doompedia_pipeline.thumbnail_store import ThumbnailStore
+
+
+class _FakeApi:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections: set[int] = set()
+        self.failed_once = False
+        self.throttled_once = False
+        self.lock = threading.Lock()
+
+
+def _handler(api: _FakeApi) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def _reply(self, status: int, body: bytes, headers: dict[str, str] | None = None) -> None:
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path.startswith("/thumb/"):
+                with api.lock:
+                    throttle = not api.throttled_once
+                    api.throttled_once = True
+                if throttle:
+                    self._reply(429, b"slow down", {"Retry-After": "0"})
+                else:
+                    self._reply(200, b"\xff\xd8fake-jpeg", {"Content-Type": "image/jpeg"})
+                return
+            query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+            titles = query["titles"].split("|")
+            with api.lock:
+                api.requests += 1
+                api.connections.add(self.client_address[1])
+                fail = titles[0] == "Title 040" and not api.failed_once
+                api.failed_once = api.failed_once or fail
+            if fail:
+                self._reply(503, b"busy", {"Retry-After": "0"})
+                return
+            # Earlier batches answer slower, so responses complete out of order.
+            time.sleep(0.05 if titles[0] == "Title 000" else 0.0)
+            pages = [
+                {
+                    "pageid": int(title.split()[1]) + 1,
+                    "title": title,
+                    "extract": f"{title} summary.",
+                    "pageimage": f"{title}.jpg",
+                    "thumbnail": {"source": f"https://upload.example/{title}.jpg"},
+                }
+                for title in titles
+            ]
+            self._reply(200, json.dumps({"query": {"pages": pages}}).encode("utf-8"))
+
+    return Handler
+
+
+@pytest.fixture()
+def fake_api():
+    api = _FakeApi()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(api))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield api, f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+    server.shutdown()
+    server.server_close()
 
 
 def test_content_output_dir_appends_content_to_assets_root() -> None:
@@ -9,3 +97,43 @@ def test_content_output_dir_appends_content_to_assets_root() -> None:
 
 def test_content_output_dir_accepts_content_directory() -> None:
     assert content_output_dir(Path("/tmp/android-assets/content")) == Path("/tmp/android-assets/content")
+
+
+def test_fetch_articles_keeps_order_over_pooled_concurrent_batches(fake_api) -> None:
+    api, url = fake_api
+    client = ApiClient(url, concurrency=3, backoff_seconds=0.01)
+    titles = [f"Title {index:03d}" for index in range(400)]
+
+    articles = fetch_articles(titles, client=client)
+
+    assert [article.title for article in articles] == titles
+    assert api.failed_once and client.retried == 1
+    assert api.requests == 11
+    assert client.pool.opened <= 3
+    assert len(api.connections) <= 3
+
+    limited = fetch_articles(titles, stop_after=50, client=client)
+    assert [article.title for article in limited] == titles[:80]
+
+
+def test_download_thumbnail_retries_throttled_requests(tmp_path: Path, fake_api) -> None:
+    api, url = fake_api
+    limiter = AdaptiveRateLimiter(rate=50, burst=2, max_concurrency=2)
+    downloader = ThumbnailDownloader(limiter)
+    article = FeaturedArticle(
+        page_id=7,
+        title="Moon",
+        summary="Moon summary.",
+        article_url="https://en.wikipedia.org/wiki/Moon",
+        image_title="Moon.jpg",
+        thumbnail_url=url.replace("/w/api.php", "/thumb/Moon.jpg"),
+    )
+
+    result = download_thumbnail(article, ThumbnailStore(tmp_path), downloader)
+
+    assert result["filename"] == "7-512.jpg"
+    assert (tmp_path / "7-512.jpg").read_bytes() == b"\xff\xd8fake-jpeg"
+    stats = downloader.snapshot()
+    assert stats["requests"] == 2 and stats["throttled"] == 1
+    assert stats["rate"] < 50
+    assert list(stats["connections"].values()) == [1]
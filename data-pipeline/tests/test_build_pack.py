@@ -0,0 +1,100 @@
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from doompedia_pipeline import build_pack as build_pack_module
+from doompedia_pipeline.build_pack import build_pack
+from doompedia_pipeline.verify_pack import locate_shards, verify_pack
+
+
+def _cards(page_ids: list[int]) -> list[dict[str, object]]:
+    return [{"page_id": page_id, "topic_key": "science" if page_id % 2 else "history"} for page_id in page_ids]
+
+
+def test_build_pack_records_page_id_ranges(pack_args) -> None:
+    manifest = build_pack(pack_args(_cards([5, 1, 9, 3]), shard_size=3))
+
+    assert manifest["shardOrder"] == "input"
+    assert [(shard["minPageId"], shard["maxPageId"]) for shard in manifest["shards"]] == [(1, 9), (3, 3)]
+
+
+def test_build_pack_sorted_by_page_id_spills_runs(tmp_path: Path, pack_args) -> None:
+    cards = _cards([42, 7, 19, 3, 88, 11, 64, 25])
+    manifest = build_pack(pack_args(cards, shard_size=3, order="page_id", sort_buffer=3, max_records=7))
+
+    assert manifest["recordCount"] == 7
+    assert [(shard["minPageId"], shard["maxPageId"]) for shard in manifest["shards"]] == [
+        (3, 11),
+        (19, 64),
+        (88, 88),
+    ]
+    assert [shard["id"] for shard in locate_shards(manifest, 25)] == ["shard-0002"]
+    assert locate_shards(manifest, 70) == []
+
+    result = verify_pack(tmp_path / "pack" / "manifest.json", count_lines=True, spot_check_ids=[64, 25])
+    assert result["status"] == "failed"
+    assert [check["found"] for check in result["spotChecks"]] == [True, False]
+    assert result["spotChecks"][1]["scannedShards"] == ["shard-0002"]
+
+
+def test_build_pack_reuses_unchanged_shards_from_previous_pack(tmp_path: Path, pack_args) -> None:
+    options = {"shard_size": 3, "compression": "gzip"}
+    previous = build_pack(pack_args(_cards([1, 2, 3, 4, 5, 6]), "v1", **options))
+    current = build_pack(pack_args(_cards([1, 2, 3, 4, 5, 7]), "v2", previous_pack=str(tmp_path / "v1"), **options))
+
+    assert current["shards"][0]["sha256"] == previous["shards"][0]["sha256"]
+    assert current["shards"][1]["contentSha256"] != previous["shards"][1]["contentSha256"]
+    reused = tmp_path / "v2" / "shards" / "shard-0001.ndjson.gz"
+    assert reused.samefile(tmp_path / "v1" / "shards" / "shard-0001.ndjson.gz")
+    assert not (tmp_path / "v2" / "shards" / "shard-0002.ndjson.gz").samefile(
+        tmp_path / "v1" / "shards" / "shard-0002.ndjson.gz"
+    )
+    assert verify_pack(tmp_path / "v2" / "manifest.json", count_lines=True)["status"] == "ok"
+
+
+def test_build_pack_resumes_from_checkpoint(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, pack_args) -> None:
+    options = {"shard_size": 3, "checkpoint_seconds": 0.0}
+    expected = build_pack(pack_args(_cards(list(range(1, 11))), "clean", **options))
+
+    original_write_shard = build_pack_module.write_shard
+
+    def crash_on_third_shard(**kwargs: object):
+        if kwargs["shard_index"] == 3:
+            raise RuntimeError("simulated crash")
+        return original_write_shard(**kwargs)
+
+    monkeypatch.setattr(build_pack_module, "write_shard", crash_on_third_shard)
+    with pytest.raises(RuntimeError):
+        build_pack(pack_args(None, "resumed", **options))
+    assert (tmp_path / "resumed" / build_pack_module.CHECKPOINT_NAME).exists()
+
+    monkeypatch.setattr(build_pack_module, "write_shard", original_write_shard)
+    resumed = build_pack(pack_args(None, "resumed", resume=True, **options))
+
+    assert resumed["shards"] == expected["shards"]
+    assert resumed["topicDistribution"] == expected["topicDistribution"]
+    assert not (tmp_path / "resumed" / build_pack_module.CHECKPOINT_NAME).exists()
+
+
+def test_build_pack_block_index_supports_range_reads(tmp_path: Path, pack_args) -> None:
+    pack = tmp_path / "pack"
+    manifest = build_pack(pack_args(_cards(list(range(1, 11))), shard_size=10, compression="gzip", block_size=600))
+
+    shard = manifest["shards"][0]
+    index = json.loads((pack / shard["blockIndex"]["url"]).read_text(encoding="utf-8"))
+    assert shard["blockIndex"]["blocks"] == len(index["blocks"]) > 1
+    assert sum(block["records"] for block in index["blocks"]) == 10
+    shard_bytes = (pack / shard["url"]).read_bytes()
+    assert gzip.decompress(shard_bytes).count(b"\n") == 10
+    last = index["blocks"][-1]
+    tail = gzip.decompress(shard_bytes[last["offset"] : last["offset"] + last["bytes"]])
+    assert json.loads(tail.splitlines()[-1])["article"]["page_id"] == 10
+    assert verify_pack(pack / "manifest.json", count_lines=True, verify_hashes=True)["status"] == "ok"
+
+    index["blocks"][1]["sha256"] = "0" * 64
+    (pack / shard["blockIndex"]["url"]).write_text(json.dumps(index), encoding="utf-8")
+    result = verify_pack(pack / "manifest.json", count_lines=False, verify_hashes=True)
+    assert result["status"] == "failed"
+    assert result["blockMismatches"][0]["shard"] == "shard-0001"
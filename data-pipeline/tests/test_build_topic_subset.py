@@ -0,0 +1,92 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from doompedia_pipeline.build_pack import build_pack
+from doompedia_pipeline.build_topic_subset import build_topic_subset, build_topic_subsets, load_subset_config
+from doompedia_pipeline.verify_pack import verify_pack
+
+
+def _build_source(pack_args, **overrides: object) -> Path:
+    topics = ["science"] * 6 + ["history"] * 4 + ["sports", "science"] * 3
+    cards = [{"page_id": page_id, "topic_key": topic} for page_id, topic in enumerate(topics, start=1)]
+    args = pack_args(cards, shard_size=4, topic_index=True, **overrides)
+    build_pack(args)
+    return Path(args.output) / "manifest.json"
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_subset_skips_and_seeks_with_topic_metadata(tmp_path: Path, pack_args, compression: str) -> None:
+    manifest_path = _build_source(pack_args, compression=compression)
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    assert [shard["topicCounts"] for shard in manifest["shards"]][:3] == [
+        {"science": 4},
+        {"history": 2, "science": 2},
+        {"history": 2, "science": 1, "sports": 1},
+    ]
+    assert verify_pack(manifest_path, count_lines=True, verify_hashes=True)["status"] == "ok"
+
+    indexed = build_topic_subset(manifest_path, tmp_path / "indexed.ndjson", "en", {"sports", "history"}, 100)
+
+    plain_manifest = tmp_path / "pack" / "plain-manifest.json"
+    for shard in manifest["shards"]:
+        shard.pop("topicCounts")
+        shard.pop("topicIndex")
+    plain_manifest.write_text(json.dumps(manifest), encoding="utf-8")
+    scanned = build_topic_subset(plain_manifest, tmp_path / "scanned.ndjson", "en", {"sports", "history"}, 100)
+
+    assert (tmp_path / "indexed.ndjson").read_text() == (tmp_path / "scanned.ndjson").read_text()
+    assert indexed["written"] == scanned["written"] == 7
+    assert indexed["skippedShards"] == 1 and scanned["skippedShards"] == 0
+    assert indexed["scanned"] == 7 and scanned["scanned"] == 16
+    # Science rows are rejected from their raw bytes, before JSON decoding.
+    assert indexed["decoded"] == scanned["decoded"] == 7
+
+
+def test_subset_decompresses_only_the_gzip_blocks_holding_matches(tmp_path: Path, pack_args) -> None:
+    # One row per block: a block either holds a matching row or none.
+    manifest_path = _build_source(pack_args, compression="gzip", block_size=1)
+    expected = build_topic_subset(manifest_path, tmp_path / "expected.ndjson", "en", {"sports", "history"}, 100)
+
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    for shard in manifest["shards"]:
+        shard_path = manifest_path.parent / shard["url"]
+        index = json.loads((manifest_path.parent / shard["blockIndex"]["url"]).read_text(encoding="utf-8"))
+        topics = json.loads((manifest_path.parent / shard["topicIndex"]["url"]).read_text(encoding="utf-8"))["topics"]
+        wanted = {row for topic in ("sports", "history") for row in topics.get(topic, {}).get("rows", [])}
+        body = bytearray(shard_path.read_bytes())
+        for block in index["blocks"]:
+            if block["firstRecord"] not in wanted:
+                # Any attempt to decompress a skipped block now fails.
+                body[block["offset"] : block["offset"] + block["bytes"]] = bytes(block["bytes"])
+        shard_path.write_bytes(bytes(body))
+
+    result = build_topic_subset(manifest_path, tmp_path / "seeked.ndjson", "en", {"sports", "history"}, 100)
+    assert result["written"] == expected["written"] == 7
+    assert (tmp_path / "seeked.ndjson").read_text() == (tmp_path / "expected.ndjson").read_text()
+
+
+def test_config_mode_builds_all_subsets_in_one_pass(tmp_path: Path, pack_args) -> None:
+    manifest_path = _build_source(pack_args, compression="gzip")
+    config = tmp_path / "subsets.json"
+    config.write_text(
+        json.dumps(
+            {
+                "subsets": [
+                    {"name": "stem", "topics": ["science"], "target": 3, "output": str(tmp_path / "stem.ndjson")},
+                    {"name": "past", "topics": "History, Sports", "target": 2, "output": str(tmp_path / "past.ndjson")},
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    result = build_topic_subsets(manifest_path, "en", load_subset_config(config))
+
+    assert {name: summary["written"] for name, summary in result["subsets"].items()} == {"stem": 3, "past": 2}
+    # Both targets are met inside the second shard, so the scan stops there.
+    assert result["scanned"] == 6
+    single = build_topic_subset(manifest_path, tmp_path / "single.ndjson", "en", {"history", "sports"}, 2)
+    assert single["written"] == 2
+    assert (tmp_path / "past.ndjson").read_text() == (tmp_path / "single.ndjson").read_text()
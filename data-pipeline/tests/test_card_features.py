@@ -0,0 +1,77 @@
+import json
+import sqlite3
+from pathlib import Path
+
+from doompedia_pipeline.build_pack import build_pack
+from doompedia_pipeline.card_features import (
+    describe_topics,
+    key_hash,
+    load_article_topics,
+    read_shard_features,
+    topic_weights,
+)
+from doompedia_pipeline.verify_pack import verify_pack
+
+SCHEMA = Path(__file__).resolve().parents[2] / "shared-spec" / "content-schema.sql"
+
+CARDS = [
+    ("Ada Lovelace", "English mathematician and writer, born 1815, known for work on the Analytical Engine computer.", "general"),
+    ("Rhine", "The Rhine is a river that flows through the Alps and into the North Sea.", "geography"),
+    ("List of Roman emperors", "Rulers of the Roman Empire from Augustus in the first century onwards.", "history_of"),
+    ("Quasar", "An extremely luminous active galactic nucleus studied in astronomy.", "music albums"),
+    ("Plain", "A placeholder entry with nothing notable in it at all.", ""),
+]
+
+
+def test_describe_topics_matches_the_client_feed_ranker() -> None:
+    primary, keys = describe_topics(*CARDS[0])
+    assert primary == "biography"
+    assert keys == [
+        "biography", "technology", "lovelace", "english", "mathematician", "writer", "born", "work", "analytical", "engine",
+    ]
+    assert topic_weights(primary, keys) == [("biography", 1.0), ("technology", 0.5)]
+    # Explicit topics are taken as-is, after the ranker's own normalization.
+    assert describe_topics(*CARDS[3])[0] == "music-albums"
+    assert describe_topics(*CARDS[2])[0] == "history-of"
+    assert describe_topics(*CARDS[4]) == ("general", ["general", "plain", "placeholder", "with", "nothing", "notable"])
+
+
+def test_feature_sidecars_round_trip_and_fill_article_topics(tmp_path: Path, pack_args) -> None:
+    cards = [
+        {"page_id": page_id, "title": title, "summary": summary, "topic_key": topic_key, "quality_score": page_id / 5}
+        for page_id, (title, summary, topic_key) in enumerate(CARDS, start=1)
+    ]
+    pack = tmp_path / "pack"
+    build_pack(pack_args(cards, shard_size=3, compression="gzip", feature_index=True))
+    manifest = json.loads((pack / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["featureSchema"]["keySlots"] == 10
+    assert verify_pack(pack / "manifest.json", count_lines=True, verify_hashes=True)["status"] == "ok"
+
+    rows = []
+    for shard in manifest["shards"]:
+        features = read_shard_features(pack / shard["featureIndex"]["url"])
+        rows += [(features, row) for row in range(len(features))]
+    assert len(rows) == len(CARDS)
+    affinity = {"biography": 0.9, "river": 0.4, "empire": 0.6}
+    hashed_affinity = {key_hash(key): value for key, value in affinity.items()}
+    for page_id, ((title, summary, topic_key), (features, row)) in enumerate(zip(CARDS, rows), start=1):
+        primary, keys = describe_topics(title, summary, topic_key)
+        assert features.topics[features.primary_topic[row]] == primary
+        assert features.page_ids[row] == page_id
+        assert features.quality[row] == round(page_id / 5 * 255)
+        assert features.keys(row) == [key_hash(key) for key in keys]
+        # Interest is plain arithmetic over the hashed keys.
+        signals = [hashed_affinity.get(value, 0.0) for value in features.keys(row)]
+        assert 0.7 * max(signals) + 0.3 * sum(signals) / len(signals) == (
+            0.7 * max(affinity.get(key, 0.0) for key in keys) + 0.3 * sum(affinity.get(key, 0.0) for key in keys) / len(keys)
+        )
+        assert [topic for topic, _ in features.article_topics(row)] == [topic for topic, _ in topic_weights(primary, keys)]
+
+    database = tmp_path / "content.db"
+    with sqlite3.connect(database) as connection:
+        connection.executescript(SCHEMA.read_text(encoding="utf-8"))
+    assert load_article_topics(pack, database) == sum(len(features.article_topics(row)) for features, row in rows)
+    with sqlite3.connect(database) as connection:
+        assert connection.execute(
+            "SELECT topic_key, weight FROM article_topics WHERE page_id = 1 ORDER BY weight DESC"
+        ).fetchall() == [("biography", 1.0), ("technology", 128 / 255)]
@@ -1,6 +1,9 @@
 import json
 from pathlib import Path
 
+import pytest
+
+from doompedia_pipeline import extract_dump as extract_dump_module
 from doompedia_pipeline.extract_dump import extract_dump, extract_summary, extract_topic_key
 
 
@@ -76,3 +79,57 @@ def test_extract_dump_filters_and_writes_cards(tmp_path: Path) -> None:
     assert lines[0]["page_id"] == 1
     assert lines[0]["source_rev_id"] == 11
     assert lines[0]["updated_at"] == "2026-01-01T00:00:00Z"
+
+
+def test_extract_dump_resumes_from_checkpoint(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pages = "".join(
+        f"""
+          <page>
+            <title>Article {index}</title>
+            <ns>0</ns>
+            <id>{index}</id>
+            <revision>
+              <id>{index * 10}</id>
+              <timestamp>2026-01-01T00:00:00Z</timestamp>
+              <text>Article {index} is a synthetic page used to exercise checkpointed extraction runs.</text>
+            </revision>
+          </page>"""
+        for index in range(1, 8)
+    )
+    xml_path = tmp_path / "sample.xml"
+    xml_path.write_text(f"<mediawiki>{pages}</mediawiki>", encoding="utf-8")
+    options = {"language": "en", "max_records": 100, "min_summary": 40, "max_summary": 320}
+
+    clean_path = tmp_path / "clean.ndjson"
+    extract_dump(input_path=xml_path, output_path=clean_path, **options)
+
+    original_extract_summary = extract_dump_module.extract_summary
+    calls = {"count": 0}
+
+    def crash_on_sixth_page(*args: object, **kwargs: object):
+        calls["count"] += 1
+        if calls["count"] == 6:
+            raise RuntimeError("simulated crash")
+        return original_extract_summary(*args, **kwargs)
+
+    out_path = tmp_path / "cards.ndjson"
+    monkeypatch.setattr(extract_dump_module, "extract_summary", crash_on_sixth_page)
+    with pytest.raises(RuntimeError):
+        extract_dump(input_path=xml_path, output_path=out_path, checkpoint_every=2, **options)
+
+    monkeypatch.setattr(extract_dump_module, "extract_summary", original_extract_summary)
+    result = extract_dump(input_path=xml_path, output_path=out_path, checkpoint_every=2, resume=True, **options)
+
+    assert result["written"] == 7
+    assert out_path.read_bytes() == clean_path.read_bytes()
+    assert not out_path.with_name("cards.ndjson.checkpoint.json").exists()
+
+    # An output shorter than its checkpoint starts over instead of being NUL-padded.
+    calls["count"] = 0
+    monkeypatch.setattr(extract_dump_module, "extract_summary", crash_on_sixth_page)
+    with pytest.raises(RuntimeError):
+        extract_dump(input_path=xml_path, output_path=out_path, checkpoint_every=2, **options)
+    out_path.write_bytes(out_path.read_bytes()[:10])
+    monkeypatch.setattr(extract_dump_module, "extract_summary", original_extract_summary)
+    extract_dump(input_path=xml_path, output_path=out_path, checkpoint_every=2, resume=True, **options)
+    assert out_path.read_bytes() == clean_path.read_bytes()
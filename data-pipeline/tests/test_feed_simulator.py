@@ -0,0 +1,157 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from doompedia_pipeline.build_pack import build_pack
+from doompedia_pipeline.card_features import describe_topics
+
+np = pytest.importorskip("numpy")
+
+from doompedia_pipeline.feed_simulator import (  # noqa: E402
+    CardTable,
+    ConfigBatch,
+    FeedSimulator,
+    SessionState,
+    expand_sweep,
+    load_cards,
+    rank_pool,
+    synthetic_sessions,
+)
+
+CONFIG = Path(__file__).resolve().parents[2] / "shared-spec" / "ranking-config.v1.json"
+WORDS = ["river", "empire", "castle", "battle", "mountain", "painter", "volcano", "harbour", "galaxy", "opera"]
+TOPICS = ["history", "science", "geography", "arts", "sports", "music albums", "general", ""]
+
+
+def _cards(count: int, seed: int) -> list[tuple[int, str, str, str, float]]:
+    rng = random.Random(seed)
+    qualities = rng.sample(range(1, 256), count)
+    return [
+        (page_id, f"Card {page_id}", f"A {' '.join(rng.sample(WORDS, 3))} story told across several pages.", rng.choice(TOPICS), quality / 255)
+        for page_id, quality in zip(range(1, count + 1), qualities)
+    ]
+
+
+def _reference_rank(config: dict, level: str, cards: list, affinity: dict, recent: list[str], limit: int) -> list[int]:
+    """FeedRanker.rank, transcribed line for line."""
+    weights, guardrails = config["weights"], config["guardrails"]
+    level_factor = config["personalization"]["levels"].get(level, 0.0)
+    top = {key for key, _ in sorted(affinity.items(), key=lambda item: -item[1])[:2]}
+    recent = recent[: guardrails["windowSize"]]
+    base = []
+    for page_id, title, summary, topic_key, quality in cards:
+        primary, keys = describe_topics(title, summary, topic_key)
+        values = [affinity.get(key, 0.0) for key in keys]
+        interest = (max(values) * 0.7 + sum(values) / len(values) * 0.3) * weights["interest"] * level_factor if values else 0.0
+        novelty = weights["novelty"] if primary not in recent[: guardrails["cooldownCards"]] else weights["novelty"] * 0.1
+        repetition = recent.count(primary) * weights["repetitionPenalty"] * 0.25
+        base.append((interest + novelty + quality * weights["quality"] - repetition, page_id, primary))
+    base.sort(key=lambda entry: -entry[0])
+
+    def violates(selected: list[str], topic: str) -> bool:
+        window, minimum = guardrails["windowSize"], guardrails["minDistinctTopicsInWindow"]
+        if window <= 0 or minimum <= 0 or len(selected) >= window:
+            return False
+        distinct = set(selected)
+        return (len(distinct) + (topic not in distinct)) + window - (len(selected) + 1) < minimum
+
+    result: list[int] = []
+    selected: list[str] = []
+    target = max(1, int(limit * guardrails["explorationFloor"]))
+    explored = 0
+    for _, page_id, topic in base:
+        if len(result) >= limit:
+            break
+        if selected.count(topic) >= guardrails["maxSameTopicInWindow"] or violates(selected, topic):
+            continue
+        exploration = bool(top) and topic not in top
+        if not exploration and max(target - explored, 0) >= limit - len(result):
+            continue
+        result.append(page_id)
+        selected.append(topic)
+        explored += exploration
+    for _, page_id, topic in base:
+        if len(result) >= limit:
+            break
+        if page_id in result or selected.count(topic) >= guardrails["maxSameTopicInWindow"] or violates(selected, topic):
+            continue
+        result.append(page_id)
+        selected.append(topic)
+    return result
+
+
+def test_vectorized_ranking_matches_the_client_feed_ranker() -> None:
+    base = json.loads(CONFIG.read_text(encoding="utf-8"))
+    spec = {
+        "weights.interest": {"min": 0.0, "max": 1.0},
+        "weights.novelty": {"min": 0.0, "max": 0.6},
+        "weights.repetitionPenalty": {"min": 0.0, "max": 0.6},
+        "guardrails.explorationFloor": {"min": 0.0, "max": 0.6},
+        "guardrails.windowSize": {"min": 0, "max": 16},
+        "guardrails.maxSameTopicInWindow": {"min": 1, "max": 12},
+        "guardrails.minDistinctTopicsInWindow": {"min": 0, "max": 6},
+        "guardrails.cooldownCards": {"min": 0, "max": 6},
+    }
+    configs = [config for _, config in expand_sweep(base, spec, samples=24, seed=3)]
+    batch = ConfigBatch.from_configs(configs, "MEDIUM")
+    rng = random.Random(5)
+    for trial in range(4):
+        rows = _cards(120, seed=trial)
+        cards = CardTable.from_cards(rows)
+        descriptors = [describe_topics(title, summary, topic_key) for _, title, summary, topic_key, _ in rows]
+        keys = sorted({key for _, card_keys in descriptors for key in card_keys})
+        topics = sorted({primary for primary, _ in descriptors})
+
+        state = SessionState(cards, np.arange(len(cards)), len(configs), int(batch.window.max()))
+        affinities, histories = [], []
+        for position in range(len(configs)):
+            affinity = {key: round(rng.uniform(-1, 1), 6) for key in rng.sample(keys, rng.randint(0, 12))}
+            history = [rng.choice(topics) for _ in range(rng.randint(0, 16))]
+            for key, value in affinity.items():
+                state.set_affinity(position, key, value)
+            state.set_history(position, history)
+            affinities.append(affinity)
+            histories.append(history)
+
+        pool = np.lexsort((cards.page_ids, -cards.quality))
+        limit = rng.randint(1, 60)
+        ranking = rank_pool(state, batch, pool, limit)
+        candidates = [rows[int(card)] for card in pool]
+        for position, config in enumerate(configs):
+            shown = [int(cards.page_ids[pool[card]]) for card in ranking.shown[position] if card >= 0]
+            expected = _reference_rank(config, "MEDIUM", candidates, affinities[position], histories[position], limit)
+            assert shown == expected, (trial, position)
+
+
+def test_simulator_sweeps_a_pack(pack_args) -> None:
+    cards = [
+        {"page_id": page_id, "title": title, "summary": summary, "topic_key": topic_key, "quality_score": quality}
+        for page_id, title, summary, topic_key, quality in _cards(200, seed=9)
+    ]
+    packs = {}
+    for feature_index in (True, False):
+        args = pack_args(cards, f"pack-{feature_index}", shard_size=64, compression="gzip", feature_index=feature_index)
+        build_pack(args)
+        packs[feature_index] = Path(args.output)
+    cards = load_cards(packs[True])
+    derived = load_cards(packs[False])
+    assert len(cards) == 200
+    assert cards.topics == derived.topics
+    assert np.array_equal(cards.keys, derived.keys) and np.array_equal(cards.quality, derived.quality)
+
+    base = json.loads(CONFIG.read_text(encoding="utf-8"))
+    configs = expand_sweep(base, {"guardrails.maxSameTopicInWindow": [1, 20], "weights.diversity": [0.0, 1.0]})
+    assert len(configs) == 5 and configs[0] == ({}, base)
+    sessions = synthetic_sessions(cards, 4, seed=1)
+    simulator = FeedSimulator(cards, limit=20, pool_size=80)
+    metrics, throughput = simulator.run([config for _, config in configs], sessions, refreshes=3, level="HIGH")
+    assert throughput["feeds"] == 5 * 4 * 3
+    # Batches replay identical sessions, so splitting them changes nothing.
+    assert simulator.run([config for _, config in configs], sessions, refreshes=3, level="HIGH", batch_size=2)[0] == metrics
+    # One card per topic cannot fill a feed; diversity never changes the selection.
+    assert metrics[1]["fillRate"] < 1
+    assert metrics[1]["distinctTopicsPerFeed"] == pytest.approx(metrics[1]["fillRate"] * 20)
+    assert metrics[1] == metrics[2] and metrics[3] == metrics[4]
+    assert all(0 <= result["openRate"] <= 1 and result["noveltyRate"] <= 1 for result in metrics)
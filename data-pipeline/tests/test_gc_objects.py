@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from doompedia_pipeline import publish_pack as publish_module
+from doompedia_pipeline.gc_objects import PENDING_PREFIX, gc_objects
+from doompedia_pipeline.publish_pack import publish_pack
+
+
+def _write_pack(pack_dir: Path, pack_id: str, page_ids: list[int]) -> None:
+    (pack_dir / "shards").mkdir(parents=True)
+    shards = []
+    for index, page_id in enumerate(page_ids, start=1):
+        body = f'{{"article": {{"page_id": {page_id}}}}}\n'.encode("utf-8")
+        name = f"shard-{index:04d}.ndjson"
+        (pack_dir / "shards" / name).write_bytes(body)
+        shards.append(
+            {
+                "id": f"shard-{index:04d}",
+                "url": f"shards/{name}",
+                "sha256": hashlib.sha256(body).hexdigest(),
+                "records": 1,
+                "bytes": len(body),
+            }
+        )
+    manifest = {"packId": pack_id, "version": 1, "recordCount": len(shards), "shards": shards}
+    (pack_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+
+def test_content_addressed_packs_share_objects_and_gc_removes_orphans(tmp_path: Path) -> None:
+    site = tmp_path / "site"
+    objects = site / "objects"
+    _write_pack(tmp_path / "core", "en-core", [1, 2])
+    _write_pack(tmp_path / "science", "en-science", [2, 3])
+
+    for pack_id in ("core", "science"):
+        publish_pack(
+            pack_dir=tmp_path / pack_id,
+            output_dir=site / "packs" / pack_id / "v1",
+            layout="content-addressed",
+            objects_dir=objects,
+        )
+
+    assert len(list(objects.iterdir())) == 3
+    published = json.loads((site / "packs" / "science" / "v1" / "manifest.json").read_text(encoding="utf-8"))
+    shard_url = published["shards"][0]["url"]
+    assert shard_url.startswith("../../../objects/") and shard_url.endswith(".ndjson")
+    assert (site / "packs" / "science" / "v1" / shard_url).resolve().parent == objects.resolve()
+
+    (site / "packs" / "core" / "v1" / "manifest.json").unlink()
+    dry = gc_objects(site, objects, grace_seconds=0, dry_run=True)
+    assert len(dry["deleted"]) == 1
+    assert len(list(objects.iterdir())) == 3
+
+    result = gc_objects(site, objects, grace_seconds=0)
+    assert result["referenced"] == 2
+    assert len(list(objects.iterdir())) == 2
+
+
+def test_publish_marks_pending_objects_so_gc_spares_them_until_the_manifest_lands(
+    tmp_path: Path, monkeypatch
+) -> None:
+    site = tmp_path / "site"
+    objects = site / "objects"
+    _write_pack(tmp_path / "core", "en-core", [1, 2])
+    old = time.time() - 86_400
+    for shard in (tmp_path / "core" / "shards").iterdir():
+        os.utime(shard, (old, old))
+
+    # A GC between placing objects and writing the manifest must not take them.
+    results = []
+    write_manifest = publish_module.atomic_write_text
+
+    def gc_then_write(path: Path, text: str, sync=None) -> None:
+        if path.name == "manifest.json":
+            for obj in objects.iterdir():
+                if not obj.name.startswith(PENDING_PREFIX):
+                    os.utime(obj, (old, old))
+            results.append(gc_objects(site, objects))
+        write_manifest(path, text, sync=sync)
+
+    monkeypatch.setattr(publish_module, "atomic_write_text", gc_then_write)
+    for _ in range(2):
+        publish_pack(
+            pack_dir=tmp_path / "core",
+            output_dir=site / "packs" / "core" / "v1",
+            layout="content-addressed",
+            objects_dir=objects,
+            precompress="gzip",
+        )
+    assert [result["deleted"] for result in results] == [[], []]
+    # Hardlinked objects share the source's inode; publishing never touches its mtime.
+    assert all(shard.stat().st_mtime == old for shard in (tmp_path / "core" / "shards").iterdir())
+    assert not any(path.name.startswith(PENDING_PREFIX) for path in objects.iterdir())
+
+    # A crashed publish's marker protects nothing once it is older than the grace period.
+    stale = objects / f"{PENDING_PREFIX}crashed.json"
+    stale.write_text(json.dumps(["orphan.ndjson"]), encoding="utf-8")
+    (objects / "orphan.ndjson").write_bytes(b"{}\n")
+    assert gc_objects(site, objects)["deleted"] == []
+    for path in (stale, objects / "orphan.ndjson"):
+        os.utime(path, (old, old))
+    assert sorted(gc_objects(site, objects)["deleted"]) == [stale.name, "orphan.ndjson"]
@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from doompedia_pipeline.build_featured_starter import ApiClient
+from doompedia_pipeline.http_cache import CacheMiss, ResponseCache
+
+
+def _serve(statuses: list[int]) -> tuple[ThreadingHTTPServer, str]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.headers.get("If-None-Match") == '"v1"':
+                statuses.append(304)
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = json.dumps({"path": self.path}).encode("utf-8")
+            statuses.append(200)
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+
+
+def test_api_cache_serves_fresh_revalidates_stale_and_replays_offline(tmp_path: Path) -> None:
+    statuses: list[int] = []
+    server, url = _serve(statuses)
+    params = {"action": "query", "titles": "Moon"}
+    try:
+        cache = ResponseCache(tmp_path / "cache")
+        client = ApiClient(url, cache=cache)
+        first = client.request_json(params)
+        assert client.request_json(dict(reversed(params.items()))) == first
+        assert statuses == [200]
+
+        stale = ApiClient(url, cache=ResponseCache(tmp_path / "cache", ttl_seconds=0))
+        assert stale.request_json(params) == first
+        assert statuses == [200, 304]
+        assert stale.cache.snapshot()["revalidated"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    offline = ApiClient(url, cache=ResponseCache(tmp_path / "cache", ttl_seconds=0, offline=True))
+    assert offline.request_json(params) == first
+    with pytest.raises(CacheMiss):
+        offline.request_json({"action": "query", "titles": "Sun"})
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, max_bytes=1000)
+    for index in range(5):
+        cache.store(f"key{index}", {"text": "x" * 100})
+        os.utime(tmp_path / f"key{index}.json", (1_000 + index, 1_000 + index))
+    cache.load("key0")
+    assert cache.snapshot()["evicted"] == 0
+    cache.store("key5", {"text": "x" * 100})
+    assert cache.snapshot()["evicted"] > 0
+    assert cache.load("key0") is not None
+    assert cache.load("key1") is None
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.json")) <= 1000
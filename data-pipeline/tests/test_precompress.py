@@ -0,0 +1,28 @@
+from pathlib import Path
+
+import pytest
+
+from doompedia_pipeline.precompress import sibling_path, write_precompressed
+
+_DECODERS = {
+    "gzip": ("gzip", lambda module, data: module.decompress(data)),
+    "br": ("brotli", lambda module, data: module.decompress(data)),
+    # Streamed frames carry no content size, so use a streaming decoder.
+    "zstd": ("zstandard", lambda module, data: module.ZstdDecompressor().decompressobj().decompress(data)),
+}
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_write_precompressed_round_trips(tmp_path: Path, encoding: str) -> None:
+    module_name, decode = _DECODERS[encoding]
+    module = pytest.importorskip(module_name)
+    source = tmp_path / "shard-0001.ndjson"
+    source.write_bytes(b'{"article": {"page_id": 1}}\n' * 5_000)
+
+    variant = write_precompressed(source, encoding)
+
+    target = sibling_path(source, encoding)
+    assert variant["bytes"] == target.stat().st_size
+    assert decode(module, target.read_bytes()) == source.read_bytes()
+    # A second run over an unchanged sibling only re-hashes it.
+    assert write_precompressed(source, encoding, reuse_existing=True) == variant
@@ -0,0 +1,43 @@
+import json
+
+from doompedia_pipeline.prefilter import RowPrefilter
+from doompedia_pipeline.topics import infer_topic
+
+
+def _decoded_verdict(line: bytes, language: str, topics: set[str]) -> bool:
+    article = json.loads(line)["article"]
+    if article.get("lang") != language:
+        return False
+    topic = infer_topic(str(article.get("title", "")), str(article.get("summary", "")), str(article.get("topic_key", "general")))
+    return topic in topics
+
+
+def test_prefilter_only_rejects_rows_the_decoder_would_reject() -> None:
+    articles = [
+        {"lang": "en", "title": "Physics", "summary": "A science.", "topic_key": "science"},
+        {"lang": "en", "title": "Football", "summary": "A sport.", "topic_key": "sports"},
+        {"lang": "de", "title": "Physik", "summary": "A science.", "topic_key": "science"},
+        # Only inference can say what these are, so they must reach the decoder.
+        {"lang": "en", "title": "Rome", "summary": "An ancient empire.", "topic_key": "history_of"},
+        {"lang": "en", "title": "Newton", "summary": "A physics pioneer.", "topic_key": "general"},
+        {"lang": "en", "title": "Telescope", "summary": "Astronomy kit."},
+        # Key-like text inside a value is escaped and must not be mistaken for the key.
+        {"lang": "en", "title": "Quoting", "summary": 'He wrote "topic_key": "sports".', "topic_key": "Science"},
+        {"title": "No language", "summary": "Missing lang.", "topic_key": "science"},
+        {"lang": "en", "title": "Esc", "summary": "Escaped value.", "topic_key": "sports\"x"},
+    ]
+    lines = []
+    for article in articles:
+        payload = {"article": article, "aliases": []}
+        lines.append(json.dumps(payload).encode("utf-8"))
+        lines.append(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+    prefilter = RowPrefilter(language="en", topics={"science", "history"})
+    verdicts = [prefilter(line) for line in lines]
+
+    for line, verdict in zip(lines, verdicts):
+        if not verdict:
+            assert not _decoded_verdict(line, "en", {"science", "history"}), line
+    # Sports and German rows are rejected without decoding, in both encodings.
+    assert prefilter.rejected == 4
+    assert verdicts[:6] == [True, True, False, False, False, False]
@@ -1,7 +1,10 @@
+import gzip
+import hashlib
 import json
 from pathlib import Path
 
 from doompedia_pipeline.publish_pack import publish_pack
+from doompedia_pipeline.verify_pack import verify_pack
 
 
 def test_publish_pack_rewrites_urls_and_writes_latest(tmp_path: Path) -> None:
@@ -51,3 +54,68 @@ def test_publish_pack_rewrites_urls_and_writes_latest(tmp_path: Path) -> None:
     assert published["shards"][0]["url"] == "https://example.org/packs/en-core-1m/v1/shards/shard-0001.ndjson"
     latest_payload = json.loads(latest.read_text(encoding="utf-8"))
     assert latest_payload["manifestUrl"] == "https://example.org/packs/en-core-1m/v1/manifest.json"
+
+
+def test_publish_pack_links_then_skips_unchanged_files(tmp_path: Path) -> None:
+    pack_dir = tmp_path / "pack"
+    (pack_dir / "shards").mkdir(parents=True)
+    shards = []
+    for index in (1, 2):
+        body = f'{{"article": {{"page_id": {index}}}}}\n'.encode("utf-8")
+        (pack_dir / "shards" / f"shard-{index:04d}.ndjson").write_bytes(body)
+        shards.append(
+            {
+                "id": f"shard-{index:04d}",
+                "url": f"shards/shard-{index:04d}.ndjson",
+                "sha256": hashlib.sha256(body).hexdigest(),
+                "records": 1,
+                "bytes": len(body),
+            }
+        )
+    manifest = {"packId": "en-test", "version": 1, "recordCount": 2, "shards": shards}
+    (pack_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    out_dir = tmp_path / "site" / "v1"
+    first = publish_pack(pack_dir=pack_dir, output_dir=out_dir, workers=2)
+    linked = first["transfer"]["reflinked"]["files"] + first["transfer"]["hardlinked"]["files"]
+    assert linked == 2
+    assert first["transfer"]["copied"]["files"] == 0
+
+    # A copied destination with matching content is skipped without rewriting.
+    copy_dir = tmp_path / "site" / "v1-copy"
+    publish_pack(pack_dir=pack_dir, output_dir=copy_dir, link_mode="copy")
+    copied_shard = copy_dir / "shards" / "shard-0001.ndjson"
+    inode = copied_shard.stat().st_ino
+    second = publish_pack(pack_dir=pack_dir, output_dir=copy_dir, link_mode="copy")
+    assert second["transfer"]["skipped"]["files"] == 2
+    assert second["transfer"]["skipped"]["bytes"] == sum(shard["bytes"] for shard in shards)
+    assert copied_shard.stat().st_ino == inode
+
+
+def test_publish_pack_writes_precompressed_siblings(tmp_path: Path) -> None:
+    pack_dir = tmp_path / "pack"
+    (pack_dir / "shards").mkdir(parents=True)
+    body = "".join(f'{{"article": {{"page_id": {page_id}}}}}\n' for page_id in range(200)).encode("utf-8")
+    (pack_dir / "shards" / "shard-0001.ndjson").write_bytes(body)
+    shard = {
+        "id": "shard-0001",
+        "url": "shards/shard-0001.ndjson",
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "records": 200,
+        "bytes": len(body),
+    }
+    manifest = {"packId": "en-test", "version": 1, "recordCount": 200, "shards": [shard]}
+    (pack_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    out_dir = tmp_path / "site" / "v1"
+    result = publish_pack(pack_dir=pack_dir, output_dir=out_dir, precompress="gzip")
+
+    sibling = out_dir / "shards" / "shard-0001.ndjson.gz"
+    assert gzip.decompress(sibling.read_bytes()) == body
+    published = json.loads((out_dir / "manifest.json").read_text(encoding="utf-8"))
+    variant = published["shards"][0]["encodings"]["gzip"]
+    assert variant == {"bytes": sibling.stat().st_size, "sha256": hashlib.sha256(sibling.read_bytes()).hexdigest()}
+    assert variant["bytes"] < len(body)
+    assert result["precompressed"]["gzip"]["files"] == 1
+    assert json.loads(gzip.decompress((out_dir / "manifest.json.gz").read_bytes())) == published
+    assert verify_pack(out_dir / "manifest.json", count_lines=True, verify_hashes=True)["status"] == "ok"
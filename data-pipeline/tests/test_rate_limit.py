@@ -0,0 +1,55 @@
+import threading
+import time
+
+from doompedia_pipeline.rate_limit import LATENCY_WINDOW, AdaptiveRateLimiter, parse_retry_after
+
+
+def test_limiter_backs_off_on_throttling_and_recovers() -> None:
+    limiter = AdaptiveRateLimiter(rate=100, burst=4, max_concurrency=4, rate_step=1)
+    assert limiter.concurrency == 2
+
+    started = limiter.acquire()
+    limiter.release(started, 429, retry_after=0.2)
+    assert limiter.rate == 50 and limiter.concurrency == 1
+
+    begin = time.monotonic()
+    limiter.release(limiter.acquire(), 200)
+    assert time.monotonic() - begin >= 0.19
+
+    for _ in range(12):
+        limiter.release(limiter.acquire(), 200)
+    assert limiter.concurrency == 3
+    assert limiter.rate == 63
+    snapshot = limiter.snapshot()
+    assert snapshot["requests"] == 14 and snapshot["throttled"] == 1
+    assert snapshot["latency"]["maxMs"] is not None
+    # Long runs keep only a window of samples for the percentiles.
+    assert len(limiter.stats.latencies) == 14 and limiter.stats.latencies.maxlen == LATENCY_WINDOW
+
+
+def test_limiter_caps_in_flight_requests() -> None:
+    limiter = AdaptiveRateLimiter(rate=1000, burst=10, max_concurrency=2)
+    limiter.concurrency = 2
+    peak = 0
+    active = 0
+    lock = threading.Lock()
+
+    def worker() -> None:
+        nonlocal peak, active
+        started = limiter.acquire()
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        limiter.release(started, 200)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak <= 2
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("soon") is None
@@ -0,0 +1,108 @@
+import json
+from pathlib import Path
+
+from doompedia_pipeline.build_pack import build_pack
+from doompedia_pipeline.normalize import normalize_title
+from doompedia_pipeline.publish_pack import publish_pack
+from doompedia_pipeline.search_index import SearchConfig, SearchIndex, edit_distance_at_most_one
+from doompedia_pipeline.verify_pack import verify_pack
+
+TITLES = [
+    ("Paris", ["City of Light"], 0.9),
+    ("Paris Hilton", [], 0.4),
+    ("Parish", [], 0.5),
+    ("Pariss", [], 0.2),
+    ("Parcs", [], 0.6),
+    ("Pears", [], 0.7),
+    ("Berlin", ["Berlin, Germany", "Spree Athens"], 0.8),
+    ("Bern", [], 0.3),
+    ("Ångström", ["Angstrom"], 0.5),
+    ("ångströms", [], 0.6),
+    ("Citation", [], 0.1),
+]
+
+
+def _build(pack_args, compression: str = "none") -> Path:
+    cards = [
+        {
+            "page_id": page_id,
+            "title": title,
+            "summary": f"{title} is a synthetic summary long enough to pass the clamp filter.",
+            "quality_score": quality,
+            "aliases": aliases,
+        }
+        for page_id, (title, aliases, quality) in enumerate(TITLES, start=1)
+    ]
+    args = pack_args(cards, shard_size=4, compression=compression, search_index=True, typo_index=True)
+    build_pack(args)
+    return Path(args.output)
+
+
+def _reference(query: str, config: SearchConfig) -> list[int]:
+    """The clients' SQLite search, over the test cards."""
+    normalized = normalize_title(query)
+    if not normalized:
+        return []
+    titles = sorted(
+        (normalize_title(title).encode(), page_id, quality) for page_id, (title, _, quality) in enumerate(TITLES, start=1)
+    )
+    aliases = sorted(
+        (normalize_title(alias).encode(), page_id)
+        for page_id, (_, card_aliases, _) in enumerate(TITLES, start=1)
+        for alias in card_aliases
+    )
+    encoded = normalized.encode()
+    ordered = [page_id for text, page_id, _ in titles if text == encoded][: config.max_results]
+    ordered += [page_id for text, page_id, _ in titles if text.startswith(encoded)][: config.max_results]
+    ordered += [page_id for text, page_id in aliases if text.startswith(encoded)][: config.max_results]
+    ordered = list(dict.fromkeys(ordered))
+    if len(normalized) >= config.typo_min_query_length:
+        window = range(len(normalized) - config.typo_distance, len(normalized) + config.typo_distance + 1)
+        candidates = sorted(
+            (-quality, page_id, text.decode())
+            for text, page_id, quality in titles
+            if text.decode()[0] == normalized[0] and len(text.decode()) in window
+        )[: config.max_typo_candidates]
+        ordered += [
+            page_id
+            for _, page_id, text in candidates
+            if page_id not in ordered and edit_distance_at_most_one(normalized, text)
+        ]
+    return ordered[: config.max_results]
+
+
+def test_search_index_matches_the_client_search_contract(pack_args) -> None:
+    pack = _build(pack_args, compression="gzip")
+    manifest = json.loads((pack / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["searchIndex"]["titles"] == len(TITLES)
+    assert manifest["searchIndex"]["aliases"] == 4
+
+    config = SearchConfig(max_typo_candidates=3, max_results=4)
+    with SearchIndex(pack / "search-index.bin") as index:
+        hits = index.search("  PARIS ", config)
+        assert [(hit.page_id, hit.match) for hit in hits] == [(1, "exact"), (2, "prefix"), (3, "prefix"), (4, "prefix")]
+        assert [(hit.page_id, hit.match) for hit in index.search("angstrom")] == [(9, "alias")]
+        # Typo candidates share the query's first character, so only "ångström" is one edit away.
+        assert [(hit.page_id, hit.match) for hit in index.search("Ångstrom")] == [(9, "typo")]
+        for query in ["paris", "pari", "parjs", "pears", "berlin", "spree", "ber", "ångström", "citatio", "x", ""]:
+            for candidate_config in (config, SearchConfig()):
+                assert [hit.page_id for hit in index.search(query, candidate_config)] == _reference(query, candidate_config), query
+
+
+def test_search_index_is_verified_and_published(tmp_path: Path, pack_args) -> None:
+    pack = _build(pack_args)
+    assert verify_pack(pack / "manifest.json", count_lines=True, verify_hashes=True)["status"] == "ok"
+    assert "search-index.bin" in (pack / "checksums.txt").read_text(encoding="utf-8")
+
+    site = tmp_path / "site"
+    publish_pack(pack, site, base_url="https://packs.example.org/en-test/v1")
+    published = json.loads((site / "manifest.json").read_text(encoding="utf-8"))
+    assert published["searchIndex"]["url"] == "https://packs.example.org/en-test/v1/search-index.bin"
+    assert (site / "search-index.bin").read_bytes() == (pack / "search-index.bin").read_bytes()
+    assert published["typoIndex"]["searchIndexSha256"] == published["searchIndex"]["sha256"]
+    assert (site / "typo-index.bin").exists()
+
+    (pack / "search-index.bin").write_bytes(b"DPSI")
+    report = verify_pack(pack / "manifest.json", count_lines=True, verify_hashes=True)
+    assert report["status"] != "ok"
+    assert any(mismatch["source"] == "searchIndex" for mismatch in report["hashMismatches"])
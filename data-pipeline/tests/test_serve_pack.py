@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import http.client
+import json
+from pathlib import Path
+
+import pytest
+
+from doompedia_pipeline.pack_loadgen import run_load
+from doompedia_pipeline.publish_pack import publish_pack
+from doompedia_pipeline.serve_pack import parse_range, start_server
+
+
+def _publish(tmp_path: Path) -> Path:
+    pack_dir = tmp_path / "pack"
+    (pack_dir / "shards").mkdir(parents=True)
+    shards = []
+    for index in (1, 2):
+        body = "".join(f'{{"article": {{"page_id": {index * 1000 + row}}}}}\n' for row in range(300)).encode()
+        (pack_dir / "shards" / f"shard-{index:04d}.ndjson").write_bytes(body)
+        shards.append(
+            {
+                "id": f"shard-{index:04d}",
+                "url": f"shards/shard-{index:04d}.ndjson",
+                "sha256": hashlib.sha256(body).hexdigest(),
+                "records": 300,
+                "bytes": len(body),
+            }
+        )
+    manifest = {"packId": "en-test", "version": 1, "recordCount": 600, "shards": shards}
+    (pack_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    site = tmp_path / "site"
+    publish_pack(pack_dir=pack_dir, output_dir=site / "packs" / "en-test" / "v1", precompress="gzip")
+    return site
+
+
+def _get(port: int, path: str, headers: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response.status, {key.lower(): value for key, value in response.getheaders()}, body
+
+
+def test_serve_pack_handles_etag_range_and_encodings_under_load(tmp_path: Path) -> None:
+    site = _publish(tmp_path)
+    manifest = json.loads((site / "packs" / "en-test" / "v1" / "manifest.json").read_text(encoding="utf-8"))
+    shard = manifest["shards"][0]
+    shard_path = "/packs/en-test/v1/" + shard["url"]
+
+    async def scenario() -> tuple[dict, list, dict]:
+        server, pack_server = await start_server(site)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            load = await run_load(
+                f"http://127.0.0.1:{port}/packs/en-test/v1/manifest.json",
+                clients=4,
+                range_chunk=1000,
+            )
+            checks = await asyncio.to_thread(
+                lambda: [
+                    _get(port, shard_path, {"Range": "bytes=10-19"}),
+                    _get(port, shard_path, {"If-None-Match": f'"{shard["sha256"]}"'}),
+                    _get(port, shard_path, {"Accept-Encoding": "br, gzip"}),
+                    _get(port, "/../../etc/passwd", {}),
+                ]
+            )
+        return load, checks, pack_server.stats.snapshot()
+
+    load, checks, stats = asyncio.run(scenario())
+
+    assert load["errorCount"] == 0
+    assert load["shardsDownloaded"] == 8
+    assert load["requests"] > 8
+
+    ranged, not_modified, encoded, traversal = checks
+    full = (site / "packs" / "en-test" / "v1" / shard["url"]).read_bytes()
+    assert ranged[0] == 206 and ranged[2] == full[10:20]
+    assert ranged[1]["etag"] == f'"{shard["sha256"]}"'
+    assert not_modified[0] == 304
+    assert encoded[1]["content-encoding"] == "gzip"
+    assert encoded[1]["etag"] == f'"{shard["encodings"]["gzip"]["sha256"]}"'
+    assert traversal[0] == 404
+    assert stats["statuses"]["206"] >= load["requests"] - 1
+    assert stats["latency"]["p50Ms"] is not None
+
+
+def test_serve_pack_rejects_unsatisfiable_ranges_and_weak_if_range(tmp_path: Path) -> None:
+    assert parse_range("bytes=-5", 20) == (15, 19)
+    assert parse_range("bytes=5-", 20) == (5, 19)
+    assert parse_range("bytes=x-1", 20) is None
+    for header, size in [("bytes=-5", 0), ("bytes=-0", 20), ("bytes=0-", 0), ("bytes=30-", 20)]:
+        with pytest.raises(ValueError):
+            parse_range(header, size)
+
+    site = _publish(tmp_path)
+    (site / "empty.bin").write_bytes(b"")
+    (site / "notes.txt").write_bytes(b"0123456789")
+
+    async def scenario() -> list:
+        server, _ = await start_server(site)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            weak = await asyncio.to_thread(_get, port, "/notes.txt", {})
+            etag = weak[1]["etag"]
+            return [weak] + await asyncio.to_thread(
+                lambda: [
+                    _get(port, "/empty.bin", {"Range": "bytes=-5"}),
+                    _get(port, "/notes.txt", {"Range": "bytes=-0"}),
+                    _get(port, "/notes.txt", {"Range": "bytes=2-3", "If-Range": etag}),
+                    _get(port, "/notes.txt", {"Range": "bytes=2-3"}),
+                ]
+            )
+
+    weak, empty, zero_suffix, weak_if_range, plain = asyncio.run(scenario())
+    assert weak[1]["etag"].startswith("W/")
+    assert empty[0] == 416 and empty[1]["content-range"] == "bytes */0"
+    assert zero_suffix[0] == 416
+    assert weak_if_range[0] == 200 and weak_if_range[2] == b"0123456789"
+    assert plain[0] == 206 and plain[2] == b"23"
@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+from doompedia_pipeline.sort_cards import iter_sorted_lines, sort_cards
+
+
+def _card(page_id: int, title: str, quality: float) -> str:
+    return json.dumps({"page_id": page_id, "title": title, "quality_score": quality})
+
+
+def test_iter_sorted_lines_spills_and_merges_runs(tmp_path: Path) -> None:
+    lines = [_card(page_id, f"T{page_id}", 0.5) for page_id in (9, 4, 7, 1, 8, 2, 6, 3, 5)]
+    lines.insert(3, "   ")
+
+    ordered = list(iter_sorted_lines(lines, key="page_id", run_size=2, temp_dir=tmp_path))
+
+    assert [json.loads(line)["page_id"] for line in ordered] == list(range(1, 10))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_sort_cards_by_title_and_quality(tmp_path: Path) -> None:
+    source = tmp_path / "cards.ndjson"
+    source.write_text(
+        "\n".join(
+            [
+                _card(3, "beta", 0.2),
+                _card(1, "Alpha", 0.9),
+                _card(2, "alpha", 0.9),
+                _card(4, "Gamma", 0.5),
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+
+    by_title = tmp_path / "by-title.ndjson"
+    summary = sort_cards(source, by_title, key="title", run_size=1, workers=2, temp_dir=tmp_path)
+    assert summary["records"] == 4
+    assert [json.loads(line)["page_id"] for line in by_title.read_text(encoding="utf-8").splitlines()] == [1, 2, 3, 4]
+
+    by_quality = tmp_path / "by-quality.ndjson"
+    sort_cards(source, by_quality, key="quality", run_size=3)
+    assert [json.loads(line)["page_id"] for line in by_quality.read_text(encoding="utf-8").splitlines()] == [1, 2, 4, 3]
@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+from doompedia_pipeline.build_pack import build_pack
+from doompedia_pipeline.extract_dump import _extract_keywords
+from doompedia_pipeline.normalize import summary_terms
+from doompedia_pipeline.publish_pack import publish_pack
+from doompedia_pipeline.summary_index import SummaryIndex
+from doompedia_pipeline.verify_pack import verify_pack
+
+WORDS = ["river", "empire", "castle", "battle", "mountain", "painter", "volcano", "harbour"]
+
+
+def _cards() -> list[dict[str, object]]:
+    cards = []
+    for page_id in range(1, 701):
+        words = [word for bit, word in enumerate(WORDS) if page_id % (bit + 2) == 0]
+        cards.append(
+            {
+                "page_id": page_id,
+                "lang": "en",
+                "title": f"Card {page_id}",
+                "summary": f"Card {page_id} describes a {' and a '.join(words) or 'thing'} during the middle ages.",
+                "wiki_url": f"https://en.wikipedia.org/wiki/{page_id}",
+                "topic_key": "general",
+                # Ties on quality fall back to page id.
+                "quality_score": round((page_id * 37 % 100) / 100, 2),
+            }
+        )
+    return cards
+
+
+def _build(pack_args, cards: list[dict[str, object]]) -> Path:
+    args = pack_args(cards, shard_size=250, compression="gzip", summary_index=True)
+    build_pack(args)
+    return Path(args.output)
+
+
+def test_summary_index_answers_top_k_conjunctive_queries(pack_args) -> None:
+    cards = _cards()
+    pack = _build(pack_args, cards)
+    manifest = json.loads((pack / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["summaryIndex"]["documents"] == len(cards)
+
+    # Index terms are the summary keywords extract_dump draws card keywords from.
+    card = cards[119]
+    keywords = _extract_keywords(str(card["title"]), str(card["summary"]), "general")
+    assert set(summary_terms(str(card["summary"]))) <= set(keywords)
+
+    quality = {int(card["page_id"]): float(card["quality_score"]) for card in cards}
+    ranked = sorted(cards, key=lambda card: (-float(card["quality_score"]), int(card["page_id"])))
+    with SummaryIndex(pack / "summary-index.bin") as index:
+        assert index.document_frequency("middle") == len(cards)
+        assert len(list(index.postings("middle"))) == len(cards)
+        for query, k in [
+            ("river", 10),
+            ("River EMPIRE", 5),
+            ("empire battle castle", 400),
+            ("middle castle painter", 3),
+            ("harbour volcano mountain painter", 50),
+            ("during the middle ages", 1_000),
+            ("river atlantis", 10),
+            ("the of", 10),
+            ("river", 0),
+        ]:
+            terms = summary_terms(query)
+            expected = [
+                int(card["page_id"])
+                for card in ranked
+                if terms and set(terms) <= set(summary_terms(str(card["summary"])))
+            ][: max(k, 0)]
+            hits = index.search(query, k)
+            assert [hit.page_id for hit in hits] == expected, query
+            assert [round(hit.quality, 2) for hit in hits] == [quality[page_id] for page_id in expected]
+
+
+def test_summary_index_is_verified_and_published(tmp_path: Path, pack_args) -> None:
+    pack = _build(pack_args, _cards()[:20])
+    assert verify_pack(pack / "manifest.json", count_lines=True, verify_hashes=True)["status"] == "ok"
+
+    site = tmp_path / "site"
+    publish_pack(pack, site, base_url="https://packs.example.org/en-test/v1")
+    published = json.loads((site / "manifest.json").read_text(encoding="utf-8"))
+    assert published["summaryIndex"]["url"] == "https://packs.example.org/en-test/v1/summary-index.bin"
+    assert (site / "summary-index.bin").read_bytes() == (pack / "summary-index.bin").read_bytes()
@@ -0,0 +1,47 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from doompedia_pipeline.thumbnail_store import ThumbnailStore
+
+
+def test_store_streams_dedupes_and_reuses_without_rehashing(tmp_path: Path) -> None:
+    media = tmp_path / "media"
+    index = tmp_path / "cache" / "thumbnails.json"
+    store = ThumbnailStore(media, index)
+    first = store.write(1, "1-512.jpg", "image/jpeg", io.BytesIO(b"same-image"), 100)
+    second = store.write(2, "2-512.jpg", "image/jpeg", io.BytesIO(b"same-image"), 100)
+    assert second["filename"] == first["filename"] == "1-512.jpg"
+    assert not (media / "2-512.jpg").exists()
+    with pytest.raises(ValueError):
+        store.write(3, "3-512.png", "image/png", io.BytesIO(b"x" * 101), 100)
+    store.save()
+    # Only thumbnails are published; the index stays with the build.
+    assert sorted(path.name for path in media.iterdir()) == ["1-512.jpg"]
+    assert index.exists()
+
+    reopened = ThumbnailStore(media, index)
+    assert reopened.lookup(2, 100) == first
+    assert reopened.stats == {"reused": 1, "rehashed": 0, "downloaded": 0, "deduplicated": 0}
+
+    (media / "1-512.jpg").write_bytes(b"edited")
+    assert reopened.lookup(1, 100)["bytes"] == 6
+    assert reopened.stats["rehashed"] == 1
+
+
+def test_store_indexes_legacy_files_and_retain_drops_everything_else(tmp_path: Path) -> None:
+    (tmp_path / "5-512.png").write_bytes(b"legacy")
+    (tmp_path / "6-512.jpg").write_bytes(b"unused")
+    # Older builds kept their index among the published files.
+    (tmp_path / ".thumbnail-index.json").write_text("{}", encoding="utf-8")
+    index = tmp_path.parent / f"{tmp_path.name}-index.json"
+    store = ThumbnailStore(tmp_path, index)
+    assert store.lookup(5, 100)["mime_type"] == "image/png"
+    assert store.lookup(7, 100) is None
+
+    assert store.retain({"5-512.png"}) == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["5-512.png"]
+    assert ThumbnailStore(tmp_path, index).lookup(5, 100)["sha256"] == store.files["5-512.png"]["sha256"]
+    # Without an index the store still works, re-hashing on every run.
+    assert ThumbnailStore(tmp_path).lookup(5, 100)["sha256"] == store.files["5-512.png"]["sha256"]
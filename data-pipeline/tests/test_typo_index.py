@@ -0,0 +1,36 @@
+import random
+from pathlib import Path
+
+from doompedia_pipeline.search_index import SearchConfig, SearchIndex, write_search_index
+from doompedia_pipeline.typo_index import TypoIndex, write_typo_index
+
+
+def test_typo_index_returns_the_same_hits_as_the_window_scan(tmp_path: Path) -> None:
+    rng = random.Random(5)
+    alphabet = "abcdeé"
+    titles = {"".join(rng.choice(alphabet) for _ in range(rng.randint(3, 8))) for _ in range(3_000)}
+    rows = [
+        (page_id, title, rng.choice([0.1, 0.5, 0.9, rng.random()]), [])
+        for page_id, title in enumerate(sorted(titles), start=1)
+    ]
+    search_entry = write_search_index(rows, tmp_path / "search-index.bin")
+    typo_entry = write_typo_index(tmp_path / "search-index.bin", tmp_path / "typo-index.bin")
+    assert typo_entry["searchIndexSha256"] == search_entry["sha256"]
+
+    queries = [
+        title[:i] + rng.choice(alphabet) + title[i + 1 :]
+        for title in rng.sample(sorted(titles), 300)
+        for i in [rng.randrange(len(title))]
+    ]
+    queries += ["".join(rng.choice(alphabet) for _ in range(rng.randint(5, 9))) for _ in range(100)]
+    with SearchIndex(tmp_path / "search-index.bin") as index, TypoIndex(tmp_path / "typo-index.bin") as typo_index:
+        assert typo_index.search_index_sha256 == search_entry["sha256"]
+        typo_hits = 0
+        # A small candidate cap exercises the rank check against the window buckets.
+        for config in (SearchConfig(), SearchConfig(max_typo_candidates=5, max_results=10)):
+            for query in queries:
+                scanned = index.search(query, config)
+                indexed = index.search(query, config, typo_index)
+                assert [(hit.page_id, hit.match) for hit in indexed] == [(hit.page_id, hit.match) for hit in scanned], query
+                typo_hits += sum(hit.match == "typo" for hit in indexed)
+        assert typo_hits > 100
@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+from doompedia_pipeline.models import CardRecord
+from doompedia_pipeline.publish_pack import publish_pack
+from doompedia_pipeline.verify_pack import scan_file, verify_pack
+
+
+def _write_pack(pack_dir: Path) -> dict:
+    shards_dir = pack_dir / "shards"
+    shards_dir.mkdir(parents=True)
+    rows = [json.dumps({"article": {"page_id": page_id}}) for page_id in range(1, 6)]
+
+    # Two gzip members in one file, as written by block-oriented builds.
+    first = gzip.compress(("\n".join(rows[:2]) + "\n").encode("utf-8"), mtime=0)
+    second = gzip.compress(("\n".join(rows[2:4]) + "\n").encode("utf-8"), mtime=0)
+    (shards_dir / "shard-0001.ndjson.gz").write_bytes(first + second)
+    # Final record without a trailing newline still counts.
+    (shards_dir / "shard-0002.ndjson.gz").write_bytes(gzip.compress(rows[4].encode("utf-8"), mtime=0))
+
+    shards = []
+    for index, records in ((1, 4), (2, 1)):
+        path = shards_dir / f"shard-{index:04d}.ndjson.gz"
+        body = path.read_bytes()
+        shards.append(
+            {
+                "id": f"shard-{index:04d}",
+                "url": f"shards/{path.name}",
+                "sha256": hashlib.sha256(body).hexdigest(),
+                "records": records,
+                "bytes": len(body),
+            }
+        )
+    manifest = {"packId": "en-test", "version": 1, "recordCount": 5, "compression": "gzip", "shards": shards}
+    (pack_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    (pack_dir / "checksums.txt").write_text(
+        "".join(f"{shard['sha256']}  {shard['url']}\n" for shard in shards),
+        encoding="utf-8",
+    )
+    return manifest
+
+
+def test_scan_file_counts_multi_member_gzip_lines(tmp_path: Path) -> None:
+    _write_pack(tmp_path)
+    scan = scan_file(tmp_path / "shards" / "shard-0001.ndjson.gz", want_hash=True, want_lines=True)
+    assert scan.lines == 4
+    assert scan.sha256 == hashlib.sha256(scan.path.read_bytes()).hexdigest()
+
+
+def test_verify_hashes_detects_corruption(tmp_path: Path) -> None:
+    _write_pack(tmp_path)
+    manifest_path = tmp_path / "manifest.json"
+
+    result = verify_pack(manifest_path, count_lines=True, verify_hashes=True, workers=2)
+    assert result["status"] == "ok"
+    assert result["actualShardLineSum"] == 5
+    assert result["scan"]["files"] == 2
+
+    shard = tmp_path / "shards" / "shard-0002.ndjson.gz"
+    shard.write_bytes(shard.read_bytes()[:-4] + b"\0\0\0\0")
+    result = verify_pack(manifest_path, count_lines=False, verify_hashes=True, workers=2)
+    assert result["status"] == "failed"
+    assert {mismatch["source"] for mismatch in result["hashMismatches"]} == {"manifest", "checksums.txt"}
+
+
+def _article_row(page_id: int, **overrides: object) -> str:
+    card = CardRecord(
+        page_id=page_id,
+        lang="en",
+        title=f"Card {page_id}",
+        summary=f"Card {page_id} summary.",
+        wiki_url=f"https://en.wikipedia.org/wiki/Card_{page_id}",
+        topic_key="science",
+    )
+    article = card.as_article_payload()
+    article.update(overrides)
+    return json.dumps({"article": article, "aliases": []})
+
+
+def test_deep_validation_reports_bad_rows_and_cross_shard_duplicates(tmp_path: Path) -> None:
+    shards_dir = tmp_path / "shards"
+    shards_dir.mkdir()
+    contents = {
+        "shard-0001.ndjson": [_article_row(1), _article_row(2, summary=""), _article_row(3)],
+        "shard-0002.ndjson": [_article_row(3), _article_row(4, lang="de"), "{not json"],
+    }
+    shards = []
+    for index, (name, rows) in enumerate(contents.items(), start=1):
+        body = ("\n".join(rows) + "\n").encode("utf-8")
+        (shards_dir / name).write_bytes(body)
+        shards.append({"id": f"shard-{index:04d}", "url": f"shards/{name}", "records": 3, "bytes": len(body)})
+    manifest = {"packId": "en-test", "language": "en", "version": 1, "recordCount": 6, "shards": shards}
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    result = verify_pack(tmp_path / "manifest.json", count_lines=False, deep=True, workers=2)
+
+    assert result["status"] == "failed"
+    deep = result["deep"]
+    assert deep["rows"] == 6
+    assert deep["invalidRows"] == 3
+    assert deep["duplicatePageIds"] == 1
+    assert deep["duplicateSamples"] == [3]
+    assert {(error["file"], error["line"]) for error in deep["errors"]} == {
+        ("shard-0001.ndjson", 2),
+        ("shard-0002.ndjson", 2),
+        ("shard-0002.ndjson", 3),
+    }
+
+    sampled = verify_pack(tmp_path / "manifest.json", count_lines=False, deep=True, sample_rate=0.01, workers=1)
+    assert sampled["deep"]["validatedRows"] < 6
+    assert sampled["deep"]["duplicatePageIds"] == 1
+
+
+def test_verify_resolves_content_addressed_urls(tmp_path: Path) -> None:
+    _write_pack(tmp_path / "pack")
+    site = tmp_path / "site"
+    publish_pack(
+        pack_dir=tmp_path / "pack",
+        output_dir=site / "packs" / "en-test" / "v1",
+        layout="content-addressed",
+        objects_dir=site / "objects",
+    )
+    result = verify_pack(
+        site / "packs" / "en-test" / "v1" / "manifest.json",
+        count_lines=True,
+        spot_check_ids=[5],
+        verify_hashes=True,
+    )
+    assert result["status"] == "ok", result["messages"]
+    assert result["declaredShardRecordSum"] == result["actualShardLineSum"] == 5
+    assert result["spotChecks"][0]["found"]
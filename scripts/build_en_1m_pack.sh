@@ -8,6 +8,8 @@ OUT_DIR="${OUT_DIR:-$ROOT_DIR/data/out/en-1m}"
 TARGET="${TARGET:-1000000}"
 SHARD_SIZE="${SHARD_SIZE:-40000}"
 COMPRESSION="${COMPRESSION:-none}"
+# TOPIC_INDEX=1 writes per-shard topic row offsets so thematic subsets can seek instead of scanning.
+TOPIC_INDEX="${TOPIC_INDEX:-1}"
 PACK_VERSION="${PACK_VERSION:-1}"
 PROGRESS_EVERY="${PROGRESS_EVERY:-50000}"
 PACK_PROGRESS_EVERY="${PACK_PROGRESS_EVERY:-100000}"
@@ -43,6 +45,11 @@ PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_en_1m_from_sql \
   --target "$TARGET" \
   --progress-every "$PROGRESS_EVERY"
 
+TOPIC_INDEX_ARGS=()
+if [[ "$TOPIC_INDEX" == "1" ]]; then
+  TOPIC_INDEX_ARGS=(--topic-index)
+fi
+
 log "Building sharded pack..."
 PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_pack \
   --input "$CARDS_NDJSON" \
@@ -53,6 +60,7 @@ PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_pack \
   --shard-size "$SHARD_SIZE" \
   --version "$PACK_VERSION" \
   --compression "$COMPRESSION" \
-  --progress-every "$PACK_PROGRESS_EVERY"
+  --progress-every "$PACK_PROGRESS_EVERY" \
+  ${TOPIC_INDEX_ARGS[@]+"${TOPIC_INDEX_ARGS[@]}"}
 
 log "Built pack at: $PACK_DIR"
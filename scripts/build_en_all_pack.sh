@@ -8,10 +8,16 @@ OUT_DIR="${OUT_DIR:-$ROOT_DIR/data/out/en-all}"
 TARGET="${TARGET:-999999999}"
 SHARD_SIZE="${SHARD_SIZE:-40000}"
 COMPRESSION="${COMPRESSION:-gzip}"
+# BLOCK_SIZE=1048576 writes range-downloadable gzip blocks plus a per-shard block index.
+BLOCK_SIZE="${BLOCK_SIZE:-0}"
+# TOPIC_INDEX=1 writes per-shard topic row offsets so thematic subsets can seek instead of scanning.
+TOPIC_INDEX="${TOPIC_INDEX:-1}"
 PACK_VERSION="${PACK_VERSION:-1}"
 PACK_ID="${PACK_ID:-en-all-summaries}"
 PROGRESS_EVERY="${PROGRESS_EVERY:-50000}"
 PACK_PROGRESS_EVERY="${PACK_PROGRESS_EVERY:-100000}"
+# RESUME=1 continues an interrupted run from the stage checkpoints.
+RESUME="${RESUME:-0}"
 
 PAGE_SQL_GZ="$DUMPS_DIR/enwiki-latest-page.sql.gz"
 PROPS_SQL_GZ="$DUMPS_DIR/enwiki-latest-page_props.sql.gz"
@@ -36,18 +42,33 @@ if [[ ! -f "$PROPS_SQL_GZ" ]]; then
     https://dumps.wikimedia.org/enwiki/latest/enwiki-latest-page_props.sql.gz
 fi
 
-log "Extracting cards from dumps (this is the longest step)..."
-PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_en_1m_from_sql \
-  --page-sql-gz "$PAGE_SQL_GZ" \
-  --page-props-sql-gz "$PROPS_SQL_GZ" \
-  --output-ndjson "$CARDS_NDJSON" \
-  --target "$TARGET" \
-  --oversample 1.05 \
-  --progress-every "$PROGRESS_EVERY"
+RESUME_ARGS=()
+if [[ "$RESUME" == "1" ]]; then
+  RESUME_ARGS=(--resume)
+fi
+
+if [[ "$RESUME" == "1" && -f "$CARDS_NDJSON" && ! -d "$CARDS_NDJSON.checkpoint" ]]; then
+  log "Card extraction already complete, skipping: $CARDS_NDJSON"
+else
+  log "Extracting cards from dumps (this is the longest step)..."
+  PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_en_1m_from_sql \
+    --page-sql-gz "$PAGE_SQL_GZ" \
+    --page-props-sql-gz "$PROPS_SQL_GZ" \
+    --output-ndjson "$CARDS_NDJSON" \
+    --target "$TARGET" \
+    --oversample 1.05 \
+    --progress-every "$PROGRESS_EVERY" \
+    ${RESUME_ARGS[@]+"${RESUME_ARGS[@]}"}
+fi
 
 actual_count=$(wc -l < "$CARDS_NDJSON" | tr -d '[:space:]')
 log "Card extraction complete: $actual_count records"
 
+TOPIC_INDEX_ARGS=()
+if [[ "$TOPIC_INDEX" == "1" ]]; then
+  TOPIC_INDEX_ARGS=(--topic-index)
+fi
+
 log "Building sharded pack..."
 PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_pack \
   --input "$CARDS_NDJSON" \
@@ -58,7 +79,10 @@ PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_pack \
   --shard-size "$SHARD_SIZE" \
   --version "$PACK_VERSION" \
   --compression "$COMPRESSION" \
-  --progress-every "$PACK_PROGRESS_EVERY"
+  --block-size "$BLOCK_SIZE" \
+  --progress-every "$PACK_PROGRESS_EVERY" \
+  ${TOPIC_INDEX_ARGS[@]+"${TOPIC_INDEX_ARGS[@]}"} \
+  ${RESUME_ARGS[@]+"${RESUME_ARGS[@]}"}
 
 log "Built full EN pack at: $PACK_DIR"
 log "Records: $actual_count"
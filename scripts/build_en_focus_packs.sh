@@ -26,13 +26,19 @@ fi
 
 mkdir -p "$OUT_ROOT" "$SITE_ROOT"
 
+# LAYOUT=content-addressed stores shards once under OBJECTS_DIR, shared across packs and versions.
+LAYOUT="${LAYOUT:-versioned}"
+OBJECTS_DIR="${OBJECTS_DIR:-$ROOT_DIR/data/site/objects}"
+LAYOUT_ARGS=(--layout "$LAYOUT")
+if [[ "$LAYOUT" == "content-addressed" ]]; then
+  LAYOUT_ARGS+=(--objects-dir "$OBJECTS_DIR")
+fi
+
 build_one_pack() {
   local pack_id="$1"
-  local topics="$2"
-  local target="$3"
-  local shard_size="$4"
-  local compression="$5"
-  local version="$6"
+  local shard_size="$2"
+  local compression="$3"
+  local version="$4"
 
   local pack_out="$OUT_ROOT/${pack_id}"
   local cards_path="$pack_out/cards.ndjson"
@@ -43,14 +49,6 @@ build_one_pack() {
 
   mkdir -p "$pack_out" "$pack_dir" "$publish_dir"
 
-  echo "Building subset cards for ${pack_id} (${target} target)..."
-  PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_topic_subset \
-    --source-manifest "$SOURCE_MANIFEST" \
-    --output-ndjson "$cards_path" \
-    --language "en" \
-    --allowed-topics "$topics" \
-    --target "$target"
-
   local actual_count
   actual_count=$(wc -l < "$cards_path" | tr -d '[:space:]')
   if [[ "$actual_count" -eq 0 ]]; then
@@ -75,12 +73,42 @@ build_one_pack() {
     --output-dir "$publish_dir" \
     --base-url "$base_url" \
     --latest-pointer "$latest_pointer" \
+    "${LAYOUT_ARGS[@]}" \
     --clean
 
   echo "Done: ${pack_id} -> ${publish_dir}"
 }
 
-build_one_pack "en-science-250k" "science,technology,health,environment" "$SCI_TARGET" "$SCI_SHARD_SIZE" "$SCI_COMPRESSION" "$SCI_VERSION"
-build_one_pack "en-history-250k" "history,biography,culture,politics" "$HIS_TARGET" "$HIS_SHARD_SIZE" "$HIS_COMPRESSION" "$HIS_VERSION"
+# Values go in as arguments so json.dumps escapes paths containing quotes or backslashes.
+write_subsets_config() {
+  python3 - "$@" <<'PY'
+import json
+import sys
+
+config, out_root, *specs = sys.argv[1:]
+subsets = [
+    {"name": name, "topics": topics, "target": int(target), "output": f"{out_root}/{name}/cards.ndjson"}
+    for name, topics, target in zip(specs[0::3], specs[1::3], specs[2::3])
+]
+with open(config, "w", encoding="utf-8") as handle:
+    json.dump({"subsets": subsets}, handle, indent=2)
+    handle.write("\n")
+PY
+}
+
+# Both subsets come from one streaming pass over the source pack.
+SUBSETS_CONFIG="$OUT_ROOT/subsets.json"
+write_subsets_config "$SUBSETS_CONFIG" "$OUT_ROOT" \
+  en-science-250k "science,technology,health,environment" "$SCI_TARGET" \
+  en-history-250k "history,biography,culture,politics" "$HIS_TARGET"
+
+echo "Building subset cards for all focus packs in one pass..."
+PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_topic_subset \
+  --source-manifest "$SOURCE_MANIFEST" \
+  --language "en" \
+  --config "$SUBSETS_CONFIG"
+
+build_one_pack "en-science-250k" "$SCI_SHARD_SIZE" "$SCI_COMPRESSION" "$SCI_VERSION"
+build_one_pack "en-history-250k" "$HIS_SHARD_SIZE" "$HIS_COMPRESSION" "$HIS_VERSION"
 
 echo "Focus packs generated and published under: $SITE_ROOT"
@@ -24,11 +24,17 @@ fi
 
 mkdir -p "$OUT_ROOT" "$SITE_ROOT"
 
+# LAYOUT=content-addressed stores shards once under OBJECTS_DIR, shared across packs and versions.
+LAYOUT="${LAYOUT:-versioned}"
+OBJECTS_DIR="${OBJECTS_DIR:-$ROOT_DIR/data/site/objects}"
+LAYOUT_ARGS=(--layout "$LAYOUT")
+if [[ "$LAYOUT" == "content-addressed" ]]; then
+  LAYOUT_ARGS+=(--objects-dir "$OBJECTS_DIR")
+fi
+
 build_one_pack() {
   local pack_id="$1"
-  local topics="$2"
-  local target="$3"
-  local shard_size="$4"
+  local shard_size="$2"
 
   local pack_out="$OUT_ROOT/${pack_id}"
   local cards_path="$pack_out/cards.ndjson"
@@ -39,14 +45,6 @@ build_one_pack() {
 
   mkdir -p "$pack_out" "$pack_dir" "$publish_dir"
 
-  echo "Building subset cards for ${pack_id} (target=${target}, topics=${topics})..."
-  PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_topic_subset \
-    --source-manifest "$SOURCE_MANIFEST" \
-    --output-ndjson "$cards_path" \
-    --language "$LANGUAGE" \
-    --allowed-topics "$topics" \
-    --target "$target"
-
   local actual_count
   actual_count=$(wc -l < "$cards_path" | tr -d '[:space:]')
   if [[ "$actual_count" -eq 0 ]]; then
@@ -71,6 +69,7 @@ build_one_pack() {
     --output-dir "$publish_dir" \
     --base-url "$base_url" \
     --latest-pointer "$latest_pointer" \
+    "${LAYOUT_ARGS[@]}" \
     --clean
 
   echo "Done: ${pack_id} -> ${publish_dir}"
@@ -88,11 +87,43 @@ GEO_SHARD_SIZE="${GEO_SHARD_SIZE:-40000}"
 CULTURE_TARGET="${CULTURE_TARGET:-500000}"
 CULTURE_SHARD_SIZE="${CULTURE_SHARD_SIZE:-40000}"
 
-build_one_pack "en-stem-500k" "science,technology,health,environment" "$STEM_TARGET" "$STEM_SHARD_SIZE"
-build_one_pack "en-history-politics-500k" "history,politics,economics" "$HISTORY_TARGET" "$HISTORY_SHARD_SIZE"
-build_one_pack "en-biography-500k" "biography" "$BIO_TARGET" "$BIO_SHARD_SIZE"
-build_one_pack "en-geography-500k" "geography" "$GEO_TARGET" "$GEO_SHARD_SIZE"
-build_one_pack "en-culture-500k" "culture,society,sports" "$CULTURE_TARGET" "$CULTURE_SHARD_SIZE"
+# Values go in as arguments so json.dumps escapes paths containing quotes or backslashes.
+write_subsets_config() {
+  python3 - "$@" <<'PY'
+import json
+import sys
+
+config, out_root, *specs = sys.argv[1:]
+subsets = [
+    {"name": name, "topics": topics, "target": int(target), "output": f"{out_root}/{name}/cards.ndjson"}
+    for name, topics, target in zip(specs[0::3], specs[1::3], specs[2::3])
+]
+with open(config, "w", encoding="utf-8") as handle:
+    json.dump({"subsets": subsets}, handle, indent=2)
+    handle.write("\n")
+PY
+}
+
+# All subsets come from one streaming pass over the source pack.
+SUBSETS_CONFIG="$OUT_ROOT/subsets.json"
+write_subsets_config "$SUBSETS_CONFIG" "$OUT_ROOT" \
+  en-stem-500k "science,technology,health,environment" "$STEM_TARGET" \
+  en-history-politics-500k "history,politics,economics" "$HISTORY_TARGET" \
+  en-biography-500k "biography" "$BIO_TARGET" \
+  en-geography-500k "geography" "$GEO_TARGET" \
+  en-culture-500k "culture,society,sports" "$CULTURE_TARGET"
+
+echo "Building subset cards for all thematic packs in one pass..."
+PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.build_topic_subset \
+  --source-manifest "$SOURCE_MANIFEST" \
+  --language "$LANGUAGE" \
+  --config "$SUBSETS_CONFIG"
+
+build_one_pack "en-stem-500k" "$STEM_SHARD_SIZE"
+build_one_pack "en-history-politics-500k" "$HISTORY_SHARD_SIZE"
+build_one_pack "en-biography-500k" "$BIO_SHARD_SIZE"
+build_one_pack "en-geography-500k" "$GEO_SHARD_SIZE"
+build_one_pack "en-culture-500k" "$CULTURE_SHARD_SIZE"
 
 echo "Thematic packs generated and published under: $SITE_ROOT"
 echo "Upload to R2 with:"
@@ -8,12 +8,41 @@ PACK_DIR="${PACK_DIR:-$ROOT_DIR/data/out/en-1m/pack-v1}"
 OUTPUT_DIR="${OUTPUT_DIR:-$ROOT_DIR/data/site/packs/en-core-1m/v1}"
 BASE_URL="${BASE_URL:-}"
 LATEST_POINTER="${LATEST_POINTER:-$ROOT_DIR/data/site/packs/en-core-1m/latest.json}"
+LINK_MODE="${LINK_MODE:-auto}"
+# CLEAN=0 keeps the output dir so unchanged files are skipped on republish.
+CLEAN="${CLEAN:-1}"
+
+# Optional direct upload to S3-compatible storage (credentials from AWS_* env vars).
+S3_BUCKET="${S3_BUCKET:-}"
+S3_PREFIX="${S3_PREFIX:-packs/en-core-1m/v1}"
+S3_ENDPOINT_URL="${S3_ENDPOINT_URL:-}"
+
+# LAYOUT=content-addressed stores shards once under OBJECTS_DIR, shared across packs and versions.
+LAYOUT="${LAYOUT:-versioned}"
+OBJECTS_DIR="${OBJECTS_DIR:-$ROOT_DIR/data/site/objects}"
+LAYOUT_ARGS=(--layout "$LAYOUT")
+if [[ "$LAYOUT" == "content-addressed" ]]; then
+  LAYOUT_ARGS+=(--objects-dir "$OBJECTS_DIR")
+fi
+
+CLEAN_ARGS=()
+if [[ "$CLEAN" == "1" ]]; then
+  CLEAN_ARGS=(--clean)
+fi
+
+S3_ARGS=()
+if [[ -n "$S3_BUCKET" ]]; then
+  S3_ARGS=(--s3-bucket "$S3_BUCKET" --s3-prefix "$S3_PREFIX" --s3-endpoint-url "$S3_ENDPOINT_URL")
+fi
 
 PYTHONPATH="$PIPELINE_SRC" python3 -m doompedia_pipeline.publish_pack \
   --pack-dir "$PACK_DIR" \
   --output-dir "$OUTPUT_DIR" \
   --base-url "$BASE_URL" \
   --latest-pointer "$LATEST_POINTER" \
-  --clean
+  --link-mode "$LINK_MODE" \
+  "${LAYOUT_ARGS[@]}" \
+  ${CLEAN_ARGS[@]+"${CLEAN_ARGS[@]}"} \
+  ${S3_ARGS[@]+"${S3_ARGS[@]}"}
 
 echo "Published pack to: $OUTPUT_DIR"